@@ -1,12 +1,15 @@
+import hashlib
 import os
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple, Union
 
 import jwt
 from chainlit.config import config
 from chainlit.data import get_data_layer
 from chainlit.oauth_providers import get_configured_oauth_providers
-from chainlit.user import User
+from chainlit.user import PersistedUser, User
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 
@@ -59,7 +62,95 @@ def create_jwt(data: User) -> str:
     return encoded_jwt
 
 
+# Number of tokens for which the user is cached
+USER_CACHE_SIZE = 1000
+# Duration (in seconds) during which an invalid token is remembered
+INVALID_TOKEN_CACHE_TTL = 10
+
+# None for an invalid token
+CachedUser = Optional[Union[User, PersistedUser]]
+
+
+class UserCache:
+    """
+    LRU cache of the users of verified tokens, each entry expiring after its own TTL.
+
+    Tokens are stored hashed. Invalid tokens are cached as well (negative caching),
+    so a client retrying with a bad token doesn't get it decoded every time.
+    Each worker process has its own cache.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+
+        # Token hash -> (expiry time, user, or None if the token is invalid)
+        self._entries: "OrderedDict[str, Tuple[float, CachedUser]]" = OrderedDict()
+
+        # Metrics
+        self.hit_count = 0
+        self.invalid_hit_count = 0
+        self.miss_count = 0
+
+    @staticmethod
+    def hash_token(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Tuple[bool, CachedUser]:
+        """Return whether the token is cached and its user (None if the token is invalid)."""
+        key = self.hash_token(token)
+        entry = self._entries.get(key)
+
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(key, None)
+            self.miss_count += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        if entry[1] is None:
+            self.invalid_hit_count += 1
+        else:
+            self.hit_count += 1
+        return True, entry[1]
+
+    def set(self, token: str, user: CachedUser, ttl: float):
+        if ttl <= 0:
+            return
+        key = self.hash_token(token)
+        self._entries[key] = (time.monotonic() + ttl, user)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, token: str):
+        self._entries.pop(self.hash_token(token), None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hit_count,
+            "invalid_hits": self.invalid_hit_count,
+            "misses": self.miss_count,
+        }
+
+
+user_cache = UserCache(max_size=USER_CACHE_SIZE)
+
+
 async def authenticate_user(token: str = Depends(reuseable_oauth)):
+    cache_ttl = config.project.user_cache_ttl if token else 0
+
+    if cache_ttl > 0:
+        found, cached_user = user_cache.get(token)
+        if found:
+            if cached_user is None:
+                raise HTTPException(
+                    status_code=401, detail="Invalid authentication token"
+                )
+            return cached_user
+
     try:
         dict = jwt.decode(
             token,
@@ -67,20 +158,29 @@ async def authenticate_user(token: str = Depends(reuseable_oauth)):
             algorithms=["HS256"],
             options={"verify_signature": True},
         )
-        del dict["exp"]
+        expires_at = dict.pop("exp")
         user = User(**dict)
     except Exception as e:
+        user_cache.set(token, None, min(cache_ttl, INVALID_TOKEN_CACHE_TTL))
         raise HTTPException(status_code=401, detail="Invalid authentication token")
+
+    # The user is not cached beyond the token expiration
+    cache_ttl = min(cache_ttl, expires_at - time.time())
+
     if data_layer := get_data_layer():
         try:
             persisted_user = await data_layer.get_user(user.identifier)
             if persisted_user == None:
                 persisted_user = await data_layer.create_user(user)
         except Exception as e:
+            # Not cached, the data layer may be back on the next request
             return user
 
+        if persisted_user:
+            user_cache.set(token, persisted_user, cache_ttl)
         return persisted_user
     else:
+        user_cache.set(token, user, cache_ttl)
         return user
 
 
@@ -1,5 +1,12 @@
+import asyncio
+import functools
+import inspect
 import os
+import pickle
 import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
 
 from chainlit.config import config
 from chainlit.logger import logger
@@ -25,23 +32,179 @@ def init_lc_cache():
                 )
 
 
-_cache = {}
-_cache_lock = threading.Lock()
+# Default number of results kept per cached function
+DEFAULT_CACHE_SIZE = 128
 
 
-def cache(func):
-    def wrapper(*args, **kwargs):
-        # Create a cache key based on the function name, arguments, and keyword arguments
-        cache_key = (
-            (func.__name__,) + args + tuple((k, v) for k, v in sorted(kwargs.items()))
-        )
+def make_key(args: Tuple, kwargs: Dict) -> Hashable:
+    key = args + tuple(sorted(kwargs.items()))
+    try:
+        hash(key)
+        return key
+    except TypeError:
+        # Unhashable arguments (e.g. lists or dicts) are compared by value
+        try:
+            return pickle.dumps(key)
+        except Exception:
+            return repr(key)
+
+
+class ResultCache:
+    """
+    Results of a cached function, evicted in LRU order and after an optional TTL.
+
+    Concurrent calls with the same arguments share one computation (single flight),
+    calls with different arguments don't wait for each other.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float]):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        # Key -> (expiry time, result)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # Guards the entries, never held while computing
+        self._lock = threading.Lock()
+        # Key -> lock held while computing the result of a sync function
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        # Key -> number of threads holding or waiting for the key lock
+        self._key_lock_users: Dict[Hashable, int] = {}
+        # Key -> task computing the result of a coroutine function
+        self._tasks: Dict[Hashable, "asyncio.Task"] = {}
+
+        # Metrics
+        self.hit_count = 0
+        self.miss_count = 0
+        self.eviction_count = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        expires_at = time.monotonic() + self.ttl if self.ttl else float("inf")
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.eviction_count += 1
+
+    def call(self, func: Callable, key: Hashable, args: Tuple, kwargs: Dict):
+        found, value = self.get(key)
+        if found:
+            self.hit_count += 1
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+            self._key_lock_users[key] = self._key_lock_users.get(key, 0) + 1
+
+        try:
+            with key_lock:
+                # Computed by another thread meanwhile
+                found, value = self.get(key)
+                if found:
+                    self.hit_count += 1
+                    return value
+
+                self.miss_count += 1
+                value = func(*args, **kwargs)
+                self.set(key, value)
+                return value
+        finally:
+            # The lock is dropped once no thread waits for it, so that a failed computation
+            # is retried by the waiting threads one at a time
+            with self._lock:
+                self._key_lock_users[key] -= 1
+                if not self._key_lock_users[key]:
+                    del self._key_lock_users[key]
+                    del self._key_locks[key]
+
+    async def acall(self, func: Callable, key: Hashable, args: Tuple, kwargs: Dict):
+        found, value = self.get(key)
+        if found:
+            self.hit_count += 1
+            return value
+
+        task = self._tasks.get(key)
+        if task is None:
+            self.miss_count += 1
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._on_computed(key, t))
+        else:
+            self.hit_count += 1
+
+        # A cancelled caller doesn't cancel the computation shared with the others
+        return await asyncio.shield(task)
+
+    def _on_computed(self, key: Hashable, task: "asyncio.Task"):
+        self._tasks.pop(key, None)
+        # Exceptions are not cached
+        if not task.cancelled() and task.exception() is None:
+            self.set(key, task.result())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.hit_count + self.miss_count
+        return {
+            "hits": self.hit_count,
+            "misses": self.miss_count,
+            "hit_rate": self.hit_count / calls if calls else 0.0,
+            "evictions": self.eviction_count,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
+
+
+def cache(
+    func: Optional[Callable] = None,
+    *,
+    max_size: int = DEFAULT_CACHE_SIZE,
+    ttl: Optional[float] = None,
+):
+    """
+    Cache the results of a function (sync or async) by arguments.
+
+    Use it as `@cache` or `@cache(max_size=16, ttl=3600)`. `ttl` is in seconds, results never expire by default.
+    The decorated function exposes `cache_stats()` and `cache_clear()`.
+    """
+
+    def decorator(func: Callable):
+        results = ResultCache(max_size=max_size, ttl=ttl)
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = make_key(args, kwargs)
+                return await results.acall(func, key, args, kwargs)
+
+            wrapper = async_wrapper  # type: Any
+        else:
+
+            @functools.wraps(func)
+            def sync_wrapper(*args, **kwargs):
+                key = make_key(args, kwargs)
+                return results.call(func, key, args, kwargs)
 
-        with _cache_lock:
-            # Check if the result is already in the cache
-            if cache_key not in _cache:
-                # If not, call the function and store the result in the cache
-                _cache[cache_key] = func(*args, **kwargs)
+            wrapper = sync_wrapper
 
-        return _cache[cache_key]
+        wrapper.cache_stats = results.stats
+        wrapper.cache_clear = results.clear
+        return wrapper
 
-    return wrapper
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -1,19 +1,19 @@
 import asyncio
 import os
+import shutil
 
 import click
 import nest_asyncio
 import uvicorn
-
-nest_asyncio.apply()
-
 from chainlit.auth import ensure_jwt_secret
 from chainlit.cache import init_lc_cache
 from chainlit.cli.utils import check_file
+from chainlit.cli.workers import WORKER_HOST, run_workers
 from chainlit.config import (
     BACKEND_ROOT,
     DEFAULT_HOST,
     DEFAULT_PORT,
+    FILES_DIRECTORY,
     config,
     init_config,
     load_module,
@@ -67,20 +67,53 @@ def run_chainlit(target: str):
     log_level = "debug" if config.run.debug else "error"
 
     # Start the server
-    async def start():
-        config = uvicorn.Config(
+    async def start(sockets=None, **kwargs):
+        uvicorn_config = uvicorn.Config(
             app,
             host=host,
             port=port,
             log_level=log_level,
             ws_per_message_deflate=ws_per_message_deflate,
+            **kwargs,
         )
-        server = uvicorn.Server(config)
-        await server.serve()
-
-    # Run the asyncio event loop instead of uvloop to enable re entrance
-    asyncio.run(start())
-    # uvicorn.run(app, host=host, port=port, log_level=log_level)
+        server = uvicorn.Server(uvicorn_config)
+        await server.serve(sockets=sockets)
+
+    if config.run.workers > 1:
+
+        def serve_worker(index, sock):
+            # Only the first worker opens the browser
+            config.run.headless = config.run.headless or index > 0
+            # Client addresses are forwarded by the proxy, don't trust other sources
+            run_event_loop(
+                start(
+                    sockets=[sock],
+                    proxy_headers=True,
+                    forwarded_allow_ips=WORKER_HOST,
+                )
+            )
+
+        try:
+            run_workers(host, port, config.run.workers, serve_worker)
+        finally:
+            # The workers share the files directory, remove it once they all exited
+            shutil.rmtree(FILES_DIRECTORY, ignore_errors=True)
+        return
+
+    run_event_loop(start())
+
+
+def run_event_loop(main):
+    if config.run.loop == "uvloop":
+        # No re entrance: run_sync dispatches to the loop from threads only
+        import uvloop
+
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        asyncio.run(main)
+    else:
+        # Run the asyncio event loop instead of uvloop to enable re entrance
+        nest_asyncio.apply()
+        asyncio.run(main)
 
 
 # Define the "run" command for Chainlit CLI
@@ -127,7 +160,23 @@ def run_chainlit(target: str):
 )
 @click.option("--host", help="Specify a different host to run the server on")
 @click.option("--port", help="Specify a different port to run the server on")
-def chainlit_run(target, watch, headless, debug, ci, no_cache, host, port):
+@click.option(
+    "--workers",
+    default=1,
+    type=click.IntRange(min=1),
+    envvar="WORKERS",
+    help="Number of worker processes. Connections are routed to the workers by session id.",
+)
+@click.option(
+    "--loop",
+    default="asyncio",
+    type=click.Choice(["asyncio", "uvloop"]),
+    envvar="LOOP",
+    help="Event loop implementation. With uvloop, run_sync can only be called from threads.",
+)
+def chainlit_run(
+    target, watch, headless, debug, ci, no_cache, host, port, workers, loop
+):
     if host:
         os.environ["CHAINLIT_HOST"] = host
     if port:
@@ -149,6 +198,19 @@ def chainlit_run(target, watch, headless, debug, ci, no_cache, host, port):
     config.run.no_cache = no_cache
     config.run.ci = ci
     config.run.watch = watch
+    config.run.workers = workers
+    config.run.loop = loop
+
+    if watch and workers > 1:
+        raise click.BadOptionUsage("workers", "--watch requires a single worker")
+
+    if loop == "uvloop":
+        try:
+            import uvloop  # noqa: F401
+        except ImportError:
+            raise click.BadOptionUsage(
+                "loop", "The uvloop package is required. Run `pip install uvloop`."
+            )
 
     run_chainlit(target)
 
@@ -0,0 +1,282 @@
+"""
+Multi-process mode of `chainlit run --workers N`.
+
+The app is loaded once, then N workers are forked, each serving the app on its own local socket.
+The parent process runs a lightweight sticky proxy on the public host and port.
+
+Socket.io requires every request of a connection (handshake, polling, websocket upgrade)
+to reach the same worker. The proxy routes a request with the following contract,
+which can also be implemented by an external load balancer in front of separate instances:
+- the session id is read from the `X-Chainlit-Session-Id` header, or the `sessionId` (socket.io)
+  or `session_id` (REST endpoints) query parameter (browsers can't set headers on websocket upgrades),
+- the worker is `crc32(session_id) % N`,
+- requests without session id go to any worker.
+
+Proxied HTTP requests are sent with `Connection: close` so that a keep-alive connection
+can't carry requests of different sessions. Websocket upgrades are piped as is.
+The client address is appended to `X-Forwarded-For` and set as `X-Real-IP`, the workers only
+trust these headers from the proxy.
+
+The parent process only supervises: the workers and the proxy are forked from it and restarted
+on the same sockets when they exit.
+"""
+
+import asyncio
+import itertools
+import os
+import signal
+import socket
+import time
+import urllib.parse
+import zlib
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from chainlit.logger import logger
+
+SESSION_HEADER = b"x-chainlit-session-id"
+SESSION_QUERY_PARAMS = ["sessionId", "session_id"]
+FORWARDED_FOR_HEADER = b"x-forwarded-for"
+REAL_IP_HEADER = b"x-real-ip"
+
+# Address of the workers sockets, the only one they trust forwarded headers from
+WORKER_HOST = "127.0.0.1"
+
+# Delay (in seconds) between two checks of the worker processes
+SUPERVISE_INTERVAL = 0.5
+# Workers exiting sooner (in seconds) after their start are restarted after this delay
+MIN_UPTIME = 1.0
+
+
+def get_session_key(request_line: bytes, header_lines: List[bytes]) -> Optional[str]:
+    """Get the session id used to route a request."""
+    for line in header_lines:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == SESSION_HEADER and value.strip():
+            return value.strip().decode("latin-1")
+
+    try:
+        target = request_line.split(b" ")[1].decode("latin-1")
+    except IndexError:
+        return None
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(target).query)
+    for param in SESSION_QUERY_PARAMS:
+        if values := query.get(param):
+            return values[0]
+    return None
+
+
+def forward_client_address(header_lines: List[bytes], address: str) -> List[bytes]:
+    """Append the client address to X-Forwarded-For and set it as X-Real-IP."""
+    forwarded_for = []
+    lines = []
+    for line in header_lines:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == FORWARDED_FOR_HEADER:
+            forwarded_for.append(value.strip())
+        elif name != REAL_IP_HEADER:
+            lines.append(line)
+
+    client = address.encode("latin-1")
+    forwarded_for.append(client)
+    return lines + [
+        b"X-Forwarded-For: " + b", ".join(forwarded_for),
+        b"X-Real-IP: " + client,
+    ]
+
+
+def get_worker_index(session_key: str, workers: int) -> int:
+    return zlib.crc32(session_key.encode("utf-8")) % workers
+
+
+async def pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while data := await reader.read(65536):
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+
+
+class StickyProxy:
+    """Route the incoming connections to the workers, by session id."""
+
+    def __init__(self, workers: List[Tuple[str, int]]):
+        self.workers = workers
+        self._round_robin = itertools.cycle(range(len(workers)))
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    def pick(self, session_key: Optional[str]) -> Tuple[str, int]:
+        if session_key:
+            return self.workers[get_worker_index(session_key, len(self.workers))]
+        return self.workers[next(self._round_robin)]
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        upstream_writer = None
+        self._writers.add(writer)
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            request_line, *header_lines = head[:-4].split(b"\r\n")
+
+            is_upgrade = any(
+                line.partition(b":")[0].strip().lower() == b"upgrade"
+                for line in header_lines
+            )
+            if not is_upgrade:
+                header_lines = [
+                    line
+                    for line in header_lines
+                    if line.partition(b":")[0].strip().lower() != b"connection"
+                ] + [b"Connection: close"]
+
+            if peer := writer.get_extra_info("peername"):
+                header_lines = forward_client_address(header_lines, peer[0])
+
+            host, port = self.pick(get_session_key(request_line, header_lines))
+            upstream_reader, upstream_writer = await asyncio.open_connection(host, port)
+            self._writers.add(upstream_writer)
+            upstream_writer.write(b"\r\n".join([request_line, *header_lines]))
+            upstream_writer.write(b"\r\n\r\n")
+
+            to_upstream = asyncio.ensure_future(pipe(reader, upstream_writer))
+            to_client = asyncio.ensure_future(pipe(upstream_reader, writer))
+
+            done, _ = await asyncio.wait(
+                [to_upstream, to_client], return_when=asyncio.FIRST_COMPLETED
+            )
+            if to_upstream in done and not to_client.done():
+                # The client is done sending, wait for the response
+                if upstream_writer.can_write_eof():
+                    upstream_writer.write_eof()
+                await to_client
+            to_upstream.cancel()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        except ConnectionError as e:
+            logger.error(f"Worker connection error: {e}")
+        finally:
+            for w in (writer, upstream_writer):
+                if w:
+                    self._writers.discard(w)
+                    w.close()
+
+    async def serve(self, sock: socket.socket):
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        server = await asyncio.start_server(self.handle, sock=sock)
+        async with server:
+            await stop.wait()
+
+        # Let the workers shut down without waiting for the open connections
+        for writer in list(self._writers):
+            writer.close()
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def fork(child: Callable[[], None], close: List[socket.socket]) -> int:
+    """Fork a process running `child`, closing the sockets it doesn't use."""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            for sock in close:
+                sock.close()
+            # Signals are handled by the child itself
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, signal.SIG_DFL)
+            # The event loop created at import time shares its selector with the parent
+            asyncio.set_event_loop(asyncio.new_event_loop())
+            child()
+        finally:
+            os._exit(0)
+    return pid
+
+
+def run_workers(
+    host: str,
+    port: int,
+    workers: int,
+    serve: Callable[[int, socket.socket], None],
+):
+    """
+    Fork `workers` processes running `serve(index, sock)` and a proxy routing the public socket to them.
+
+    The parent process supervises its children: a worker (or the proxy) that exits is forked
+    again on the same socket, so its share of the sessions is served again.
+    """
+    if not hasattr(os, "fork"):
+        raise RuntimeError(
+            "Running multiple workers requires a platform supporting fork"
+        )
+
+    public_sock = bind_socket(host, port)
+    worker_socks = [bind_socket(WORKER_HOST, 0) for _ in range(workers)]
+    all_socks = [public_sock, *worker_socks]
+
+    def start_worker(index: int) -> int:
+        sock = worker_socks[index]
+        return fork(lambda: serve(index, sock), [s for s in all_socks if s is not sock])
+
+    def start_proxy() -> int:
+        proxy = StickyProxy([sock.getsockname()[:2] for sock in worker_socks])
+        return fork(lambda: asyncio.run(proxy.serve(public_sock)), worker_socks)
+
+    # Pid -> (worker index or None for the proxy, start time)
+    children: Dict[int, Tuple[Optional[int], float]] = {}
+    for index in range(workers):
+        children[start_worker(index)] = (index, time.monotonic())
+    logger.info(f"Started {workers} workers (pids {', '.join(map(str, children))})")
+    children[start_proxy()] = (None, time.monotonic())
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, stop)
+
+    try:
+        while not stopping:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                time.sleep(SUPERVISE_INTERVAL)
+                continue
+
+            child_index, started_at = children.pop(pid)
+            if stopping:
+                break
+            name = "Proxy" if child_index is None else f"Worker {child_index}"
+            logger.error(f"{name} (pid {pid}) exited with status {status}, restarting")
+            # Don't fork in a loop when the child fails on start
+            if time.monotonic() - started_at < MIN_UPTIME:
+                time.sleep(MIN_UPTIME)
+            if child_index is None:
+                new_pid = start_proxy()
+            else:
+                new_pid = start_worker(child_index)
+            children[new_pid] = (child_index, time.monotonic())
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        for sock in all_socks:
+            sock.close()
@@ -0,0 +1,53 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class HybridLogicalClock:
+    """
+    Strictly increasing clock, expressed in microseconds since the epoch.
+
+    Each tick follows the wall clock but is guaranteed to be greater than the previous one,
+    so steps created in the same microsecond (or after a clock adjustment) still get distinct and ordered values.
+    """
+
+    def __init__(self):
+        self._last = 0
+        self._lock = threading.Lock()
+
+    def tick(self) -> int:
+        with self._lock:
+            self._last = max(time.time_ns() // 1000, self._last + 1)
+            return self._last
+
+
+_clock = HybridLogicalClock()
+
+
+def next_sequence() -> int:
+    """Return the next value of the process wide clock. Used to order steps and elements."""
+    return _clock.tick()
+
+
+def sequence_to_utc(sequence: int) -> str:
+    """Format a sequence as an UTC ISO timestamp."""
+    return (EPOCH + timedelta(microseconds=sequence)).isoformat() + "Z"
+
+
+def utc_to_sequence(timestamp: Optional[str]) -> int:
+    """Convert an UTC ISO timestamp to a sequence. Used for steps persisted without sequence."""
+    if not timestamp:
+        return 0
+    try:
+        dt = datetime.fromisoformat(timestamp.rstrip("Z"))
+    except ValueError:
+        return 0
+    return (dt.replace(tzinfo=None) - EPOCH) // timedelta(microseconds=1)
+
+
+def utc_now() -> str:
+    """Unique and monotonic replacement of literalai.helper.utc_now."""
+    return sequence_to_utc(next_sequence())
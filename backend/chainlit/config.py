@@ -57,6 +57,40 @@ allow_origins = ["*"]
 # Follow symlink for asset mount (see https://github.com/Chainlit/chainlit/issues/317)
 # follow_symlink = false
 
+# Directories whose files are served in place when sent as elements by path, instead of being copied
+# file_reference_roots = []
+
+# Duration (in seconds) during which streamed tokens are buffered and sent to the UI in a single batch
+# stream_flush_interval = 0.05
+
+# Size (in bytes) of the buffered tokens triggering an immediate flush
+# stream_flush_max_bytes = 4096
+
+# Number of events queued for a client above which the app waits for them to be sent
+# outbound_queue_size = 1000
+
+# Number of events sent to a client between two acknowledgements, the app waits for the client to handle them. 0 to disable.
+# client_sync_interval = 500
+
+# Duration (in seconds) during which step writes are buffered and sent to the data layer in a single batch
+# persistence_flush_interval = 0.5
+
+# Number of buffered steps triggering an immediate write
+# persistence_batch_size = 100
+
+# Duration (in seconds) during which pending background tasks (e.g. data persistence) are awaited on shutdown
+# shutdown_timeout = 10
+
+# Duration (in seconds) during which an authenticated user is reused without querying the data layer. 0 disables the cache
+# user_cache_ttl = 60
+
+# Replay the prompt playground completions of identical requests instead of calling the LLM provider again
+# generation_cache = false
+# Duration (in seconds) during which a completion is replayed
+# generation_cache_ttl = 3600
+# Path of a SQLite database also storing the completions, shared by the workers and kept across restarts
+# generation_cache_path = ".chainlit/generations.db"
+
 [features]
 # Show the prompt playground
 prompt_playground = true
@@ -73,6 +107,8 @@ latex = false
     accept = ["*/*"]
     max_files = 20
     max_size_mb = 500
+    # Maximum size (in MB) of all the files uploaded in a session
+    # max_session_size_mb = 2000
 
 # Allows user to use speech to text
 [features.speech_to_text]
@@ -167,6 +203,10 @@ class RunSettings:
     no_cache: bool = False
     debug: bool = False
     ci: bool = False
+    # Number of worker processes
+    workers: int = 1
+    # Event loop implementation, "asyncio" or "uvloop"
+    loop: str = "asyncio"
 
 
 @dataclass()
@@ -214,6 +254,7 @@ class MultiModalFeature:
     accept: Optional[Union[List[str], Dict[str, List[str]]]] = None
     max_files: Optional[int] = None
     max_size_mb: Optional[int] = None
+    max_session_size_mb: Optional[int] = None
 
 
 @dataclass()
@@ -292,6 +333,30 @@ class ProjectSettings(DataClassJsonMixin):
     cache: bool = False
     # Follow symlink for asset mount (see https://github.com/Chainlit/chainlit/issues/317)
     follow_symlink: bool = False
+    # Directories whose files are served in place instead of being copied to the session
+    file_reference_roots: Optional[List[str]] = None
+    # Duration (in seconds) during which streamed tokens are buffered before being sent to the UI
+    stream_flush_interval: float = 0.05
+    # Size (in bytes) of the buffered tokens triggering an immediate flush
+    stream_flush_max_bytes: int = 4096
+    # Number of events queued for a client above which emitters wait for them to be sent
+    outbound_queue_size: int = 1000
+    # Number of events sent to a client between two acknowledgements (0 to disable)
+    client_sync_interval: int = 500
+    # Duration (in seconds) during which step writes are buffered before being persisted
+    persistence_flush_interval: float = 0.5
+    # Number of buffered steps triggering an immediate write
+    persistence_batch_size: int = 100
+    # Duration (in seconds) during which pending background tasks are awaited on shutdown
+    shutdown_timeout: float = 10
+    # Duration (in seconds) during which the user of a verified token is cached
+    user_cache_ttl: float = 60
+    # Cache the prompt playground completions
+    generation_cache: bool = False
+    # Duration (in seconds) during which a cached completion is replayed
+    generation_cache_ttl: float = 3600
+    # Path of the SQLite database storing the cached completions, memory only if not set
+    generation_cache_path: Optional[str] = None
 
 
 @dataclass()
@@ -7,6 +7,7 @@ from chainlit.session import HTTPSession, WebsocketSession
 from lazify import LazyProxy
 
 if TYPE_CHECKING:
+    from chainlit.dispatch import StepEventBridge
     from chainlit.emitter import BaseChainlitEmitter
     from chainlit.user import PersistedUser, User
     from chainlit.step import Step
@@ -22,6 +23,8 @@ class ChainlitContext:
     emitter: "BaseChainlitEmitter"
     session: Union["HTTPSession", "WebsocketSession"]
     active_steps: List["Step"]
+    # Step events of the framework callbacks and sync step context managers
+    step_events: "StepEventBridge"
 
     @property
     def current_step(self):
@@ -29,11 +32,13 @@ class ChainlitContext:
             return self.active_steps[-1]
 
     def __init__(self, session: Union["HTTPSession", "WebsocketSession"]):
+        from chainlit.dispatch import StepEventBridge
         from chainlit.emitter import BaseChainlitEmitter, ChainlitEmitter
 
         self.loop = asyncio.get_running_loop()
         self.session = session
         self.active_steps = []
+        self.step_events = StepEventBridge(self)
         if isinstance(self.session, HTTPSession):
             self.emitter = BaseChainlitEmitter(self.session)
         elif isinstance(self.session, WebsocketSession):
@@ -1,12 +1,14 @@
 import functools
 import json
 import os
-from collections import deque
+from collections import OrderedDict, deque
 from typing import TYPE_CHECKING, Dict, List, Optional, Union
 
 import aiofiles
+from chainlit.clock import utc_to_sequence
 from chainlit.config import config
 from chainlit.context import context
+from chainlit.data.write_behind import StepWriteBehindQueue
 from chainlit.logger import logger
 from chainlit.session import WebsocketSession
 from chainlit.types import Feedback, Pagination, ThreadDict, ThreadFilter
@@ -48,6 +50,10 @@ def queue_until_user_message():
     return decorator
 
 
+# Number of thread authors kept in memory for access checks
+THREAD_AUTHOR_CACHE_SIZE = 10000
+
+
 class BaseDataLayer:
     """Base class for data persistence."""
 
@@ -89,8 +95,34 @@ class BaseDataLayer:
         pass
 
     async def get_thread_author(self, thread_id: str) -> str:
+        """Return the identifier of the thread author. Only fetch the thread metadata, not its steps."""
         return ""
 
+    async def get_cached_thread_author(self, thread_id: str) -> str:
+        """Return the thread author, from the cache if it was already fetched."""
+        if author := self.thread_authors.get(thread_id):
+            self.thread_authors.move_to_end(thread_id)
+            return author
+
+        author = await self.get_thread_author(thread_id)
+        # A thread without author is not persisted yet, it will get one
+        if author:
+            self.thread_authors[thread_id] = author
+            if len(self.thread_authors) > THREAD_AUTHOR_CACHE_SIZE:
+                self.thread_authors.popitem(last=False)
+        return author
+
+    def invalidate_thread_author(self, thread_id: str):
+        """Drop the cached author, called when a thread is updated or deleted."""
+        self.thread_authors.pop(thread_id, None)
+
+    @property
+    def thread_authors(self) -> "OrderedDict[str, str]":
+        # Created on first use, data layers don't call the base constructor
+        if not hasattr(self, "_thread_authors"):
+            self._thread_authors = OrderedDict()  # type: OrderedDict[str, str]
+        return self._thread_authors
+
     async def delete_thread(self, thread_id: str):
         pass
 
@@ -117,6 +149,14 @@ class BaseDataLayer:
     async def delete_user_session(self, id: str) -> bool:
         return True
 
+    async def flush(self):
+        """Write the changes buffered by the data layer."""
+        pass
+
+    async def drain(self):
+        """Write every buffered change before shutting down."""
+        await self.flush()
+
 
 _data_layer: Optional[BaseDataLayer] = None
 
@@ -126,6 +166,11 @@ class ChainlitDataLayer(BaseDataLayer):
         from literalai import LiteralClient
 
         self.client = LiteralClient(api_key=api_key, url=server)
+        self.step_queue = StepWriteBehindQueue(
+            write=self.client.api.send_steps,
+            interval=config.project.persistence_flush_interval,
+            max_batch_size=config.project.persistence_batch_size,
+        )
         logger.info("Chainlit data layer initialized")
 
     def attachment_to_element_dict(self, attachment: Attachment) -> "ElementDict":
@@ -147,6 +192,7 @@ class ChainlitDataLayer(BaseDataLayer):
             "objectKey": attachment.object_key,
             "url": attachment.url,
             "threadId": attachment.thread_id,
+            "sequence": metadata.get("sequence"),
         }
 
     def feedback_to_feedback_dict(
@@ -190,6 +236,7 @@ class ChainlitDataLayer(BaseDataLayer):
             "isError": metadata.get("isError", False),
             "waitForAnswer": metadata.get("waitForAnswer", False),
             "feedback": self.feedback_to_feedback_dict(step.feedback),
+            "sequence": metadata.get("sequence"),
         }
 
     async def get_user(self, identifier: str) -> Optional[PersistedUser]:
@@ -249,6 +296,7 @@ class ChainlitDataLayer(BaseDataLayer):
             "display": element.display,
             "type": element.type,
             "page": getattr(element, "page", None),
+            "sequence": getattr(element, "sequence", None),
         }
 
         if not element.for_id:
@@ -269,23 +317,21 @@ class ChainlitDataLayer(BaseDataLayer):
             )
             object_key = uploaded["object_key"]
 
-        await self.client.api.send_steps(
-            [
-                {
-                    "id": element.for_id,
-                    "threadId": element.thread_id,
-                    "attachments": [
-                        {
-                            "id": element.id,
-                            "name": element.name,
-                            "metadata": metadata,
-                            "mime": element.mime,
-                            "url": element.url,
-                            "objectKey": object_key,
-                        }
-                    ],
-                }
-            ]
+        await self.step_queue.put(
+            {
+                "id": element.for_id,
+                "threadId": element.thread_id,
+                "attachments": [
+                    {
+                        "id": element.id,
+                        "name": element.name,
+                        "metadata": metadata,
+                        "mime": element.mime,
+                        "url": element.url,
+                        "objectKey": object_key,
+                    }
+                ],
+            }
         )
 
     async def get_element(
@@ -308,6 +354,7 @@ class ChainlitDataLayer(BaseDataLayer):
             "waitForAnswer": step_dict.get("waitForAnswer"),
             "language": step_dict.get("language"),
             "showInput": step_dict.get("showInput"),
+            "sequence": step_dict.get("sequence"),
         }
 
         step: ClientStepDict = {
@@ -327,7 +374,7 @@ class ChainlitDataLayer(BaseDataLayer):
         if step_dict.get("output"):
             step["output"] = {"content": step_dict.get("output")}
 
-        await self.client.api.send_steps([step])
+        await self.step_queue.put(step)
 
     @queue_until_user_message()
     async def update_step(self, step_dict: "StepDict"):
@@ -335,19 +382,38 @@ class ChainlitDataLayer(BaseDataLayer):
 
     @queue_until_user_message()
     async def delete_step(self, step_id: str):
+        self.step_queue.discard(step_id)
+        # Make sure a batch in flight doesn't recreate the step
+        await self.step_queue.flush()
         await self.client.api.delete_step(id=step_id)
 
+    async def flush(self):
+        await self.step_queue.flush()
+
+    async def drain(self):
+        await self.step_queue.drain()
+
     async def get_thread_author(self, thread_id: str) -> str:
-        thread = await self.get_thread(thread_id)
-        if not thread:
-            return ""
-        user = thread.get("user")
-        if not user:
+        query = """
+        query GetThreadAuthor($id: String!) {
+            threadDetail(id: $id) {
+                participant {
+                    identifier
+                }
+            }
+        }
+        """
+        result = await self.client.api.make_api_call(
+            "get thread author", query, {"id": thread_id}
+        )
+        thread = result["data"]["threadDetail"]
+        if not thread or not thread.get("participant"):
             return ""
-        return user.get("identifier") or ""
+        return thread["participant"].get("identifier") or ""
 
     async def delete_thread(self, thread_id: str):
         await self.client.api.delete_thread(id=thread_id)
+        self.invalidate_thread_author(thread_id)
 
     async def list_threads(
         self, pagination: "Pagination", filters: "ThreadFilter"
@@ -371,6 +437,8 @@ class ChainlitDataLayer(BaseDataLayer):
         )
 
     async def get_thread(self, thread_id: str) -> "Optional[ThreadDict]":
+        # Read the buffered steps of the thread back
+        await self.step_queue.flush(thread_id)
         thread = await self.client.api.get_thread(id=thread_id)
         if not thread:
             return None
@@ -386,6 +454,11 @@ class ChainlitDataLayer(BaseDataLayer):
                     step.generation = None
                 steps.append(self.step_to_step_dict(step))
 
+        # Steps persisted before the sequence was introduced fall back on their creation date
+        steps.sort(
+            key=lambda s: s.get("sequence") or utc_to_sequence(s.get("createdAt"))
+        )
+
         user = None  # type: Optional["UserDict"]
 
         if thread.user:
@@ -421,6 +494,7 @@ class ChainlitDataLayer(BaseDataLayer):
             metadata=metadata,
             tags=tags,
         )
+        self.invalidate_thread_author(thread_id)
 
 
 if api_key := os.environ.get("LITERAL_API_KEY"):
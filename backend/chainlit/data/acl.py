@@ -7,7 +7,7 @@ async def is_thread_author(username: str, thread_id: str):
     if not data_layer:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    thread_author = await data_layer.get_thread_author(thread_id)
+    thread_author = await data_layer.get_cached_thread_author(thread_id)
 
     if thread_author != username:
         raise HTTPException(status_code=401, detail="Unauthorized")
@@ -0,0 +1,202 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Set
+
+import httpx
+from chainlit.logger import logger
+
+# Attempts to write a step after a transient failure, before dropping it
+WRITE_RETRIES = 3
+# Delay (in seconds) before the first retry, doubled at each attempt
+RETRY_BACKOFF = 0.5
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether writing again later may succeed (network error, server overloaded)."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return isinstance(error, (httpx.TransportError, OSError, asyncio.TimeoutError))
+
+
+def merge_step(pending: Dict[str, Any], step: Mapping[str, Any]):
+    """Apply a later write of a step to its pending write."""
+    attachments = pending.get("attachments", []) + step.get("attachments", [])
+    pending.update(step)
+    if attachments:
+        pending["attachments"] = attachments
+
+
+class StepWriteBehindQueue:
+    """
+    Buffer the step writes of a data layer and send them in batches.
+
+    Writes are coalesced by step id: fields of a later write replace the pending ones
+    and attachments are appended, so only the latest state of a step is written.
+    The buffer is flushed once the flush interval elapsed or once it holds `max_batch_size` steps.
+    Batches are written one at a time, in the order the steps were first queued.
+
+    A batch failing with a transient error is queued again (merged with the later writes of
+    its steps) and retried with a backoff, without blocking the other flushes meanwhile.
+    A batch failing otherwise is split in halves until the failing steps are isolated,
+    only these are dropped.
+    """
+
+    def __init__(
+        self,
+        # Coroutine function writing a batch of steps
+        write: Callable[[List[Any]], Awaitable[Any]],
+        # Delay (in seconds) during which writes are buffered. Steps are written right away if <= 0
+        interval: float,
+        # Number of buffered steps triggering an immediate flush
+        max_batch_size: int,
+    ):
+        self.write = write
+        self.interval = interval
+        self.max_batch_size = max_batch_size
+
+        # Step id -> pending step. Dicts keep the insertion order.
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # Step id -> number of failed attempts of its pending write
+        self._attempts: Dict[str, int] = {}
+        # Created in the running loop
+        self._lock: Optional[asyncio.Lock] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional["asyncio.Task"] = None
+
+        # Metrics
+        self.written_count = 0
+        self.merged_count = 0
+        self.batch_count = 0
+        self.retry_count = 0
+        self.dropped_count = 0
+
+    @property
+    def depth(self) -> int:
+        """Number of steps waiting to be written."""
+        return len(self._pending)
+
+    async def put(self, step: Mapping[str, Any]):
+        """Queue a step write, flushing the buffer if needed."""
+        if pending := self._pending.get(step["id"]):
+            merge_step(pending, step)
+            self.merged_count += 1
+        else:
+            self._pending[step["id"]] = dict(step)
+
+        if self.interval <= 0 or len(self._pending) >= self.max_batch_size:
+            await self.flush()
+        elif not self._timer:
+            self._schedule_flush(self.interval)
+
+    def discard(self, step_id: str):
+        """Drop the pending write of a step, used when the step is deleted."""
+        self._pending.pop(step_id, None)
+        self._attempts.pop(step_id, None)
+
+    async def flush(self, thread_id: Optional[str] = None):
+        """
+        Write the buffered steps (of a thread if given) and wait for the batches in flight.
+
+        Steps failing with a transient error are still buffered when it returns.
+        """
+        if thread_id is None:
+            self._cancel_timer()
+
+        async with self._get_lock():
+            retried: Set[str] = set()
+            while True:
+                steps = [
+                    step
+                    for step in self._pending.values()
+                    if step["id"] not in retried
+                    and (thread_id is None or step.get("threadId") == thread_id)
+                ][: self.max_batch_size]
+                if not steps:
+                    break
+                for step in steps:
+                    self._pending.pop(step["id"], None)
+
+                retried.update(await self._write(steps))
+
+    async def drain(self):
+        """Write everything still buffered, retries included, used on shutdown."""
+        if self._flush_task:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        while self._pending:
+            await self.flush()
+            if self._pending:
+                await asyncio.sleep(self._retry_delay())
+        self._cancel_timer()
+
+    async def _write(self, steps: List[Dict[str, Any]]) -> List[str]:
+        """Write a batch, return the ids of the steps queued again to be retried."""
+        try:
+            await self.write(steps)
+        except Exception as e:
+            if is_transient_error(e):
+                return self._requeue(steps, e)
+            if len(steps) == 1:
+                self._drop(steps, e)
+                return []
+            # Isolate the failing steps
+            middle = len(steps) // 2
+            return await self._write(steps[:middle]) + await self._write(steps[middle:])
+
+        self.written_count += len(steps)
+        self.batch_count += 1
+        for step in steps:
+            self._attempts.pop(step["id"], None)
+        return []
+
+    def _requeue(self, steps: List[Dict[str, Any]], error: Exception) -> List[str]:
+        retried = []
+        # Failed steps were queued before the pending ones
+        pending, self._pending = self._pending, {}
+        for step in steps:
+            attempts = self._attempts.get(step["id"], 0) + 1
+            if attempts > WRITE_RETRIES:
+                self._drop([step], error)
+                continue
+            self._attempts[step["id"]] = attempts
+            self._pending[step["id"]] = step
+            retried.append(step["id"])
+        for step_id, step in pending.items():
+            if requeued := self._pending.get(step_id):
+                merge_step(requeued, step)
+            else:
+                self._pending[step_id] = step
+
+        if retried:
+            self.retry_count += 1
+            logger.warning(f"Failed to persist {len(retried)} steps, retrying: {error}")
+            self._cancel_timer()
+            self._schedule_flush(self._retry_delay())
+        return retried
+
+    def _drop(self, steps: List[Dict[str, Any]], error: Exception):
+        self.dropped_count += len(steps)
+        for step in steps:
+            self._attempts.pop(step["id"], None)
+        logger.error(f"Failed to persist {len(steps)} steps, dropping them: {error}")
+
+    def _retry_delay(self) -> float:
+        attempts = max(self._attempts.values(), default=1)
+        return RETRY_BACKOFF * 2 ** (attempts - 1)
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _schedule_flush(self, delay: float):
+        self._timer = asyncio.get_running_loop().call_later(delay, self._flush_on_timer)
+
+    def _cancel_timer(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush_on_timer(self):
+        self._timer = None
+        # Keep a reference to the task so it is not garbage collected
+        self._flush_task = asyncio.ensure_future(self.flush())
@@ -0,0 +1,108 @@
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Set, Tuple, Union
+
+from chainlit.logger import logger
+from chainlit.tasks import task_supervisor
+
+if TYPE_CHECKING:
+    from chainlit.context import ChainlitContext
+    from chainlit.message import Message
+    from chainlit.step import Step
+
+StepLike = Union["Step", "Message"]
+# (kind, step, token)
+StepEvent = Tuple[str, StepLike, Optional[str]]
+
+
+class StepEventBridge:
+    """
+    Pass the step events of framework callbacks (send, update, stream token) to the event loop.
+
+    Callbacks run in the framework threads (or in the loop). They push their events in a queue
+    without waiting for the loop nor taking a lock, and a single callback scheduled in the loop
+    drains it. The events of a step run in order, one at a time, and the successive updates of
+    a step waiting to run are coalesced, since an update sends the latest state of the step.
+    The events of a step whose parent is not sent yet wait for the parent to be sent.
+    """
+
+    def __init__(self, context: "ChainlitContext"):
+        self.context = context
+
+        # Appending and popping from a deque is atomic
+        self._events: Deque[StepEvent] = deque()
+        self._scheduled = False
+        # Step id -> events waiting for the running event of the step. Only used in the loop.
+        self._pending: Dict[str, Deque[StepEvent]] = {}
+        # Ids of the steps whose send event is waiting or running. Only used in the loop.
+        self._unsent: Set[str] = set()
+        # Parent step id -> (step id, events) of the children waiting for the parent to be sent
+        self._waiting: Dict[str, List[Tuple[str, Deque[StepEvent]]]] = {}
+
+    def send(self, step: StepLike):
+        self._push(("send", step, None))
+
+    def update(self, step: StepLike):
+        self._push(("update", step, None))
+
+    def stream_token(self, step: StepLike, token: str):
+        self._push(("stream_token", step, token))
+
+    def _push(self, event: StepEvent):
+        self._events.append(event)
+        # A drain may be scheduled twice, never missed: it resets the flag before draining
+        if not self._scheduled:
+            self._scheduled = True
+            self.context.loop.call_soon_threadsafe(self._drain)
+
+    def _drain(self):
+        from chainlit.context import context_var
+
+        self._scheduled = False
+        context_var.set(self.context)
+
+        while self._events:
+            event = self._events.popleft()
+            step_id = event[1].id
+
+            if event[0] == "send":
+                self._unsent.add(step_id)
+
+            pending = self._pending.get(step_id)
+            if pending is None:
+                self._pending[step_id] = pending = deque([event])
+                parent_id = getattr(event[1], "parent_id", None)
+                if parent_id in self._unsent:
+                    self._waiting.setdefault(parent_id, []).append((step_id, pending))
+                else:
+                    self._spawn(step_id, pending)
+            elif event[0] == "update" and pending and pending[-1][0] == "update":
+                continue
+            else:
+                pending.append(event)
+
+    def _spawn(self, step_id: str, pending: Deque[StepEvent]):
+        task_supervisor.spawn(self._run_events(step_id, pending), "callbacks")
+
+    def _release_children(self, step_id: str):
+        self._unsent.discard(step_id)
+        for child_id, pending in self._waiting.pop(step_id, []):
+            self._spawn(child_id, pending)
+
+    async def _run_events(self, step_id: str, pending: Deque[StepEvent]):
+        try:
+            while pending:
+                kind, step, token = pending.popleft()
+                try:
+                    if kind == "send":
+                        await step.send()
+                    elif kind == "update":
+                        await step.update()
+                    else:
+                        await step.stream_token(token or "")
+                except Exception as e:
+                    logger.exception(f"Failed to {kind} step {step_id}: {e}")
+                if kind == "send":
+                    self._release_children(step_id)
+        finally:
+            del self._pending[step_id]
+            self._release_children(step_id)
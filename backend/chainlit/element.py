@@ -1,13 +1,29 @@
 import json
+import threading
 import uuid
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from io import BytesIO
-from typing import Any, ClassVar, List, Literal, Optional, TypedDict, TypeVar, Union
+from typing import (
+    Any,
+    ClassVar,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    TypedDict,
+    TypeVar,
+    Union,
+)
 
 import filetype
+from chainlit.clock import next_sequence
 from chainlit.context import context
 from chainlit.data import get_data_layer
 from chainlit.logger import logger
+from chainlit.tasks import task_supervisor
 from chainlit.telemetry import trace_event
 from chainlit.types import FileDict
 from pydantic.dataclasses import Field, dataclass
@@ -53,6 +69,8 @@ class ElementDict(TypedDict):
     page: Optional[int]
     forId: Optional[str]
     mime: Optional[str]
+    # Monotonic sequence used to order elements, see chainlit.clock
+    sequence: Optional[int]
 
 
 @dataclass
@@ -95,10 +113,14 @@ class Element:
         self.persisted = False
         self.updatable = False
         self.thread_id = context.session.thread_id
+        self.sequence = next_sequence()
 
-        if not self.url and not self.path and not self.content:
+        if not self._has_source():
             raise ValueError("Must provide url, path or content to instantiate element")
 
+    def _has_source(self) -> bool:
+        return bool(self.url or self.path or self.content)
+
     def to_dict(self) -> ElementDict:
         _dict = ElementDict(
             {
@@ -118,6 +140,7 @@ class Element:
                 "language": getattr(self, "language", None),
                 "forId": getattr(self, "for_id", None),
                 "mime": getattr(self, "mime", None),
+                "sequence": getattr(self, "sequence", None),
             }
         )
         return _dict
@@ -149,7 +172,7 @@ class Element:
             return True
         if data_layer := get_data_layer():
             try:
-                asyncio.create_task(data_layer.create_element(self))
+                task_supervisor.spawn(data_layer.create_element(self), "elements")
             except Exception as e:
                 logger.error(f"Failed to create element: {str(e)}")
         if not self.url and (not self.chainlit_key or self.updatable):
@@ -239,9 +262,100 @@ class Html(Element):
     type: ClassVar[ElementType] = "html"
 
 
+PyplotFormat = Literal["png", "webp", "svg"]
+
+pyplot_mime_types = {
+    "png": "image/png",
+    "webp": "image/webp",
+    "svg": "image/svg+xml",
+}
+
+# Default rendering resolution
+PYPLOT_DEFAULT_DPI = 200
+# Rendering resolution per element size, used with dpi="auto"
+pyplot_dpi_presets = {
+    "small": 100,
+    "medium": 150,
+    "large": 200,
+}
+
+# Total size (in bytes) of the rendered figures kept in memory
+PYPLOT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Figure id, dpi, format -> figure (weak reference), rendered image
+_pyplot_cache: "OrderedDict[Tuple[int, int, str], Tuple[weakref.ref, bytes]]" = (
+    OrderedDict()
+)
+_pyplot_cache_bytes = 0
+_pyplot_cache_lock = threading.Lock()
+_pyplot_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pyplot")
+
+
+def resolve_dpi(dpi: Union[int, Literal["auto"], None], size: ElementSize) -> int:
+    if dpi == "auto":
+        return pyplot_dpi_presets[size]
+    return dpi or PYPLOT_DEFAULT_DPI
+
+
+def cache_figure(figure: Any, dpi: int, format: PyplotFormat, content: bytes):
+    global _pyplot_cache_bytes
+
+    if len(content) > PYPLOT_CACHE_MAX_BYTES:
+        return
+
+    key = (id(figure), dpi, format)
+    with _pyplot_cache_lock:
+        if previous := _pyplot_cache.pop(key, None):
+            _pyplot_cache_bytes -= len(previous[1])
+        _pyplot_cache[key] = (weakref.ref(figure), content)
+        _pyplot_cache_bytes += len(content)
+        while _pyplot_cache_bytes > PYPLOT_CACHE_MAX_BYTES:
+            _, (_, evicted) = _pyplot_cache.popitem(last=False)
+            _pyplot_cache_bytes -= len(evicted)
+
+
+def render_figure(figure: Any, dpi: int, format: PyplotFormat) -> bytes:
+    """
+    Render a matplotlib figure.
+
+    The image is cached until the figure changes: matplotlib marks a figure as stale
+    whenever one of its artists is modified, and the figure is marked as drawn once rendered.
+    """
+    key = (id(figure), dpi, format)
+    with _pyplot_cache_lock:
+        cached = _pyplot_cache.get(key)
+        # The figure id may be reused by another figure once collected
+        if cached and not figure.stale and cached[0]() is figure:
+            _pyplot_cache.move_to_end(key)
+            return cached[1]
+
+    image = BytesIO()
+    figure.savefig(
+        image,
+        dpi=dpi,
+        bbox_inches="tight",
+        # Agg only renders raster images
+        backend=None if format == "svg" else "Agg",
+        format=format,
+    )
+    content = image.getvalue()
+
+    # Saving with a tight bounding box restores the figure layout, which marks it as stale
+    figure.stale = False
+    cache_figure(figure, dpi, format, content)
+
+    return content
+
+
 @dataclass
 class Pyplot(Element):
-    """Useful to send a pyplot to the UI."""
+    """
+    Useful to send a pyplot to the UI.
+
+    The figure is rendered in a thread when the element is sent, or on the spot
+    if the element is instantiated outside of an event loop.
+    `await Pyplot.render(figure=...)` renders the figure in a thread right away.
+    """
 
     # We reuse the frontend image element to display the chart
     type: ClassVar[ElementType] = "image"
@@ -250,6 +364,10 @@ class Pyplot(Element):
     # The type is set to Any because the figure is not serializable
     # and its actual type is checked in __post_init__.
     figure: Any = None
+    # Resolution of the image (200 by default), "auto" to pick it from the element size
+    dpi: Union[int, Literal["auto"], None] = None
+    # Image format
+    format: PyplotFormat = "png"
 
     def __post_init__(self) -> None:
         from matplotlib.figure import Figure
@@ -257,18 +375,52 @@ class Pyplot(Element):
         if not isinstance(self.figure, Figure):
             raise TypeError("figure must be a matplotlib.figure.Figure")
 
-        options = {
-            "dpi": 200,
-            "bbox_inches": "tight",
-            "backend": "Agg",
-            "format": "png",
-        }
-        image = BytesIO()
-        self.figure.savefig(image, **options)
-        self.content = image.getvalue()
+        self.mime = pyplot_mime_types[self.format]
+
+        if not self.content and not _in_event_loop():
+            self.content = render_figure(
+                self.figure, resolve_dpi(self.dpi, self.size), self.format
+            )
 
         super().__post_init__()
 
+    def _has_source(self) -> bool:
+        # The content is rendered from the figure when sent
+        return True
+
+    async def _create(self) -> bool:
+        if not self.content:
+            loop = asyncio.get_running_loop()
+            self.content = await loop.run_in_executor(
+                _pyplot_executor,
+                render_figure,
+                self.figure,
+                resolve_dpi(self.dpi, self.size),
+                self.format,
+            )
+        return await super()._create()
+
+    @classmethod
+    async def render(cls, figure: Any, **kwargs) -> "Pyplot":
+        """Render the figure in a thread, without blocking the event loop, and create the element."""
+        size: ElementSize = kwargs.get("size") or "medium"
+        dpi = resolve_dpi(kwargs.get("dpi"), size)
+        format = kwargs.get("format") or "png"
+
+        loop = asyncio.get_running_loop()
+        content = await loop.run_in_executor(
+            _pyplot_executor, render_figure, figure, dpi, format
+        )
+        return cls(figure=figure, content=content, **kwargs)
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
 
 class TaskStatus(Enum):
     READY = "ready"
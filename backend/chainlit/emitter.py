@@ -2,6 +2,7 @@ import asyncio
 import uuid
 from typing import Any, Dict, List, Literal, Optional, TypeVar, cast
 
+from chainlit.clock import utc_now
 from chainlit.data import get_data_layer
 from chainlit.extensions.types import (
     BaseResponse,
@@ -17,9 +18,9 @@ from chainlit.logger import logger
 from chainlit.message import Message
 from chainlit.session import BaseSession, WebsocketSession
 from chainlit.step import StepDict
+from chainlit.tasks import task_supervisor
 from chainlit.types import ThreadDict, UIMessagePayload
 from chainlit.user import PersistedUser
-from literalai.helper import utc_now
 from socketio.exceptions import TimeoutError
 
 BS = TypeVar("BS", bound="BaseSpec")
@@ -41,7 +42,7 @@ class BaseChainlitEmitter:
         """Stub method to get the 'emit' property from the session."""
         pass
 
-    async def emit_call(self):
+    async def emit_call(self, event: str, data: Any, timeout: Optional[int] = None):
         """Stub method to get the 'emit_call' property from the session."""
         pass
 
@@ -178,16 +179,18 @@ class ChainlitEmitter(BaseChainlitEmitter):
                 return None
         return getattr(self.session, property_name)
 
-    @property
-    def emit(self):
-        """Get the 'emit' property from the session."""
-
-        return self._get_session_property("emit")
-
-    @property
-    def emit_call(self):
-        """Get the 'emit_call' property from the session."""
-        return self._get_session_property("emit_call")
+    async def emit(self, event: str, data: Any):
+        """Flush the buffered tokens, then queue the event in the session outbound queue."""
+        self.session.raise_if_stopped()
+        await self.session.token_stream.flush()
+        return await self.session.outbound.put(event, data)
+
+    async def emit_call(self, event: str, data: Any, timeout: Optional[int] = None):
+        """Send the pending events, then emit the event with the session 'emit_call' property."""
+        self.session.raise_if_stopped()
+        await self.session.token_stream.flush()
+        await self.session.outbound.drain()
+        return await self._get_session_property("emit_call")(event, data, timeout)
 
     def resume_thread(self, thread_dict: ThreadDict):
         """Send a thread to the UI to resume it"""
@@ -257,11 +260,11 @@ class ChainlitEmitter(BaseChainlitEmitter):
         # Overwrite the created_at timestamp with the current time
         message.created_at = utc_now()
 
-        asyncio.create_task(message._create())
+        task_supervisor.spawn(message._create(), "persistence")
 
         if not self.session.has_first_interaction:
             self.session.has_first_interaction = True
-            asyncio.create_task(self.init_thread(message.content))
+            task_supervisor.spawn(self.init_thread(message.content), "persistence")
 
         # if file_refs:
         #     files = [
@@ -378,11 +381,10 @@ class ChainlitEmitter(BaseChainlitEmitter):
             step_dict,
         )
 
-    def send_token(self, id: str, token: str, is_sequence=False):
-        """Send a message token to the UI."""
-        return self.emit(
-            "stream_token", {"id": id, "token": token, "isSequence": is_sequence}
-        )
+    async def send_token(self, id: str, token: str, is_sequence=False):
+        """Buffer a message token. Buffered tokens are sent to the UI in batches."""
+        self.session.raise_if_stopped()
+        await self.session.token_stream.push(id, token, is_sequence)
 
     def set_chat_settings(self, settings: Dict[str, Any]):
         self.session.chat_settings = settings
@@ -6,6 +6,7 @@ from enum import Enum
 from typing import List, Literal, Optional, Union, cast
 
 from chainlit.action import Action
+from chainlit.clock import utc_now
 from chainlit.config import config
 from chainlit.context import context
 from chainlit.extensions.exceptions import AskTimeoutError, ManualCancelError
@@ -22,7 +23,6 @@ from chainlit.session import WebsocketSession
 from chainlit.telemetry import trace_event
 from chainlit.user_session import user_session
 from dataclasses_json import DataClassJsonMixin
-from literalai.helper import utc_now
 from literalai.step import MessageStepType
 
 ValueType = Optional[Union[str, float, int, bool]]
@@ -2,6 +2,7 @@ import asyncio
 from typing import Awaitable, Callable, List, Literal, Optional, Union, cast
 
 from chainlit.action import Action
+from chainlit.clock import utc_now
 from chainlit.config import config
 from chainlit.context import context
 from chainlit.element import ElementBased
@@ -24,7 +25,6 @@ from chainlit.extensions.types import (
 from chainlit.logger import logger
 from chainlit.message import AskMessageBase, MessageBase
 from chainlit.telemetry import trace_event
-from literalai.helper import utc_now
 from socketio.exceptions import TimeoutError
 
 
@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import sys
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from chainlit.logger import logger
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# ioctl request cloning a file (Linux, on copy-on-write file systems like btrfs or xfs)
+FICLONE = 0x40049409
+
+
+def _reflink(src: str, dst: str) -> bool:
+    if sys.platform != "linux":
+        return False
+
+    import fcntl
+
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        return True
+    except OSError:
+        Path(dst).unlink(missing_ok=True)
+        return False
+
+
+def _hardlink(src: str, dst: str) -> bool:
+    try:
+        os.link(src, dst)
+        return True
+    except OSError:
+        # Different file systems, unsupported or not permitted
+        return False
+
+
+def _copy_file_range(fsrc, fdst) -> bool:
+    if not hasattr(os, "copy_file_range"):
+        return False
+    try:
+        while os.copy_file_range(fsrc.fileno(), fdst.fileno(), COPY_CHUNK_SIZE * 64):
+            pass
+        return True
+    except OSError:
+        return False
+
+
+def _sendfile(fsrc, fdst) -> bool:
+    if not hasattr(os, "sendfile"):
+        return False
+    try:
+        offset = fsrc.tell()
+        while sent := os.sendfile(
+            fdst.fileno(), fsrc.fileno(), offset, COPY_CHUNK_SIZE * 64
+        ):
+            offset += sent
+        return True
+    except OSError:
+        return False
+
+
+def copy_file_sync(src: Union[str, Path], dst: Union[str, Path]) -> str:
+    """
+    Copy a file without reading it in memory, using the cheapest strategy available.
+
+    Try, in order, a reflink, a hardlink, an in kernel copy (copy_file_range, sendfile)
+    and finally a chunked copy. Return the name of the strategy used.
+    """
+    src, dst = str(src), str(dst)
+
+    if _reflink(src, dst):
+        return "reflink"
+    # The persisted file shares the inode of the source. Rewriting the source in place
+    # would alter it, replacing or deleting the source would not.
+    if _hardlink(src, dst):
+        return "hardlink"
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        for name, copy in (
+            ("copy_file_range", _copy_file_range),
+            ("sendfile", _sendfile),
+        ):
+            if copy(fsrc, fdst):
+                return name
+            # Start over from a clean state
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+
+        shutil.copyfileobj(fsrc, fdst, COPY_CHUNK_SIZE)
+        return "chunked"
+
+
+async def copy_file(src: Union[str, Path], dst: Union[str, Path]) -> str:
+    """Copy a file in a thread, see copy_file_sync."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, copy_file_sync, src, dst)
+
+
+def is_under_roots(path: Union[str, Path], roots: Optional[List[str]]) -> bool:
+    """Check if the path (symlinks resolved) is inside one of the root directories."""
+    if not roots:
+        return False
+    resolved = Path(path).resolve()
+    for root in roots:
+        root_path = Path(root).resolve()
+        if resolved == root_path or root_path in resolved.parents:
+            return True
+    return False
+
+
+class BlobStore:
+    """
+    Content addressed store of the files persisted by the sessions.
+
+    Each distinct content is stored once, as a blob named after its SHA-256.
+    A session file is a hardlink to the blob, so the session keeps its own file name and extension.
+    Session files stay writable, but are shared by content: replace a session file
+    rather than modifying it in place, which would change it for every session linking the blob.
+    The reference count of a blob is its link count: a blob only linked by the store is garbage.
+    Relying on the file system keeps the store consistent between worker processes.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def blob_path(self, file_hash: str) -> Path:
+        return self.root / file_hash[:2] / file_hash
+
+    def temp_path(self) -> Path:
+        """Path of a temporary file on the store file system, to be added with add_file."""
+        temp_dir = self.root / "tmp"
+        temp_dir.mkdir(parents=True, exist_ok=True)
+        return temp_dir / str(uuid.uuid4())
+
+    def add_bytes(self, content: bytes, dst: Path) -> str:
+        """Store the content and link it at dst. Return the content hash."""
+        file_hash = hashlib.sha256(content).hexdigest()
+        if not self._link(file_hash, dst):
+            temp_path = self.temp_path()
+            temp_path.write_bytes(content)
+            self.add_file(temp_path, file_hash, dst)
+        return file_hash
+
+    def add_file(self, temp_path: Path, file_hash: str, dst: Path):
+        """Move a temporary file to the store (or drop it if the content is already stored) and link it at dst."""
+        if self._link(file_hash, dst):
+            temp_path.unlink(missing_ok=True)
+            return
+
+        blob_path = self.blob_path(file_hash)
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Link the session file first, so the blob is never unreferenced
+        try:
+            os.link(temp_path, dst)
+        except OSError:
+            # Hardlinks not supported, the session gets its own copy
+            shutil.copyfile(temp_path, dst)
+        os.replace(temp_path, blob_path)
+
+    def release(self, hashes: Iterable[str]):
+        """Delete the blobs no longer referenced, called once session files are deleted."""
+        for file_hash in set(hashes):
+            self._collect_blob(self.blob_path(file_hash))
+
+    def collect(self) -> int:
+        """Delete every blob no longer referenced. Return the number of deleted blobs."""
+        return sum(self._collect_blob(path) for path in self._iter_blobs())
+
+    def stats(self) -> Dict[str, int]:
+        """Disk usage of the store."""
+        blobs = references = stored_bytes = referenced_bytes = 0
+        for path in self._iter_blobs():
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            blobs += 1
+            references += st.st_nlink - 1
+            stored_bytes += st.st_size
+            referenced_bytes += st.st_size * (st.st_nlink - 1)
+        return {
+            "blobs": blobs,
+            "references": references,
+            # Bytes on disk
+            "stored_bytes": stored_bytes,
+            # Bytes that would be on disk without deduplication
+            "referenced_bytes": referenced_bytes,
+        }
+
+    def _link(self, file_hash: str, dst: Path) -> bool:
+        try:
+            os.link(self.blob_path(file_hash), dst)
+            return True
+        except OSError:
+            # Not stored yet (or collected meanwhile), or hardlinks not supported
+            return False
+
+    def _iter_blobs(self):
+        if not self.root.is_dir():
+            return
+        for prefix_dir in self.root.iterdir():
+            if prefix_dir.name != "tmp" and prefix_dir.is_dir():
+                yield from prefix_dir.iterdir()
+
+    def _collect_blob(self, path: Path) -> bool:
+        try:
+            if path.stat().st_nlink > 1:
+                return False
+            # A session linking the blob meanwhile fails and stores the content again
+            path.unlink()
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.warning(f"Failed to collect blob {path.name}: {e}")
+            return False
+
+
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    global _blob_store
+    if _blob_store is None:
+        from chainlit.config import FILES_DIRECTORY
+
+        _blob_store = BlobStore(root=FILES_DIRECTORY / ".blobs")
+    return _blob_store
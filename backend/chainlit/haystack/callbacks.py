@@ -1,12 +1,11 @@
 import re
-from typing import Any, Generic, List, Optional, TypeVar
+from typing import Any, Generic, List, Optional, Set, TypeVar
 
+from chainlit.clock import utc_now
 from chainlit.context import context
 from chainlit.step import Step
-from chainlit.sync import run_sync
 from haystack.agents import Agent, Tool
 from haystack.agents.agent_step import AgentStep
-from literalai.helper import utc_now
 
 from chainlit import Message
 
@@ -36,6 +35,8 @@ class Stack(Generic[T]):
 class HaystackAgentCallbackHandler:
     stack: Stack[Step]
     last_step: Optional[Step]
+    # Ids of the steps that received tokens
+    streamed_step_ids: Set[str]
 
     def __init__(
         self,
@@ -60,6 +61,7 @@ class HaystackAgentCallbackHandler:
         # Prepare agent step message for streaming
         self.agent_name = kwargs.get("name", "Agent")
         self.stack = Stack[Step]()
+        self.streamed_step_ids = set()
 
         if self.stream_final_answer:
             self.final_stream = Message(
@@ -74,7 +76,7 @@ class HaystackAgentCallbackHandler:
         run_step.start = utc_now()
         run_step.input = kwargs
 
-        run_sync(run_step.send())
+        context.step_events.send(run_step)
 
         self.stack.push(run_step)
 
@@ -83,7 +85,7 @@ class HaystackAgentCallbackHandler:
             run_step = self.last_step
             run_step.end = utc_now()
             run_step.output = agent_step.prompt_node_response
-            run_sync(run_step.update())
+            context.step_events.update(run_step)
 
     # This method is called when a step has finished
     def on_agent_step(self, agent_step: AgentStep, **kwargs: Any) -> None:
@@ -91,10 +93,10 @@ class HaystackAgentCallbackHandler:
         self.last_step = self.stack.pop()
 
         # If token streaming is disabled
-        if self.last_step.output == "":
+        if self.last_step.id not in self.streamed_step_ids:
             self.last_step.output = agent_step.prompt_node_response
         self.last_step.end = utc_now()
-        run_sync(self.last_step.update())
+        context.step_events.update(self.last_step)
 
         if not agent_step.is_last():
             # Prepare step for next agent step
@@ -105,7 +107,7 @@ class HaystackAgentCallbackHandler:
         # Stream agent step tokens
         if self.stream_final_answer:
             if self.answer_reached:
-                run_sync(self.final_stream.stream_token(token))
+                context.step_events.stream_token(self.final_stream, token)
             else:
                 self.last_tokens.append(token)
 
@@ -116,11 +118,14 @@ class HaystackAgentCallbackHandler:
 
                 if final_answer_match:
                     self.answer_reached = True
-                    run_sync(
-                        self.final_stream.stream_token(final_answer_match.group(1))
+                    context.step_events.stream_token(
+                        self.final_stream, final_answer_match.group(1)
                     )
 
-        run_sync(self.stack.peek().stream_token(token))
+        step = self.stack.peek()
+        # Tokens are applied to the step output asynchronously
+        self.streamed_step_ids.add(step.id)
+        context.step_events.stream_token(step, token)
 
     def on_tool_start(self, tool_input: str, tool: Tool, **kwargs: Any) -> None:
         # Tool started, create step
@@ -141,7 +146,7 @@ class HaystackAgentCallbackHandler:
         tool_step = self.stack.pop()
         tool_step.output = tool_result
         tool_step.end = utc_now()
-        run_sync(tool_step.update())
+        context.step_events.update(tool_step)
 
     def on_tool_error(self, exception: Exception, tool: Tool, **kwargs: Any) -> None:
         # Tool error, send error message
@@ -149,4 +154,4 @@ class HaystackAgentCallbackHandler:
         error_step.is_error = True
         error_step.output = str(exception)
         error_step.end = utc_now()
-        run_sync(error_step.update())
+        context.step_events.update(error_step)
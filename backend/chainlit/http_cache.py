@@ -0,0 +1,112 @@
+import gzip
+import hashlib
+from typing import Dict, List, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    # Brotli is optional, responses are then only compressed with gzip
+    brotli = None
+
+# Smaller payloads are not worth compressing
+MIN_COMPRESS_SIZE = 512
+
+# Preferred encodings first
+ENCODINGS = ["br", "gzip"]
+
+
+def compress_content(content: bytes) -> Dict[str, bytes]:
+    """Compress the content with every encoding available. Return the encodings saving space."""
+    if len(content) < MIN_COMPRESS_SIZE:
+        return {}
+
+    encoded = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli:
+        encoded["br"] = brotli.compress(content, quality=11)
+
+    return {
+        encoding: value
+        for encoding, value in encoded.items()
+        if len(value) < len(content)
+    }
+
+
+def parse_accept_encoding(header: Optional[str]) -> List[str]:
+    """Return the encodings accepted by the client (q=0 excluded)."""
+    accepted = []
+    for item in (header or "").split(","):
+        encoding, _, params = item.strip().partition(";")
+        params = params.replace(" ", "")
+        if encoding and params not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.append(encoding.lower())
+    return accepted
+
+
+def select_encoding(header: Optional[str], available: List[str]) -> Optional[str]:
+    accepted = parse_accept_encoding(header)
+    for encoding in ENCODINGS:
+        if encoding in available and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as required for If-None-Match
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in tags or f"W/{etag}" in tags
+
+
+class PrecomputedResponse:
+    """
+    Response body computed once, stored along with its compressed variants.
+
+    Requests get the best encoding they accept, and a 304 if their validator matches.
+    """
+
+    def __init__(
+        self,
+        content: bytes,
+        media_type: str,
+        cache_control: str = "no-cache",
+        # Skip compression for responses used once
+        compress: bool = True,
+    ):
+        self.content = content
+        self.media_type = media_type
+        self.cache_control = cache_control
+        self.etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+        self.encoded = compress_content(content) if compress else {}
+
+    def encoding_etag(self, encoding: Optional[str]) -> str:
+        # Each representation has its own validator
+        return self.etag if not encoding else f'{self.etag[:-1]}-{encoding}"'
+
+    def to_response(self, request: Request) -> Response:
+        encoding = select_encoding(
+            request.headers.get("accept-encoding"), list(self.encoded)
+        )
+        etag = self.encoding_etag(encoding)
+
+        headers = {
+            "ETag": etag,
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            body = self.encoded[encoding]
+        else:
+            body = self.content
+
+        return Response(content=body, media_type=self.media_type, headers=headers)
@@ -0,0 +1,64 @@
+import asyncio
+import importlib.util
+from typing import Optional
+
+import httpx
+from chainlit.logger import logger
+
+# Attempts after a failed connection
+CONNECT_RETRIES = 2
+# Delay (in seconds) before the first retry, doubled at each attempt
+RETRY_BACKOFF = 0.2
+
+TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=30
+)
+
+
+class RetryingAsyncClient(httpx.AsyncClient):
+    """
+    Client retrying the requests that could not connect.
+
+    Nothing was sent to the server when connecting failed, so any request can be retried.
+    """
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        delay = RETRY_BACKOFF
+        for _ in range(CONNECT_RETRIES):
+            try:
+                return await super().send(request, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                logger.warning(
+                    f"Failed to connect to {request.url.host}, retrying: {e}"
+                )
+                await asyncio.sleep(delay)
+                delay *= 2
+        return await super().send(request, **kwargs)
+
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the HTTP client shared by the app (e.g. by the OAuth providers).
+
+    Connections are kept alive and reused between requests, saving TLS handshakes.
+    HTTP/2 is used when the h2 package is installed.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = RetryingAsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=LIMITS,
+            timeout=TIMEOUT,
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
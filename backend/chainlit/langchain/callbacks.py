@@ -1,9 +1,13 @@
 import json
+import sys
 import time
-from typing import Any, Dict, List, Optional, TypedDict, Union
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sized, TypedDict, Union
 from uuid import UUID
 
+from chainlit.clock import utc_now
 from chainlit.context import context_var
+from chainlit.element import Element
 from chainlit.message import Message
 from chainlit.step import Step
 from langchain.callbacks.tracers.base import BaseTracer
@@ -12,11 +16,123 @@ from langchain.schema import BaseMessage
 from langchain.schema.output import ChatGenerationChunk, GenerationChunk
 from langchain_core.outputs import ChatGenerationChunk, GenerationChunk
 from literalai import ChatGeneration, CompletionGeneration, GenerationMessage
-from literalai.helper import utc_now
 from literalai.step import TrueStepType
 
 DEFAULT_ANSWER_PREFIX_TOKENS = ["Final", "Answer", ":"]
 
+# Default maximum number of runs a tracer keeps track of
+DEFAULT_MAX_TRACKED_RUNS = 10000
+
+
+def approximate_size(obj: Any) -> int:
+    """
+    Estimate the memory (in bytes) held by an object and the objects it references.
+
+    Only containers, steps, elements, messages and generations are traversed,
+    other objects are counted for their own size.
+    """
+    traversed = (Step, Element, BaseMessage, ChatGeneration, CompletionGeneration)
+    size = 0
+    seen = set()
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif isinstance(item, traversed) and hasattr(item, "__dict__"):
+            stack.append(vars(item))
+    return size
+
+
+class AnswerPrefixMatcher:
+    """
+    Detect the answer prefix in a stream of tokens, whatever the tokenization.
+
+    Knuth-Morris-Pratt automaton over the characters of the tokens: the state is kept
+    between tokens, so a prefix split across tokens (or within a single token) is found
+    in constant time per character.
+
+    Unless white spaces are ignored, the prefix is either the tokens as streamed
+    ("FinalAnswer:") or the text they read as, with a space between two words
+    ("Final Answer:").
+    """
+
+    def __init__(self, answer_prefix_tokens: List[str], strip_tokens: bool) -> None:
+        # Ignore white spaces and new lines when matching?
+        self.strip_tokens = strip_tokens
+        self.patterns = list(
+            dict.fromkeys(
+                self._normalize(text)
+                for text in (
+                    "".join(answer_prefix_tokens),
+                    self._join_words(answer_prefix_tokens),
+                )
+            )
+        )
+
+        # Length of the longest proper prefix of pattern[: i + 1] that is also its suffix
+        self.failures = [self._failure(pattern) for pattern in self.patterns]
+        # Number of characters of each pattern matched by the end of the stream
+        self.matched = [0] * len(self.patterns)
+
+    @property
+    def found(self) -> bool:
+        return any(
+            matched == len(pattern)
+            for pattern, matched in zip(self.patterns, self.matched)
+        )
+
+    @staticmethod
+    def _join_words(tokens: List[str]) -> str:
+        text = ""
+        for token in tokens:
+            if text and token and text[-1].isalnum() and token[0].isalnum():
+                text += " "
+            text += token
+        return text
+
+    @staticmethod
+    def _failure(pattern: str) -> List[int]:
+        failure = [0] * len(pattern)
+        matched = 0
+        for i in range(1, len(pattern)):
+            while matched and pattern[i] != pattern[matched]:
+                matched = failure[matched - 1]
+            if pattern[i] == pattern[matched]:
+                matched += 1
+            failure[i] = matched
+        return failure
+
+    def _normalize(self, text: str) -> str:
+        return "".join(text.split()) if self.strip_tokens else text
+
+    def feed(self, token: str) -> bool:
+        """Consume a token. Return True once the answer prefix has been seen."""
+        if self.found:
+            return True
+
+        text = self._normalize(token)
+        for index, (pattern, failure) in enumerate(zip(self.patterns, self.failures)):
+            matched = self.matched[index]
+            for char in text:
+                if matched == len(pattern):
+                    break
+                while matched and char != pattern[matched]:
+                    matched = failure[matched - 1]
+                if char == pattern[matched]:
+                    matched += 1
+            self.matched[index] = matched
+
+        return self.found
+
 
 class FinalStreamHelper:
     # The stream we can use to stream the final answer from a chain
@@ -42,15 +158,10 @@ class FinalStreamHelper:
             self.answer_prefix_tokens = DEFAULT_ANSWER_PREFIX_TOKENS
         else:
             self.answer_prefix_tokens = answer_prefix_tokens
-        if strip_tokens:
-            self.answer_prefix_tokens_stripped = [
-                token.strip() for token in self.answer_prefix_tokens
-            ]
-        else:
-            self.answer_prefix_tokens_stripped = self.answer_prefix_tokens
 
-        self.last_tokens = [""] * len(self.answer_prefix_tokens)
-        self.last_tokens_stripped = [""] * len(self.answer_prefix_tokens)
+        self.answer_prefix_matcher = AnswerPrefixMatcher(
+            self.answer_prefix_tokens, strip_tokens
+        )
         self.strip_tokens = strip_tokens
         self.answer_reached = force_stream_final_answer
 
@@ -60,34 +171,10 @@ class FinalStreamHelper:
         self.has_streamed_final_answer = False
 
     def _check_if_answer_reached(self) -> bool:
-        if self.strip_tokens:
-            return self._compare_last_tokens(self.last_tokens_stripped)
-        else:
-            return self._compare_last_tokens(self.last_tokens)
-
-    def _compare_last_tokens(self, last_tokens: List[str]):
-        if last_tokens == self.answer_prefix_tokens_stripped:
-            # If tokens match perfectly we are done
-            return True
-        else:
-            # Some LLMs will consider all the tokens of the final answer as one token
-            # so we check if any last token contains all answer tokens
-            return any(
-                [
-                    all(
-                        answer_token in last_token
-                        for answer_token in self.answer_prefix_tokens_stripped
-                    )
-                    for last_token in last_tokens
-                ]
-            )
+        return self.answer_prefix_matcher.found
 
     def _append_to_last_tokens(self, token: str) -> None:
-        self.last_tokens.append(token)
-        self.last_tokens_stripped.append(token.strip())
-        if len(self.last_tokens) > len(self.answer_prefix_tokens):
-            self.last_tokens.pop(0)
-            self.last_tokens_stripped.pop(0)
+        self.answer_prefix_matcher.feed(token)
 
 
 class ChatGenerationStart(TypedDict):
@@ -237,6 +324,10 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
     steps: Dict[str, Step]
     parent_id_map: Dict[str, str]
     ignored_runs: set
+    # Run id -> id of the root of its run tree
+    run_roots: Dict[str, str]
+    # Root run id -> ids of the runs of the tree, least recently active tree first
+    run_trees: "OrderedDict[str, List[str]]"
 
     def __init__(
         self,
@@ -250,6 +341,8 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
         to_ignore: Optional[List[str]] = None,
         # Runs to keep within ignored runs
         to_keep: Optional[List[str]] = None,
+        # Runs tracked at most, the least recently active run trees are dropped beyond
+        max_tracked_runs: int = DEFAULT_MAX_TRACKED_RUNS,
         **kwargs: Any,
     ) -> None:
         BaseTracer.__init__(self, **kwargs)
@@ -264,6 +357,9 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
         self.steps = {}
         self.parent_id_map = {}
         self.ignored_runs = set()
+        self.run_roots = {}
+        self.run_trees = OrderedDict()
+        self.max_tracked_runs = max_tracked_runs
 
         if self.context.current_step:
             self.root_parent_id = self.context.current_step.id
@@ -350,12 +446,14 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
         **kwargs: Any,
     ) -> Run:
         if isinstance(chunk, ChatGenerationChunk):
-            start = self.chat_generations[str(run_id)]
+            start = self.chat_generations.get(str(run_id))
         else:
-            start = self.completion_generations[str(run_id)]  # type: ignore
-        start["token_count"] += 1
-        if start["tt_first_token"] is None:
-            start["tt_first_token"] = (time.time() - start["start"]) * 1000
+            start = self.completion_generations.get(str(run_id))  # type: ignore
+        # None if the run tree was dropped
+        if start:
+            start["token_count"] += 1
+            if start["tt_first_token"] is None:
+                start["tt_first_token"] = (time.time() - start["start"]) * 1000
 
         if self.stream_final_answer:
             self._append_to_last_tokens(token)
@@ -363,8 +461,8 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
             if self.answer_reached:
                 if not self.final_stream:
                     self.final_stream = Message(content="")
-                    self._run_sync(self.final_stream.send())
-                self._run_sync(self.final_stream.stream_token(token))
+                    self.context.step_events.send(self.final_stream)
+                self.context.step_events.stream_token(self.final_stream, token)
                 self.has_streamed_final_answer = True
             else:
                 self.answer_reached = self._check_if_answer_reached()
@@ -376,13 +474,55 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
             parent_run_id=parent_run_id,
         )
 
-    def _run_sync(self, co):  # TODO: WHAT TO DO WITH THIS?
-        context_var.set(self.context)
-        self.context.loop.create_task(co)
-
     def _persist_run(self, run: Run) -> None:
         pass
 
+    def _track_run(self, run: Run):
+        run_id = str(run.id)
+        parent_id = str(run.parent_run_id) if run.parent_run_id else None
+        # A run whose parent is not traced by this handler is a root
+        root_id = self.run_roots.get(parent_id, run_id) if parent_id else run_id
+
+        self.run_roots[run_id] = root_id
+        self.run_trees.setdefault(root_id, []).append(run_id)
+        self.run_trees.move_to_end(root_id)
+
+        # Run trees that never ended (e.g. interrupted) would be kept forever
+        while len(self.run_roots) > self.max_tracked_runs and len(self.run_trees) > 1:
+            self._release_run_tree(next(iter(self.run_trees)))
+
+    def _release_run_tree(self, root_id: str):
+        for run_id in self.run_trees.pop(root_id, []):
+            self.run_roots.pop(run_id, None)
+            self.steps.pop(run_id, None)
+            self.parent_id_map.pop(run_id, None)
+            self.ignored_runs.discard(run_id)
+            self.generation_inputs.pop(run_id, None)
+            self.chat_generations.pop(run_id, None)
+            self.completion_generations.pop(run_id, None)
+
+    def _release_if_root(self, run_id: str):
+        if self.run_roots.get(run_id) == run_id:
+            self._release_run_tree(run_id)
+
+    def memory_usage(self) -> Dict[str, Any]:
+        """Report the runs tracked by the handler and an estimate of the memory they hold."""
+        tracked: Dict[str, Sized] = {
+            "steps": self.steps,
+            "parent_id_map": self.parent_id_map,
+            "ignored_runs": self.ignored_runs,
+            "generation_inputs": self.generation_inputs,
+            "chat_generations": self.chat_generations,
+            "completion_generations": self.completion_generations,
+        }
+        return {
+            "runs": len(self.run_roots),
+            "run_trees": len(self.run_trees),
+            "max_tracked_runs": self.max_tracked_runs,
+            "entries": {name: len(value) for name, value in tracked.items()},
+            "approximate_bytes": approximate_size(tracked),
+        }
+
     def _get_run_parent_id(self, run: Run):
         parent_id = str(run.parent_run_id) if run.parent_run_id else self.root_parent_id
 
@@ -437,6 +577,7 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
     def _start_trace(self, run: Run) -> None:
         super()._start_trace(run)
         context_var.set(self.context)
+        self._track_run(run)
 
         ignore, parent_id = self._should_ignore_run(run)
 
@@ -479,7 +620,12 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
 
         self.steps[str(run.id)] = step
 
-        self._run_sync(step.send())
+        self.context.step_events.send(step)
+
+    def _end_trace(self, run: Run) -> None:
+        super()._end_trace(run)
+        # The steps of the run tree are complete
+        self._release_if_root(str(run.id))
 
     def _on_run_update(self, run: Run) -> None:
         """Process a run upon update."""
@@ -558,10 +704,10 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
 
             if current_step:
                 current_step.end = utc_now()
-                self._run_sync(current_step.update())
+                self.context.step_events.update(current_step)
 
             if self.final_stream and self.has_streamed_final_answer:
-                self._run_sync(self.final_stream.update())
+                self.context.step_events.update(self.final_stream)
 
             return
 
@@ -574,7 +720,7 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
         if current_step:
             current_step.output = output
             current_step.end = utc_now()
-            self._run_sync(current_step.update())
+            self.context.step_events.update(current_step)
 
     def _on_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
         context_var.set(self.context)
@@ -583,7 +729,11 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
             current_step.is_error = True
             current_step.output = str(error)
             current_step.end = utc_now()
-            self._run_sync(current_step.update())
+            self.context.step_events.update(current_step)
+
+        # The run does not end through _end_trace
+        self.run_map.pop(str(run_id), None)
+        self._release_if_root(str(run_id))
 
     on_llm_error = _on_error
     on_chain_error = _on_error
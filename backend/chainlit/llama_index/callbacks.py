@@ -1,10 +1,10 @@
 from typing import Any, Dict, List, Optional
 
+from chainlit.clock import utc_now
 from chainlit.context import context_var
 from chainlit.element import Text
 from chainlit.step import Step, StepType
 from literalai import ChatGeneration, CompletionGeneration, GenerationMessage
-from literalai.helper import utc_now
 from llama_index.core.callbacks import TokenCountingHandler
 from llama_index.core.callbacks.schema import CBEventType, EventPayload
 from llama_index.core.llms import ChatMessage, ChatResponse, CompletionResponse
@@ -89,7 +89,7 @@ class LlamaIndexCallbackHandler(TokenCountingHandler):
         self.steps[event_id] = step
         step.start = utc_now()
         step.input = payload or {}
-        self.context.loop.create_task(step.send())
+        self.context.step_events.send(step)
         return event_id
 
     def on_event_end(
@@ -123,7 +123,7 @@ class LlamaIndexCallbackHandler(TokenCountingHandler):
                     for idx, source in enumerate(sources)
                 ]
                 step.output = f"Retrieved the following sources: {source_refs}"
-            self.context.loop.create_task(step.update())
+            self.context.step_events.update(step)
 
         if event_type == CBEventType.LLM:
             formatted_messages = payload.get(
@@ -170,7 +170,7 @@ class LlamaIndexCallbackHandler(TokenCountingHandler):
                     token_count=token_count,
                 )
 
-            self.context.loop.create_task(step.update())
+            self.context.step_events.update(step)
 
         self.steps.pop(event_id, None)
 
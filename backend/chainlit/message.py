@@ -1,11 +1,11 @@
 import asyncio
 import json
-import time
 import uuid
 from abc import ABC
 from typing import Awaitable, Callable, Dict, List, Optional, Union, cast
 
 from chainlit.action import Action
+from chainlit.clock import next_sequence, utc_now
 from chainlit.config import config
 from chainlit.context import context
 from chainlit.data import get_data_layer
@@ -14,10 +14,10 @@ from chainlit.extensions.exceptions import AskTimeoutError
 from chainlit.extensions.types import AskSpec, BaseResponse, MdLink, MessageSpec
 from chainlit.logger import logger
 from chainlit.step import StepDict
+from chainlit.tasks import task_supervisor
 from chainlit.telemetry import trace_event
 from chainlit.types import AskFileResponse, AskFileSpec, FileDict
 from literalai import BaseGeneration
-from literalai.helper import utc_now
 from literalai.step import MessageStepType
 
 
@@ -30,6 +30,7 @@ class MessageBase(ABC):
     disable_feedback = False
     streaming = False
     created_at: Union[str, None] = None
+    sequence: int
     fail_on_persist_error: bool = False
     persisted = False
     is_error = False
@@ -44,6 +45,7 @@ class MessageBase(ABC):
     def __post_init__(self) -> None:
         trace_event(f"init {self.__class__.__name__}")
         self.thread_id = context.session.thread_id
+        self.sequence = next_sequence()
 
         if not getattr(self, "id", None):
             self.id = str(uuid.uuid4())
@@ -68,6 +70,7 @@ class MessageBase(ABC):
             "id": self.id,
             "threadId": self.thread_id,
             "createdAt": self.created_at,
+            "sequence": self.sequence,
             "start": self.created_at,
             "end": self.created_at,
             "output": self.content,
@@ -102,7 +105,7 @@ class MessageBase(ABC):
         data_layer = get_data_layer()
         if data_layer:
             try:
-                asyncio.create_task(data_layer.update_step(step_dict))
+                task_supervisor.spawn(data_layer.update_step(step_dict), "persistence")
             except Exception as e:
                 if self.fail_on_persist_error:
                     raise e
@@ -122,7 +125,9 @@ class MessageBase(ABC):
         data_layer = get_data_layer()
         if data_layer:
             try:
-                asyncio.create_task(data_layer.delete_step(step_dict["id"]))
+                task_supervisor.spawn(
+                    data_layer.delete_step(step_dict["id"]), "persistence"
+                )
             except Exception as e:
                 if self.fail_on_persist_error:
                     raise e
@@ -137,7 +142,7 @@ class MessageBase(ABC):
         data_layer = get_data_layer()
         if data_layer and not self.persisted:
             try:
-                asyncio.create_task(data_layer.create_step(step_dict))
+                task_supervisor.spawn(data_layer.create_step(step_dict), "persistence")
                 self.persisted = True
             except Exception as e:
                 if self.fail_on_persist_error:
@@ -212,7 +217,6 @@ class Message(MessageBase):
         speechContent: str = "",
         mdLinks: Optional[List[MdLink]] = None,
     ):
-        time.sleep(0.001)
         self.language = language
         self.generation = generation
         self.speechContent = speechContent
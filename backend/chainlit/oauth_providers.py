@@ -4,6 +4,7 @@ import urllib.parse
 from typing import Dict, List, Optional, Tuple
 
 import httpx
+from chainlit.http_client import get_http_client
 from chainlit.user import User
 from fastapi import HTTPException
 
@@ -44,42 +45,42 @@ class GithubOAuthProvider(OAuthProvider):
             "client_secret": self.client_secret,
             "code": code,
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://github.com/login/oauth/access_token",
-                data=payload,
+        client = get_http_client()
+        response = await client.post(
+            "https://github.com/login/oauth/access_token",
+            data=payload,
+        )
+        response.raise_for_status()
+        content = urllib.parse.parse_qs(response.text)
+        token = content.get("access_token", [""])[0]
+        if not token:
+            raise HTTPException(
+                status_code=400, detail="Failed to get the access token"
             )
-            response.raise_for_status()
-            content = urllib.parse.parse_qs(response.text)
-            token = content.get("access_token", [""])[0]
-            if not token:
-                raise HTTPException(
-                    status_code=400, detail="Failed to get the access token"
-                )
-            return token
+        return token
 
     async def get_user_info(self, token: str):
-        async with httpx.AsyncClient() as client:
-            user_response = await client.get(
-                "https://api.github.com/user",
-                headers={"Authorization": f"token {token}"},
-            )
-            user_response.raise_for_status()
-            github_user = user_response.json()
+        client = get_http_client()
+        user_response = await client.get(
+            "https://api.github.com/user",
+            headers={"Authorization": f"token {token}"},
+        )
+        user_response.raise_for_status()
+        github_user = user_response.json()
 
-            emails_response = await client.get(
-                "https://api.github.com/user/emails",
-                headers={"Authorization": f"token {token}"},
-            )
-            emails_response.raise_for_status()
-            emails = emails_response.json()
+        emails_response = await client.get(
+            "https://api.github.com/user/emails",
+            headers={"Authorization": f"token {token}"},
+        )
+        emails_response.raise_for_status()
+        emails = emails_response.json()
 
-            github_user.update({"emails": emails})
-            user = User(
-                identifier=github_user["login"],
-                metadata={"image": github_user["avatar_url"], "provider": "github"},
-            )
-            return (github_user, user)
+        github_user.update({"emails": emails})
+        user = User(
+            identifier=github_user["login"],
+            metadata={"image": github_user["avatar_url"], "provider": "github"},
+        )
+        return (github_user, user)
 
 
 class GoogleOAuthProvider(OAuthProvider):
@@ -104,35 +105,35 @@ class GoogleOAuthProvider(OAuthProvider):
             "grant_type": "authorization_code",
             "redirect_uri": url,
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://oauth2.googleapis.com/token",
-                data=payload,
+        client = get_http_client()
+        response = await client.post(
+            "https://oauth2.googleapis.com/token",
+            data=payload,
+        )
+        response.raise_for_status()
+        json = response.json()
+        token = json.get("access_token")
+        if not token:
+            raise httpx.HTTPStatusError(
+                "Failed to get the access token",
+                request=response.request,
+                response=response,
             )
-            response.raise_for_status()
-            json = response.json()
-            token = json.get("access_token")
-            if not token:
-                raise httpx.HTTPStatusError(
-                    "Failed to get the access token",
-                    request=response.request,
-                    response=response,
-                )
-            return token
+        return token
 
     async def get_user_info(self, token: str):
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://www.googleapis.com/userinfo/v2/me",
-                headers={"Authorization": f"Bearer {token}"},
-            )
-            response.raise_for_status()
-            google_user = response.json()
-            user = User(
-                identifier=google_user["email"],
-                metadata={"image": google_user["picture"], "provider": "google"},
-            )
-            return (google_user, user)
+        client = get_http_client()
+        response = await client.get(
+            "https://www.googleapis.com/userinfo/v2/me",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        response.raise_for_status()
+        google_user = response.json()
+        user = User(
+            identifier=google_user["email"],
+            metadata={"image": google_user["picture"], "provider": "google"},
+        )
+        return (google_user, user)
 
 
 class AzureADOAuthProvider(OAuthProvider):
@@ -171,50 +172,50 @@ class AzureADOAuthProvider(OAuthProvider):
             "grant_type": "authorization_code",
             "redirect_uri": url,
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.token_url,
-                data=payload,
-            )
-            response.raise_for_status()
-            json = response.json()
+        client = get_http_client()
+        response = await client.post(
+            self.token_url,
+            data=payload,
+        )
+        response.raise_for_status()
+        json = response.json()
 
-            token = json["access_token"]
-            if not token:
-                raise HTTPException(
-                    status_code=400, detail="Failed to get the access token"
-                )
-            return token
+        token = json["access_token"]
+        if not token:
+            raise HTTPException(
+                status_code=400, detail="Failed to get the access token"
+            )
+        return token
 
     async def get_user_info(self, token: str):
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://graph.microsoft.com/v1.0/me",
+        client = get_http_client()
+        response = await client.get(
+            "https://graph.microsoft.com/v1.0/me",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        response.raise_for_status()
+
+        azure_user = response.json()
+
+        try:
+            photo_response = await client.get(
+                "https://graph.microsoft.com/v1.0/me/photos/48x48/$value",
                 headers={"Authorization": f"Bearer {token}"},
             )
-            response.raise_for_status()
-
-            azure_user = response.json()
-
-            try:
-                photo_response = await client.get(
-                    "https://graph.microsoft.com/v1.0/me/photos/48x48/$value",
-                    headers={"Authorization": f"Bearer {token}"},
-                )
-                photo_data = await photo_response.aread()
-                base64_image = base64.b64encode(photo_data)
-                azure_user[
-                    "image"
-                ] = f"data:{photo_response.headers['Content-Type']};base64,{base64_image.decode('utf-8')}"
-            except Exception as e:
-                # Ignore errors getting the photo
-                pass
-
-            user = User(
-                identifier=azure_user["userPrincipalName"],
-                metadata={"image": azure_user.get("image"), "provider": "azure-ad"},
-            )
-            return (azure_user, user)
+            photo_data = await photo_response.aread()
+            base64_image = base64.b64encode(photo_data)
+            azure_user[
+                "image"
+            ] = f"data:{photo_response.headers['Content-Type']};base64,{base64_image.decode('utf-8')}"
+        except Exception as e:
+            # Ignore errors getting the photo
+            pass
+
+        user = User(
+            identifier=azure_user["userPrincipalName"],
+            metadata={"image": azure_user.get("image"), "provider": "azure-ad"},
+        )
+        return (azure_user, user)
 
 
 class OktaOAuthProvider(OAuthProvider):
@@ -257,37 +258,37 @@ class OktaOAuthProvider(OAuthProvider):
             "grant_type": "authorization_code",
             "redirect_uri": url,
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.domain}/oauth2{self.get_authorization_server_path()}/v1/token",
-                data=payload,
+        client = get_http_client()
+        response = await client.post(
+            f"{self.domain}/oauth2{self.get_authorization_server_path()}/v1/token",
+            data=payload,
+        )
+        response.raise_for_status()
+        json_data = response.json()
+
+        token = json_data.get("access_token")
+        if not token:
+            raise httpx.HTTPStatusError(
+                "Failed to get the access token",
+                request=response.request,
+                response=response,
             )
-            response.raise_for_status()
-            json_data = response.json()
-
-            token = json_data.get("access_token")
-            if not token:
-                raise httpx.HTTPStatusError(
-                    "Failed to get the access token",
-                    request=response.request,
-                    response=response,
-                )
-            return token
+        return token
 
     async def get_user_info(self, token: str):
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.domain}/oauth2{self.get_authorization_server_path()}/v1/userinfo",
-                headers={"Authorization": f"Bearer {token}"},
-            )
-            response.raise_for_status()
-            okta_user = response.json()
+        client = get_http_client()
+        response = await client.get(
+            f"{self.domain}/oauth2{self.get_authorization_server_path()}/v1/userinfo",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        response.raise_for_status()
+        okta_user = response.json()
 
-            user = User(
-                identifier=okta_user.get("email"),
-                metadata={"image": "", "provider": "okta"},
-            )
-            return (okta_user, user)
+        user = User(
+            identifier=okta_user.get("email"),
+            metadata={"image": "", "provider": "okta"},
+        )
+        return (okta_user, user)
 
 
 class Auth0OAuthProvider(OAuthProvider):
@@ -321,36 +322,36 @@ class Auth0OAuthProvider(OAuthProvider):
             "grant_type": "authorization_code",
             "redirect_uri": url,
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.domain}/oauth/token",
-                data=payload,
+        client = get_http_client()
+        response = await client.post(
+            f"{self.domain}/oauth/token",
+            data=payload,
+        )
+        response.raise_for_status()
+        json_content = response.json()
+        token = json_content.get("access_token")
+        if not token:
+            raise HTTPException(
+                status_code=400, detail="Failed to get the access token"
             )
-            response.raise_for_status()
-            json_content = response.json()
-            token = json_content.get("access_token")
-            if not token:
-                raise HTTPException(
-                    status_code=400, detail="Failed to get the access token"
-                )
-            return token
+        return token
 
     async def get_user_info(self, token: str):
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.original_domain}/userinfo",
-                headers={"Authorization": f"Bearer {token}"},
-            )
-            response.raise_for_status()
-            auth0_user = response.json()
-            user = User(
-                identifier=auth0_user.get("email"),
-                metadata={
-                    "image": auth0_user.get("picture", ""),
-                    "provider": "auth0",
-                },
-            )
-            return (auth0_user, user)
+        client = get_http_client()
+        response = await client.get(
+            f"{self.original_domain}/userinfo",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        response.raise_for_status()
+        auth0_user = response.json()
+        user = User(
+            identifier=auth0_user.get("email"),
+            metadata={
+                "image": auth0_user.get("picture", ""),
+                "provider": "auth0",
+            },
+        )
+        return (auth0_user, user)
 
 
 class DescopeOAuthProvider(OAuthProvider):
@@ -378,35 +379,35 @@ class DescopeOAuthProvider(OAuthProvider):
             "grant_type": "authorization_code",
             "redirect_uri": url,
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.domain}/token",
-                data=payload,
+        client = get_http_client()
+        response = await client.post(
+            f"{self.domain}/token",
+            data=payload,
+        )
+        response.raise_for_status()
+        json_content = response.json()
+        token = json_content.get("access_token")
+        if not token:
+            raise httpx.HTTPStatusError(
+                "Failed to get the access token",
+                request=response.request,
+                response=response,
             )
-            response.raise_for_status()
-            json_content = response.json()
-            token = json_content.get("access_token")
-            if not token:
-                raise httpx.HTTPStatusError(
-                    "Failed to get the access token",
-                    request=response.request,
-                    response=response,
-                )
-            return token
+        return token
 
     async def get_user_info(self, token: str):
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.domain}/userinfo", headers={"Authorization": f"Bearer {token}"}
-            )
-            response.raise_for_status()  # This will raise an exception for 4xx/5xx responses
-            descope_user = response.json()
+        client = get_http_client()
+        response = await client.get(
+            f"{self.domain}/userinfo", headers={"Authorization": f"Bearer {token}"}
+        )
+        response.raise_for_status()  # This will raise an exception for 4xx/5xx responses
+        descope_user = response.json()
 
-            user = User(
-                identifier=descope_user.get("email"),
-                metadata={"image": "", "provider": "descope"},
-            )
-            return (descope_user, user)
+        user = User(
+            identifier=descope_user.get("email"),
+            metadata={"image": "", "provider": "descope"},
+        )
+        return (descope_user, user)
 
 
 class AWSCognitoOAuthProvider(OAuthProvider):
@@ -436,43 +437,43 @@ class AWSCognitoOAuthProvider(OAuthProvider):
             "grant_type": "authorization_code",
             "redirect_uri": url,
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.token_url,
-                data=payload,
-            )
-            response.raise_for_status()
-            json = response.json()
+        client = get_http_client()
+        response = await client.post(
+            self.token_url,
+            data=payload,
+        )
+        response.raise_for_status()
+        json = response.json()
 
-            token = json.get("access_token")
-            if not token:
-                raise HTTPException(
-                    status_code=400, detail="Failed to get the access token"
-                )
-            return token
+        token = json.get("access_token")
+        if not token:
+            raise HTTPException(
+                status_code=400, detail="Failed to get the access token"
+            )
+        return token
 
     async def get_user_info(self, token: str):
         user_info_url = (
             f"https://{os.environ.get('OAUTH_COGNITO_DOMAIN')}/oauth2/userInfo"
         )
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                user_info_url,
-                headers={"Authorization": f"Bearer {token}"},
-            )
-            response.raise_for_status()
+        client = get_http_client()
+        response = await client.get(
+            user_info_url,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        response.raise_for_status()
 
-            cognito_user = response.json()
+        cognito_user = response.json()
 
-            # Customize user metadata as needed
-            user = User(
-                identifier=cognito_user["email"],
-                metadata={
-                    "image": cognito_user.get("picture", ""),
-                    "provider": "aws-cognito",
-                },
-            )
-            return (cognito_user, user)
+        # Customize user metadata as needed
+        user = User(
+            identifier=cognito_user["email"],
+            metadata={
+                "image": cognito_user.get("picture", ""),
+                "provider": "aws-cognito",
+            },
+        )
+        return (cognito_user, user)
 
 
 providers = [
@@ -0,0 +1,131 @@
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from chainlit.logger import logger
+
+# Events carrying the full state of an object: only the last pending one per key is sent.
+# The value is the data field used as key.
+MERGEABLE_EVENTS = {"update_message": "id"}
+
+
+class OutboundEvent:
+    __slots__ = ("event", "data", "key")
+
+    def __init__(self, event: str, data: Any, key: Optional[str]):
+        self.event = event
+        self.data = data
+        self.key = key
+
+
+class OutboundEventQueue:
+    """
+    Bounded queue of the events emitted to a session.
+
+    Events are sent in order by a single consumer task, started when the queue is not empty.
+    Once the queue holds `max_size` events, producers wait for the client to catch up.
+    Pending events listed in MERGEABLE_EVENTS are replaced by the latest one with the same key.
+    """
+
+    def __init__(
+        self,
+        # Function sending an event to the client
+        send: Callable[[str, Any], Awaitable[Any]],
+        # Number of pending events above which producers wait
+        max_size: int,
+    ):
+        self.send = send
+        self.max_size = max_size
+
+        self._events: Deque[OutboundEvent] = deque()
+        self._mergeable: Dict[str, OutboundEvent] = {}
+        self._size = 0
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._empty = asyncio.Event()
+        self._empty.set()
+        self._consumer: Optional["asyncio.Task"] = None
+        self._closed = False
+
+        # Metrics
+        self.peak_depth = 0
+        self.merged_count = 0
+
+    @property
+    def depth(self) -> int:
+        """Number of events waiting to be sent."""
+        return self._size
+
+    async def put(self, event: str, data: Any):
+        """Queue an event, waiting for room if the queue is full."""
+        if self._closed:
+            return
+
+        key = self._merge_key(event, data)
+
+        if key is not None and (pending := self._mergeable.get(key)):
+            # The latest state supersedes the pending one, sent at its place in the queue
+            pending.data = data
+            self.merged_count += 1
+            return
+
+        if self._size >= self.max_size and self._not_full.is_set():
+            logger.warning(
+                f"Outbound queue full ({self._size} events), waiting for the client"
+            )
+        while self._size >= self.max_size and not self._closed:
+            self._not_full.clear()
+            await self._not_full.wait()
+        if self._closed:
+            return
+
+        outbound_event = OutboundEvent(event, data, key)
+        self._events.append(outbound_event)
+        if key is not None:
+            self._mergeable[key] = outbound_event
+        self._size += 1
+        self.peak_depth = max(self.peak_depth, self._size)
+        self._empty.clear()
+
+        if not self._consumer or self._consumer.done():
+            self._consumer = asyncio.ensure_future(self._consume())
+
+    async def drain(self):
+        """Wait until every queued event has been sent."""
+        if self._size:
+            await self._empty.wait()
+
+    def close(self):
+        """Drop the pending events and release the waiting producers."""
+        self._closed = True
+        self._events.clear()
+        self._mergeable.clear()
+        self._size = 0
+        self._not_full.set()
+        self._empty.set()
+        if self._consumer:
+            self._consumer.cancel()
+
+    def _merge_key(self, event: str, data: Any) -> Optional[str]:
+        field = MERGEABLE_EVENTS.get(event)
+        if field and isinstance(data, dict) and data.get(field):
+            return f"{event}:{data[field]}"
+        return None
+
+    async def _consume(self):
+        while self._events:
+            outbound_event = self._events.popleft()
+            if outbound_event.key is not None:
+                self._mergeable.pop(outbound_event.key, None)
+
+            try:
+                await self.send(outbound_event.event, outbound_event.data)
+            except Exception as e:
+                logger.error(f"Error while emitting {outbound_event.event}: {e}")
+
+            self._size -= 1
+            if self._size < self.max_size:
+                self._not_full.set()
+
+        self._not_full.set()
+        self._empty.set()
@@ -0,0 +1,289 @@
+import asyncio
+import codecs
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Optional, Tuple, Union
+
+from chainlit.config import config
+from chainlit.logger import logger
+from chainlit.playground.provider import BaseProvider
+from chainlit.tasks import task_supervisor
+from chainlit.types import GenerationRequest
+from fastapi.responses import StreamingResponse
+from literalai import GenerationMessage
+
+# Number of completions kept in memory
+GENERATION_CACHE_SIZE = 256
+# Size (in characters) of the chunks a cached completion is streamed in
+REPLAY_CHUNK_SIZE = 256
+
+
+def normalize_content(content: Any) -> str:
+    if isinstance(content, str):
+        return content.strip()
+    if not content:
+        return ""
+    # Multimodal content (list of text and image parts), serialized canonically
+    return json.dumps(content, sort_keys=True, default=str)
+
+
+def normalize_message(message: GenerationMessage) -> Dict:
+    return {
+        "role": message.get("role"),
+        "content": normalize_content(message.get("content")),
+        "name": message.get("name"),
+        "function_call": message.get("function_call"),
+        "tool_calls": message.get("tool_calls"),
+    }
+
+
+def generation_cache_key(provider: BaseProvider, request: GenerationRequest) -> str:
+    """Key of a request, identical for requests producing the same completion."""
+    generation = request.generation
+
+    messages = None
+    prompt = None
+    if request.chatGeneration:
+        messages = [normalize_message(m) for m in request.chatGeneration.messages or []]
+    elif request.completionGeneration:
+        prompt = (request.completionGeneration.prompt or "").strip()
+
+    # Users with different credentials don't share completions
+    credentials = hashlib.sha256(
+        json.dumps(provider.validate_env(request), sort_keys=True).encode()
+    ).hexdigest()
+
+    key = {
+        "provider": provider.id,
+        "credentials": credentials,
+        "settings": generation.settings,
+        "tools": generation.tools,
+        "messages": messages,
+        "prompt": prompt,
+    }
+    return hashlib.sha256(
+        json.dumps(key, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+class SQLiteGenerationStore:
+    """On disk tier of the generation cache, shared by the worker processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS generations "
+                "(key TEXT PRIMARY KEY, completion TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS generations_created_at "
+                "ON generations (created_at)"
+            )
+
+    def get(self, key: str, ttl: float) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT completion FROM generations WHERE key = ? AND created_at > ?",
+                (key, time.time() - ttl),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, completion: str, ttl: float):
+        """Store a completion, deleting the expired ones."""
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM generations WHERE created_at <= ?", (now - ttl,)
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO generations VALUES (?, ?, ?)",
+                (key, completion, now),
+            )
+
+
+class GenerationCache:
+    """
+    Cache of the prompt playground completions.
+
+    Completions are kept in memory (LRU) and optionally in a SQLite database.
+    Concurrent identical requests are collapsed: the first one calls the provider,
+    the others wait for its completion. Cached completions are replayed as a stream.
+    """
+
+    def __init__(self, ttl: float, path: Optional[str]):
+        self.ttl = ttl
+        self.store = SQLiteGenerationStore(path) if path else None
+
+        # Key -> (expiry time, completion)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # Key -> completion of the request in flight
+        self._pending: Dict[str, "asyncio.Future[str]"] = {}
+
+        # Metrics
+        self.hit_count = 0
+        self.miss_count = 0
+        self.collapsed_count = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        if self.store:
+            loop = asyncio.get_running_loop()
+            try:
+                completion = await loop.run_in_executor(
+                    None, self.store.get, key, self.ttl
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to read the generation cache: {e}")
+                completion = None
+            if completion is not None:
+                self._set_in_memory(key, completion)
+                return completion
+
+        return None
+
+    async def set(self, key: str, completion: str):
+        self._set_in_memory(key, completion)
+        if self.store:
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(
+                    None, self.store.set, key, completion, self.ttl
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to write the generation cache: {e}")
+
+    def _set_in_memory(self, key: str, completion: str):
+        self._entries[key] = (time.monotonic() + self.ttl, completion)
+        self._entries.move_to_end(key)
+        if len(self._entries) > GENERATION_CACHE_SIZE:
+            self._entries.popitem(last=False)
+
+    async def create_completion(
+        self, provider: BaseProvider, request: GenerationRequest
+    ) -> StreamingResponse:
+        key = generation_cache_key(provider, request)
+
+        if (completion := await self.get(key)) is not None:
+            self.hit_count += 1
+            return replay(completion)
+
+        if pending := self._pending.get(key):
+            try:
+                completion = await asyncio.shield(pending)
+                self.collapsed_count += 1
+                return replay(completion)
+            except Exception:
+                # The request in flight failed, make our own
+                pass
+
+        self.miss_count += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+
+        def settle(completion: Optional[str], error: Optional[BaseException]):
+            if future.done():
+                return
+            if self._pending.get(key) is future:
+                del self._pending[key]
+            if error is None:
+                future.set_result(completion)
+            else:
+                future.set_exception(RuntimeError(f"Generation failed: {error!r}"))
+                # Followers handle the failure, don't log it as never retrieved
+                future.exception()
+
+        try:
+            response = await provider.create_completion(request)
+        except BaseException as e:
+            settle(None, e)
+            raise
+
+        upstream = response.body_iterator
+        parts: "asyncio.Queue[Union[str, bytes, BaseException, None]]" = asyncio.Queue()
+
+        def abort(error: BaseException):
+            # No op once the completion is settled
+            if not future.done():
+                settle(None, error)
+                parts.put_nowait(error)
+
+        async def consume_upstream():
+            # Runs to completion even if the client disconnects, the waiting requests get the completion
+            chunks = []
+            # A multi-byte character can be split across chunks
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            try:
+                async for part in upstream:
+                    chunks.append(
+                        part if isinstance(part, str) else decoder.decode(part)
+                    )
+                    parts.put_nowait(part)
+                chunks.append(decoder.decode(b"", final=True))
+
+                completion = "".join(chunks)
+                await self.set(key, completion)
+                settle(completion, None)
+                parts.put_nowait(None)
+            except Exception as e:
+                abort(e)
+            finally:
+                # Cancelled (e.g. on shutdown): don't leave the waiting requests hanging
+                abort(asyncio.CancelledError())
+
+        # Not capped, the stream would otherwise wait for a slot while its response is open
+        task = task_supervisor.spawn(consume_upstream(), "streams")
+        if task:
+            # The coroutine doesn't run at all if the task is cancelled before it started
+            task.add_done_callback(lambda _: abort(asyncio.CancelledError()))
+
+        async def create_event_stream():
+            while (part := await parts.get()) is not None:
+                if isinstance(part, BaseException):
+                    raise part
+                yield part
+
+        response.body_iterator = create_event_stream()
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hit_count,
+            "misses": self.miss_count,
+            "collapsed": self.collapsed_count,
+            "size": len(self._entries),
+        }
+
+
+def replay(completion: str) -> StreamingResponse:
+    async def create_event_stream() -> AsyncIterator[str]:
+        for i in range(0, len(completion), REPLAY_CHUNK_SIZE):
+            yield completion[i : i + REPLAY_CHUNK_SIZE]
+
+    return StreamingResponse(create_event_stream())
+
+
+_generation_cache: Optional[GenerationCache] = None
+
+
+def get_generation_cache() -> Optional[GenerationCache]:
+    """Return the generation cache, None unless enabled in the config."""
+    global _generation_cache
+    if not config.project.generation_cache:
+        return None
+    if _generation_cache is None:
+        _generation_cache = GenerationCache(
+            ttl=config.project.generation_cache_ttl,
+            path=config.project.generation_cache_path,
+        )
+    return _generation_cache
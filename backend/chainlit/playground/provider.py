@@ -1,7 +1,13 @@
+import asyncio
+import inspect
 import os
-from typing import Any, Dict, List, Optional, Union
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from chainlit.config import config
+from chainlit.logger import logger
+from chainlit.tasks import task_supervisor
 from chainlit.telemetry import trace_event
 from chainlit.types import GenerationRequest
 from fastapi import HTTPException
@@ -10,6 +16,88 @@ from pydantic.dataclasses import dataclass
 
 from chainlit import input_widget
 
+# Number of LLM clients kept alive
+PROVIDER_CLIENT_CACHE_SIZE = 32
+# Duration (in seconds) after which an unused LLM client is closed
+PROVIDER_CLIENT_IDLE_TIMEOUT = 600
+
+
+async def close_client(client: Any):
+    try:
+        # httpx style clients have aclose, the SDK clients (OpenAI, Anthropic) an async close
+        close = getattr(client, "aclose", None) or client.close
+        result = close()
+        if inspect.isawaitable(result):
+            await result
+    except Exception as e:
+        logger.warning(f"Failed to close the {type(client).__name__} client: {e}")
+
+
+class ProviderClientCache:
+    """
+    LLM clients of the playground providers, reused between requests to keep their connections alive.
+
+    Clients are keyed by provider and settings (credentials included), so credentials
+    provided by a user (user_env) are never used with the client of another user.
+    """
+
+    def __init__(self, max_size: int, idle_timeout: float):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+
+        # Key -> (last use time, client)
+        self._clients: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        # (eviction time, client) of the clients evicted while possibly streaming a response
+        self._evicted: List[Tuple[float, Any]] = []
+
+    def get(self, key: Tuple, create: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        self._close_idle(now)
+
+        if key in self._clients:
+            client = self._clients[key][1]
+            self._clients.move_to_end(key)
+        else:
+            client = create()
+
+        self._clients[key] = (now, client)
+        if len(self._clients) > self.max_size:
+            _, (_, evicted) = self._clients.popitem(last=False)
+            # Closed once idle
+            self._evicted.append((now, evicted))
+        return client
+
+    async def close(self):
+        clients = [client for _, client in self._clients.values()]
+        clients += [client for _, client in self._evicted]
+        self._clients.clear()
+        self._evicted.clear()
+        await asyncio.gather(*[close_client(client) for client in clients])
+
+    def _close_idle(self, now: float):
+        idle = []
+        while self._clients:
+            key, (last_used, client) = next(iter(self._clients.items()))
+            if now - last_used < self.idle_timeout:
+                break
+            del self._clients[key]
+            idle.append(client)
+
+        while self._evicted and now - self._evicted[0][0] >= self.idle_timeout:
+            idle.append(self._evicted.pop(0)[1])
+
+        for client in idle:
+            task_supervisor.spawn(close_client(client), "clients")
+
+
+provider_clients = ProviderClientCache(
+    max_size=PROVIDER_CLIENT_CACHE_SIZE, idle_timeout=PROVIDER_CLIENT_IDLE_TIMEOUT
+)
+
+
+async def close_provider_clients():
+    await provider_clients.close()
+
 
 @dataclass
 class BaseProvider:
@@ -64,6 +152,11 @@ class BaseProvider:
     async def create_completion(self, request: GenerationRequest):
         trace_event("completion")
 
+    # Get a client created with these settings, reused across requests
+    def get_client(self, create: Callable[..., Any], **settings):
+        key = (self.id, create, tuple(sorted(settings.items())))
+        return provider_clients.get(key, lambda: create(**settings))
+
     # Get the environment variable based on the request
     def get_var(self, request: GenerationRequest, var: str) -> Union[str, None]:
         user_env = config.project.user_env or []
@@ -39,7 +39,7 @@ class AnthropicProvider(BaseProvider):
         if not prompt.endswith(anthropic.AI_PROMPT):
             prompt += anthropic.AI_PROMPT
 
-        client = anthropic.AsyncAnthropic(**env_settings)
+        client = self.get_client(anthropic.AsyncAnthropic, **env_settings)
 
         llm_settings["stream"] = True
 
@@ -125,7 +125,7 @@ class ChatOpenAIProvider(BaseProvider):
 
         env_settings = self.validate_env(request=request)
 
-        client = AsyncClient(api_key=env_settings["api_key"])
+        client = self.get_client(AsyncClient, api_key=env_settings["api_key"])
 
         llm_settings = request.generation.settings
 
@@ -186,7 +186,7 @@ class OpenAIProvider(BaseProvider):
 
         env_settings = self.validate_env(request=request)
 
-        client = AsyncClient(api_key=env_settings["api_key"])
+        client = self.get_client(AsyncClient, api_key=env_settings["api_key"])
 
         llm_settings = request.generation.settings
 
@@ -232,7 +232,8 @@ class AzureOpenAIProvider(BaseProvider):
 
         env_settings = self.validate_env(request=request)
 
-        client = AsyncAzureOpenAI(
+        client = self.get_client(
+            AsyncAzureOpenAI,
             api_key=env_settings["api_key"],
             api_version=env_settings["api_version"],
             azure_endpoint=env_settings["azure_endpoint"],
@@ -284,7 +285,8 @@ class AzureChatOpenAIProvider(BaseProvider):
 
         env_settings = self.validate_env(request=request)
 
-        client = AsyncAzureOpenAI(
+        client = self.get_client(
+            AsyncAzureOpenAI,
             api_key=env_settings["api_key"],
             api_version=env_settings["api_version"],
             azure_endpoint=env_settings["azure_endpoint"],
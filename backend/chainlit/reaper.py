@@ -0,0 +1,104 @@
+import asyncio
+import heapq
+import itertools
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from chainlit.logger import logger
+
+
+class Reaper:
+    """
+    Expire keys after a delay with a single task and a deadline heap.
+
+    Scheduling and cancelling an expiry are O(log n) (cancelled entries are lazily removed from the heap).
+    Keys reaching their deadline together are expired in batches.
+    """
+
+    def __init__(
+        self,
+        # Coroutine function called with each expired key
+        expire: Callable[[str], Awaitable[Any]],
+        # Maximum number of keys expired concurrently
+        batch_size: int = 100,
+    ):
+        self.expire = expire
+        self.batch_size = batch_size
+
+        # Entries are [deadline, counter, key], key is set to None once cancelled
+        self._heap: List[List[Any]] = []
+        self._entries: Dict[str, List[Any]] = {}
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task"] = None
+
+    @property
+    def pending(self) -> int:
+        """Number of scheduled expiries."""
+        return len(self._entries)
+
+    def schedule(self, key: str, delay: float):
+        """Expire the key in `delay` seconds, replacing any previous expiry of the key."""
+        self.cancel(key)
+
+        loop = asyncio.get_running_loop()
+        entry = [loop.time() + delay, next(self._counter), key]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+
+        if not self._task or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+        elif self._heap[0] is entry and self._wakeup:
+            # The new deadline is the closest one
+            self._wakeup.set()
+
+    def cancel(self, key: str) -> bool:
+        """Cancel the expiry of a key. Return False if no expiry was scheduled."""
+        if entry := self._entries.pop(key, None):
+            entry[2] = None
+            return True
+        return False
+
+    def stop(self):
+        """Stop the reaper task, pending expiries are dropped."""
+        if self._task:
+            self._task.cancel()
+        self._heap = []
+        self._entries = {}
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while self._heap:
+            deadline, _, key = self._heap[0]
+            if key is None:
+                heapq.heappop(self._heap)
+                continue
+
+            delay = deadline - loop.time()
+            if delay > 0 and self._wakeup:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            now = loop.time()
+            expired = []  # type: List[str]
+            while (
+                self._heap
+                and self._heap[0][0] <= now
+                and len(expired) < self.batch_size
+            ):
+                _, _, key = heapq.heappop(self._heap)
+                if key is not None:
+                    self._entries.pop(key, None)
+                    expired.append(key)
+
+            results = await asyncio.gather(
+                *[self.expire(key) for key in expired], return_exceptions=True
+            )
+            for key, result in zip(expired, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error while expiring {key}: {result}")
@@ -4,7 +4,8 @@ import mimetypes
 import re
 import shutil
 import urllib.parse
-from typing import Any, Optional, Union
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
 
 from chainlit.oauth_providers import get_oauth_provider
 from chainlit.secret import random_secret
@@ -18,7 +19,13 @@ import webbrowser
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from chainlit.auth import create_jwt, get_configuration, get_current_user
+from chainlit.auth import (
+    create_jwt,
+    get_configuration,
+    get_current_user,
+    reuseable_oauth,
+    user_cache,
+)
 from chainlit.config import (
     APP_ROOT,
     BACKEND_ROOT,
@@ -26,14 +33,22 @@ from chainlit.config import (
     FILES_DIRECTORY,
     PACKAGE_ROOT,
     config,
+    config_translation_dir,
     load_module,
     reload_config,
 )
 from chainlit.data import get_data_layer
 from chainlit.data.acl import is_thread_author
+from chainlit.http_cache import PrecomputedResponse
+from chainlit.http_client import close_http_client
 from chainlit.logger import logger
 from chainlit.markdown import get_markdown_str
+from chainlit.playground.cache import get_generation_cache
 from chainlit.playground.config import get_llm_providers
+from chainlit.playground.provider import close_provider_clients
+from chainlit.session_store import get_session_store
+from chainlit.static import PrecompressedStaticFiles, load_hashed_files
+from chainlit.tasks import task_supervisor
 from chainlit.telemetry import trace_event
 from chainlit.types import (
     DeleteThreadRequest,
@@ -53,7 +68,7 @@ from fastapi import (
     UploadFile,
     status,
 )
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.staticfiles import StaticFiles
 from fastapi_socketio import SocketManager
@@ -62,6 +77,9 @@ from starlette.middleware.cors import CORSMiddleware
 from typing_extensions import Annotated
 from watchfiles import awatch
 
+if TYPE_CHECKING:
+    from chainlit.session import WebsocketSession
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -93,7 +111,20 @@ async def lifespan(app: FastAPI):
                     file_name = os.path.basename(file_path)
                     file_ext = os.path.splitext(file_name)[1]
 
-                    if file_ext.lower() in extensions or file_name.lower() in files:
+                    # Translated welcome screens and translation files
+                    is_translation = (
+                        file_name.lower().startswith("chainlit_")
+                        and file_ext.lower() == ".md"
+                    ) or (
+                        file_ext.lower() == ".json"
+                        and os.path.dirname(file_path) == config_translation_dir
+                    )
+
+                    if (
+                        file_ext.lower() in extensions
+                        or file_name.lower() in files
+                        or is_translation
+                    ):
                         logger.info(
                             f"File {change_type.name}: {file_name}. Reloading app..."
                         )
@@ -103,6 +134,9 @@ async def lifespan(app: FastAPI):
                         except Exception as e:
                             logger.error(f"Error reloading config: {e}")
                             break
+                        finally:
+                            invalidate_html_shell()
+                            invalidate_project_settings()
 
                         # Reload the module if the module name is specified in the config
                         if config.run.module_name:
@@ -129,8 +163,21 @@ async def lifespan(app: FastAPI):
             except asyncio.exceptions.CancelledError:
                 pass
 
-        if FILES_DIRECTORY.is_dir():
-            shutil.rmtree(FILES_DIRECTORY)
+        # Let the background tasks (persistence, element uploads) complete
+        await task_supervisor.drain(timeout=config.project.shutdown_timeout)
+
+        if data_layer := get_data_layer():
+            try:
+                await data_layer.drain()
+            except Exception as e:
+                logger.error(f"Error while draining the data layer: {e}")
+
+        await close_http_client()
+        await close_provider_clients()
+
+        # The files directory is shared by the workers, the parent process removes it
+        if config.run.workers <= 1 and FILES_DIRECTORY.is_dir():
+            shutil.rmtree(FILES_DIRECTORY, ignore_errors=True)
 
         # Force exit the process to avoid potential AnyIO threads still running
         os._exit(0)
@@ -161,16 +208,17 @@ app = FastAPI(lifespan=lifespan)
 app.mount("/public", StaticFiles(directory="public", check_dir=False), name="public")
 app.mount(
     "/assets",
-    StaticFiles(
+    PrecompressedStaticFiles(
         packages=[("chainlit", os.path.join(build_dir, "assets"))],
         follow_symlink=config.project.follow_symlink,
+        hashed_files=load_hashed_files(build_dir, "assets/"),
     ),
     name="assets",
 )
 
 app.mount(
     "/copilot",
-    StaticFiles(
+    PrecompressedStaticFiles(
         packages=[("chainlit", copilot_build_dir)],
         follow_symlink=config.project.follow_symlink,
     ),
@@ -190,6 +238,7 @@ socket = SocketManager(
     app,
     cors_allowed_origins=[],
     async_mode="asgi",
+    client_manager=get_session_store().get_client_manager(),
 )
 
 
@@ -250,6 +299,26 @@ def get_html_template():
         return content
 
 
+_html_shell: Optional[PrecomputedResponse] = None
+
+
+def get_html_shell() -> PrecomputedResponse:
+    """Return the rendered HTML template, computed once per config version."""
+    global _html_shell
+    if _html_shell is None:
+        _html_shell = PrecomputedResponse(
+            content=get_html_template().encode("utf-8"),
+            media_type="text/html",
+        )
+    return _html_shell
+
+
+def invalidate_html_shell():
+    """Render the HTML template again on the next request, called when the config is reloaded."""
+    global _html_shell
+    _html_shell = None
+
+
 def get_user_facing_url(url: URL):
     """
     Return the user facing URL for a given URL.
@@ -309,7 +378,13 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 
 
 @app.post("/logout")
-async def logout(request: Request, response: Response):
+async def logout(
+    request: Request,
+    response: Response,
+    token: Optional[str] = Depends(reuseable_oauth),
+):
+    if token:
+        user_cache.invalidate(token)
     if config.code.on_logout:
         return await config.code.on_logout(request, response)
     return {"success": True}
@@ -487,6 +562,9 @@ async def generation(
         )
 
     trace_event("pp_create_completion")
+    if generation_cache := get_generation_cache():
+        return await generation_cache.create_completion(provider, request)
+
     response = await provider.create_completion(request)
 
     return response
@@ -503,12 +581,18 @@ async def get_providers(
     return JSONResponse(content={"providers": providers})
 
 
-@app.get("/project/settings")
-async def project_settings(
-    current_user: Annotated[Union[User, PersistedUser], Depends(get_current_user)],
-    language: str = Query(default="en-US", description="Language code"),
-):
-    """Return project settings. This is called by the UI before the establishing the websocket connection."""
+# Number of languages for which the project settings are kept
+PROJECT_SETTINGS_CACHE_SIZE = 32
+
+# Language -> settings shared by every user
+_project_settings: "OrderedDict[str, PrecomputedResponse]" = OrderedDict()
+
+
+def get_project_settings(language: str) -> PrecomputedResponse:
+    """Return the project settings without chat profiles, computed once per language and config version."""
+    if language in _project_settings:
+        _project_settings.move_to_end(language)
+        return _project_settings[language]
 
     # Load translation based on the provided language
     translation = config.load_translation(language)
@@ -516,23 +600,75 @@ async def project_settings(
     # Load the markdown file based on the provided language
     markdown = get_markdown_str(config.root, language)
 
+    content = {
+        "ui": config.ui.to_dict(),
+        "features": config.features.to_dict(),
+        "userEnv": config.project.user_env,
+        "dataPersistence": get_data_layer() is not None,
+        "threadResumable": bool(config.code.on_chat_resume),
+        "markdown": markdown,
+        "translation": translation,
+    }
+    settings = PrecomputedResponse(
+        content=dump_settings(content, chat_profiles=[]),
+        media_type="application/json",
+    )
+
+    _project_settings[language] = settings
+    if len(_project_settings) > PROJECT_SETTINGS_CACHE_SIZE:
+        _project_settings.popitem(last=False)
+    return settings
+
+
+def dump_settings(content: Dict, chat_profiles: List[Dict]) -> bytes:
+    # Chat profiles come last, so they can be replaced without parsing the settings
+    return json.dumps(
+        {**content, "chatProfiles": chat_profiles},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def with_chat_profiles(settings: bytes, chat_profiles: List[Dict]) -> bytes:
+    empty_profiles = b"[]}"
+    return (
+        settings[: -len(empty_profiles)]
+        + json.dumps(chat_profiles, ensure_ascii=False, separators=(",", ":")).encode(
+            "utf-8"
+        )
+        + b"}"
+    )
+
+
+def invalidate_project_settings():
+    """Compute the project settings again, called when the config is reloaded."""
+    _project_settings.clear()
+
+
+@app.get("/project/settings")
+async def project_settings(
+    request: Request,
+    current_user: Annotated[Union[User, PersistedUser], Depends(get_current_user)],
+    language: str = Query(default="en-US", description="Language code"),
+):
+    """Return project settings. This is called by the UI before the establishing the websocket connection."""
+    settings = get_project_settings(language)
+
     profiles = []
     if config.code.set_chat_profiles:
         chat_profiles = await config.code.set_chat_profiles(current_user)
         if chat_profiles:
             profiles = [p.to_dict() for p in chat_profiles]
-    return JSONResponse(
-        content={
-            "ui": config.ui.to_dict(),
-            "features": config.features.to_dict(),
-            "userEnv": config.project.user_env,
-            "dataPersistence": get_data_layer() is not None,
-            "threadResumable": bool(config.code.on_chat_resume),
-            "markdown": markdown,
-            "chatProfiles": profiles,
-            "translation": translation,
-        }
-    )
+
+    if not profiles:
+        return settings.to_response(request)
+
+    # Chat profiles depend on the user, only they are serialized per request
+    return PrecomputedResponse(
+        content=with_chat_profiles(settings.content, profiles),
+        media_type="application/json",
+        compress=False,
+    ).to_response(request)
 
 
 @app.put("/feedback")
@@ -632,6 +768,55 @@ async def delete_thread(
     return JSONResponse(content={"success": True})
 
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def get_upload_limits(
+    session: "WebsocketSession",
+) -> Tuple[Optional[int], Optional[int]]:
+    """Maximum size (in bytes) of a file and of all the files uploaded in the session."""
+    max_size = max_session_size = None
+    if multi_modal := config.features.multi_modal:
+        if multi_modal.max_size_mb:
+            max_size = multi_modal.max_size_mb * 1024 * 1024
+        if multi_modal.max_session_size_mb:
+            max_session_size = multi_modal.max_session_size_mb * 1024 * 1024
+    return max_size, max_session_size
+
+
+async def persist_upload(session: "WebsocketSession", file: UploadFile):
+    """
+    Stream an uploaded file to the session files directory, chunk by chunk.
+
+    The session limit is checked against the running total of the session uploads,
+    so concurrent uploads can't exceed it together.
+    """
+    from chainlit.session import FileTooLargeError
+
+    max_size, max_session_size = get_upload_limits(session)
+
+    async def read_chunks():
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+
+    try:
+        if max_size is not None and (file.size or 0) > max_size:
+            raise FileTooLargeError(max_size)
+        if max_session_size is not None:
+            remaining = max(max_session_size - session.files_size, 0)
+            if (file.size or 0) > remaining:
+                raise FileTooLargeError(remaining)
+        return await session.persist_file_stream(
+            name=file.filename or "",
+            mime=file.content_type or "",
+            chunks=read_chunks(),
+            max_size=max_size,
+            max_session_size=max_session_size,
+        )
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
 @app.post("/project/file")
 async def upload_file(
     session_id: str,
@@ -657,13 +842,7 @@ async def upload_file(
                 detail="You are not authorized to upload files for this session",
             )
 
-    session.files_dir.mkdir(exist_ok=True)
-
-    content = await file.read()
-
-    file_response = await session.persist_file(
-        name=file.filename, content=content, mime=file.content_type
-    )
+    file_response = await persist_upload(session, file)
 
     return JSONResponse(file_response)
 
@@ -698,13 +877,7 @@ async def asr_method(
                 detail="You are not authorized to upload files for this session",
             )
 
-    session.files_dir.mkdir(exist_ok=True)
-
-    content = await file.read()
-    mime = file.content_type
-    file_response = await session.persist_file(
-        name=file.filename, content=content, mime=mime
-    )
+    file_response = await persist_upload(session, file)
     content = await config.code.asr_method(file_response["absolute_path"])
 
     return JSONResponse({"content": content})
@@ -839,16 +1012,33 @@ async def serve_file(
         raise HTTPException(status_code=404, detail="File not found")
 
 
-@app.get("/favicon")
-async def get_favicon():
-    custom_favicon_path = os.path.join(APP_ROOT, "public", "favicon.*")
-    files = glob.glob(custom_favicon_path)
+def find_file(*patterns: str) -> Optional[str]:
+    """Return the first file matching one of the glob patterns, in order."""
+    for pattern in patterns:
+        files = glob.glob(pattern)
+        if files:
+            return files[0]
+    return None
 
-    if files:
-        favicon_path = files[0]
-    else:
-        favicon_path = os.path.join(build_dir, "favicon.svg")
 
+# Resolved once, the public folder and the UI build don't change while the app runs
+favicon_path = find_file(
+    os.path.join(APP_ROOT, "public", "favicon.*"),
+    os.path.join(build_dir, "favicon.svg"),
+)
+logo_paths = {
+    theme.value: find_file(
+        os.path.join(APP_ROOT, "public", f"logo_{theme.value}.*"),
+        os.path.join(build_dir, "assets", f"logo_{theme.value}*.*"),
+    )
+    for theme in Theme
+}
+
+
+@app.get("/favicon")
+async def get_favicon():
+    if not favicon_path:
+        raise HTTPException(status_code=404, detail="Missing default favicon")
     media_type, _ = mimetypes.guess_type(favicon_path)
 
     return FileResponse(favicon_path, media_type=media_type)
@@ -857,17 +1047,7 @@ async def get_favicon():
 @app.get("/logo")
 async def get_logo(theme: Optional[Theme] = Query(Theme.light)):
     theme_value = theme.value if theme else Theme.light.value
-    logo_path = None
-
-    for path in [
-        os.path.join(APP_ROOT, "public", f"logo_{theme_value}.*"),
-        os.path.join(build_dir, "assets", f"logo_{theme_value}*.*"),
-    ]:
-        files = glob.glob(path)
-
-        if files:
-            logo_path = files[0]
-            break
+    logo_path = logo_paths[theme_value]
 
     if not logo_path:
         raise HTTPException(status_code=404, detail="Missing default logo")
@@ -879,11 +1059,8 @@ async def get_logo(theme: Optional[Theme] = Query(Theme.light)):
 def register_wildcard_route_handler():
     @app.get("/{path:path}")
     async def serve(request: Request, path: str):
-        html_template = get_html_template()
         """Serve the UI files."""
-        response = HTMLResponse(content=html_template, status_code=200)
-
-        return response
+        return get_html_shell().to_response(request)
 
 
 import chainlit.socket  # noqa
@@ -1,10 +1,15 @@
+import asyncio
+import hashlib
 import json
 import mimetypes
 import shutil
 import uuid
+from pathlib import Path
 from typing import (
     TYPE_CHECKING,
     Any,
+    AsyncIterator,
+    Awaitable,
     Callable,
     Deque,
     Dict,
@@ -15,7 +20,10 @@ from typing import (
 )
 
 import aiofiles
+from chainlit.files import copy_file, get_blob_store, is_under_roots
 from chainlit.logger import logger
+from chainlit.outbound import OutboundEventQueue
+from chainlit.stream import TokenStreamCoalescer
 
 if TYPE_CHECKING:
     from chainlit.message import Message
@@ -26,6 +34,12 @@ if TYPE_CHECKING:
 ClientType = Literal["app", "copilot", "teams", "slack"]
 
 
+class FileTooLargeError(ValueError):
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"File exceeds the size limit of {max_size} bytes")
+
+
 class JSONEncoderIgnoreNonSerializable(json.JSONEncoder):
     def default(self, obj):
         try:
@@ -147,7 +161,7 @@ class WebsocketSession(BaseSession):
         # Associated socket id
         socket_id: str,
         # Function to emit to the client
-        emit: Callable[[str, Any], None],
+        emit: Callable[[str, Any], Awaitable[Any]],
         # Function to emit to the client and wait for a response
         emit_call: Callable[[Literal["ask", "call_fn"], Any, Optional[int]], Any],
         # User specific environment variables. Empty if no user environment variables are required.
@@ -164,6 +178,8 @@ class WebsocketSession(BaseSession):
         # Chat profile selected before the session was created
         chat_profile: Optional[str] = None,
     ):
+        from chainlit.config import config
+
         super().__init__(
             id=id,
             thread_id=thread_id,
@@ -184,6 +200,23 @@ class WebsocketSession(BaseSession):
 
         self.thread_queues = {}  # type: Dict[str, Deque[Callable]]
         self.files = {}  # type: Dict[str, "FileDict"]
+        # File id -> bytes received by the uploads in progress
+        self.uploading = {}  # type: Dict[str, int]
+
+        self.outbound = OutboundEventQueue(
+            # self.emit is replaced when the client reconnects
+            send=lambda event, data: self.emit(event, data),
+            max_size=config.project.outbound_queue_size,
+        )
+        self.token_stream = TokenStreamCoalescer(
+            emit=self.outbound.put,
+            interval=config.project.stream_flush_interval,
+            max_bytes=config.project.stream_flush_max_bytes,
+        )
+
+        # A snapshot save is requested / running
+        self._checkpoint_pending = False
+        self._checkpoint_running = False
 
         ws_sessions_id[self.id] = self
         ws_sessions_sid[socket_id] = self
@@ -201,6 +234,8 @@ class WebsocketSession(BaseSession):
         path: Optional[str] = None,
         content: Optional[Union[bytes, str]] = None,
     ) -> "FileReference":
+        from chainlit.config import config
+
         if not path and not content:
             raise ValueError(
                 "Either path or content must be provided to persist a file"
@@ -216,18 +251,22 @@ class WebsocketSession(BaseSession):
         if file_extension:
             file_path = file_path.with_suffix(file_extension)
 
-        if path:
-            # Copy the file from the given path
-            async with aiofiles.open(path, "rb") as src, aiofiles.open(
-                file_path, "wb"
-            ) as dst:
-                await dst.write(await src.read())
+        file_hash = None
+
+        if path and is_under_roots(path, config.project.file_reference_roots):
+            # Serve the file in place
+            file_path = Path(path).resolve()
+        elif path:
+            # Copy the file from the given path, without loading it in memory
+            await copy_file(path, file_path)
         elif content:
-            # Write the provided content to the file
-            async with aiofiles.open(file_path, "wb") as buffer:
-                if isinstance(content, str):
-                    content = content.encode("utf-8")
-                await buffer.write(content)
+            # Store the content once for all the sessions
+            if isinstance(content, str):
+                content = content.encode("utf-8")
+            loop = asyncio.get_running_loop()
+            file_hash = await loop.run_in_executor(
+                None, get_blob_store().add_bytes, content, file_path
+            )
 
         # Get the file size
         file_size = file_path.stat().st_size
@@ -238,6 +277,83 @@ class WebsocketSession(BaseSession):
             "name": name,
             "type": mime,
             "size": file_size,
+            "hash": file_hash,
+        }
+
+        return {"id": file_id, "absolute_path": str(file_path)}
+
+    @property
+    def files_size(self) -> int:
+        """Total size (in bytes) of the files persisted in the session and being uploaded."""
+        return sum(file["size"] for file in self.files.values()) + sum(
+            self.uploading.values()
+        )
+
+    async def persist_file_stream(
+        self,
+        name: str,
+        mime: str,
+        chunks: AsyncIterator[bytes],
+        max_size: Optional[int] = None,
+        max_session_size: Optional[int] = None,
+    ) -> "FileReference":
+        """
+        Write a file received by chunks, without holding it in memory.
+
+        The content hash is computed while writing. Raise a FileTooLargeError
+        (and remove the partial file) once more than `max_size` bytes are received,
+        or once the session files, concurrent uploads included, exceed `max_session_size` bytes.
+        """
+        self.files_dir.mkdir(exist_ok=True)
+
+        file_id = str(uuid.uuid4())
+
+        file_path = self.files_dir / file_id
+
+        file_extension = mimetypes.guess_extension(mime)
+        if file_extension:
+            file_path = file_path.with_suffix(file_extension)
+
+        blob_store = get_blob_store()
+        temp_path = blob_store.temp_path()
+        file_hash = hashlib.sha256()
+        file_size = 0
+
+        self.uploading[file_id] = 0
+        try:
+            async with aiofiles.open(temp_path, "wb") as buffer:
+                async for chunk in chunks:
+                    file_size += len(chunk)
+                    self.uploading[file_id] = file_size
+                    if max_size is not None and file_size > max_size:
+                        raise FileTooLargeError(max_size)
+                    if (
+                        max_session_size is not None
+                        and self.files_size > max_session_size
+                    ):
+                        raise FileTooLargeError(
+                            max(max_session_size - (self.files_size - file_size), 0)
+                        )
+                    file_hash.update(chunk)
+                    await buffer.write(chunk)
+            # Store the content once for all the sessions
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None, blob_store.add_file, temp_path, file_hash.hexdigest(), file_path
+            )
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        finally:
+            del self.uploading[file_id]
+
+        self.files[file_id] = {
+            "id": file_id,
+            "path": file_path,
+            "name": name,
+            "type": mime,
+            "size": file_size,
+            "hash": file_hash.hexdigest(),
         }
 
         return {"id": file_id, "absolute_path": str(file_path)}
@@ -249,13 +365,130 @@ class WebsocketSession(BaseSession):
         self.socket_id = new_socket_id
         self.restored = True
 
+    def to_snapshot(self) -> Dict:
+        """Serializable state of the session, used to restore it on another worker."""
+        from chainlit.user_session import user_sessions
+
+        user = None
+        if self.user:
+            user = {"type": self.user.__class__.__name__, **self.user.to_dict()}
+
+        return {
+            "id": self.id,
+            "socket_id": self.socket_id,
+            "thread_id": self.thread_id,
+            "thread_id_to_resume": self.thread_id_to_resume,
+            "client_type": self.client_type,
+            "user": user,
+            # The token is not stored, the client sends it again when reconnecting
+            "user_env": self.user_env,
+            "chat_profile": self.chat_profile,
+            "chat_settings": clean_metadata(self.chat_settings),
+            "has_first_interaction": self.has_first_interaction,
+            "user_session": clean_metadata(user_sessions.get(self.id) or {}),
+        }
+
+    async def save_snapshot(self):
+        """Save the snapshot of the session in the session store."""
+        from chainlit.config import config
+        from chainlit.session_store import get_session_store
+
+        try:
+            await get_session_store().set(
+                self.id, self.to_snapshot(), ttl=config.project.session_timeout
+            )
+        except Exception as e:
+            logger.error(f"Error while saving the session snapshot: {e}")
+
+    def checkpoint(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        Save the snapshot of the session in the background, if the store is shared by workers.
+
+        Lets a client reconnecting to another worker restore the session before it disconnected
+        from this one. Checkpoints requested while a save runs are coalesced in the next save.
+        """
+        from chainlit.session_store import get_session_store
+        from chainlit.tasks import task_supervisor
+
+        if not get_session_store().shared:
+            return
+
+        self._checkpoint_pending = True
+        if not self._checkpoint_running:
+            self._checkpoint_running = True
+            task_supervisor.spawn(self._save_checkpoints(), "persistence", loop)
+
+    async def _save_checkpoints(self):
+        try:
+            while self._checkpoint_pending:
+                self._checkpoint_pending = False
+                await self.save_snapshot()
+        finally:
+            self._checkpoint_running = False
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        snapshot: Dict,
+        socket_id: str,
+        emit: Callable[[str, Any], Awaitable[Any]],
+        emit_call: Callable[[Literal["ask", "call_fn"], Any, Optional[int]], Any],
+        token: Optional[str] = None,
+    ) -> "WebsocketSession":
+        """Rebuild a session from a snapshot taken by another worker."""
+        from chainlit.user import PersistedUser, User
+        from chainlit.user_session import user_sessions
+
+        user = None  # type: Optional[Union[User, PersistedUser]]
+        if user_dict := snapshot.get("user"):
+            user_dict = dict(user_dict)
+            user_cls = (
+                PersistedUser if user_dict.pop("type") == "PersistedUser" else User
+            )
+            user = user_cls(**user_dict)
+
+        session = cls(
+            id=snapshot["id"],
+            socket_id=socket_id,
+            emit=emit,
+            emit_call=emit_call,
+            user_env=snapshot.get("user_env") or {},
+            client_type=snapshot["client_type"],
+            thread_id=snapshot.get("thread_id"),
+            user=user,
+            token=token,
+            chat_profile=snapshot.get("chat_profile"),
+        )
+        session.thread_id_to_resume = snapshot.get("thread_id_to_resume")
+        session.chat_settings = snapshot.get("chat_settings") or {}
+        session.has_first_interaction = snapshot.get("has_first_interaction", False)
+        session.restored = True
+        user_sessions[session.id] = snapshot.get("user_session") or {}
+
+        return session
+
+    def raise_if_stopped(self):
+        """Throws an InterruptedError if the user asked to stop the current task."""
+        if self.should_stop:
+            self.should_stop = False
+            raise InterruptedError("Task stopped by user")
+
     def delete(self):
-        """Delete the session."""
-        if self.files_dir.is_dir():
-            shutil.rmtree(self.files_dir)
+        """Delete the session. The session files are removed by delete_files."""
+        self.token_stream.clear()
+        self.outbound.close()
         ws_sessions_sid.pop(self.socket_id, None)
         ws_sessions_id.pop(self.id, None)
 
+    def delete_files(self):
+        """Delete the session files. Blocking, should be run in a thread."""
+        if self.files_dir.is_dir():
+            shutil.rmtree(self.files_dir, ignore_errors=True)
+        # Collect the stored contents no other session references
+        get_blob_store().release(
+            file["hash"] for file in self.files.values() if file.get("hash")
+        )
+
     async def flush_method_queue(self):
         for method_name, queue in self.thread_queues.items():
             while queue:
@@ -0,0 +1,111 @@
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+from chainlit.logger import logger
+
+
+class SessionStore(ABC):
+    """
+    Base class for the storage of session snapshots shared between workers.
+
+    Live session objects (socket, emit functions, tasks) stay in the worker owning the connection.
+    The store only holds the serializable state needed to restore a session on another worker.
+    Snapshots are saved when the client disconnects and, with a store shared by the workers,
+    at checkpoints (user session updates, end of a message). Changes made after the last
+    checkpoint of a worker that crashes are lost.
+    """
+
+    # Whether the snapshots are visible to the other workers
+    shared = False
+
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[Dict]:
+        pass
+
+    @abstractmethod
+    async def set(self, session_id: str, snapshot: Dict, ttl: Optional[int] = None):
+        pass
+
+    @abstractmethod
+    async def delete(self, session_id: str):
+        pass
+
+    def get_client_manager(self) -> Any:
+        """Socket.io client manager used to reach sockets connected to other workers."""
+        return None
+
+
+class InMemorySessionStore(SessionStore):
+    """Process local store, used when a single worker serves the app."""
+
+    def __init__(self):
+        # Session id -> (snapshot, expiration timestamp)
+        self._snapshots: Dict[str, Tuple[Dict, Optional[float]]] = {}
+
+    async def get(self, session_id: str) -> Optional[Dict]:
+        if entry := self._snapshots.get(session_id):
+            snapshot, expires_at = entry
+            if expires_at is None or expires_at > time.monotonic():
+                return snapshot
+            self._snapshots.pop(session_id, None)
+        return None
+
+    async def set(self, session_id: str, snapshot: Dict, ttl: Optional[int] = None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._snapshots[session_id] = (snapshot, expires_at)
+
+    async def delete(self, session_id: str):
+        self._snapshots.pop(session_id, None)
+
+
+class RedisSessionStore(SessionStore):
+    """Store backed by any server speaking the Redis protocol, shared by all the workers."""
+
+    shared = True
+
+    def __init__(self, url: str, prefix: str = "chainlit:session:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise ValueError(
+                "The redis package is required to use a Redis session store. Run `pip install redis`."
+            )
+
+        self.url = url
+        self.prefix = prefix
+        self.client = redis.from_url(url)
+        logger.info("Redis session store initialized")
+
+    async def get(self, session_id: str) -> Optional[Dict]:
+        raw = await self.client.get(self.prefix + session_id)
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    async def set(self, session_id: str, snapshot: Dict, ttl: Optional[int] = None):
+        await self.client.set(
+            self.prefix + session_id, json.dumps(snapshot, ensure_ascii=False), ex=ttl
+        )
+
+    async def delete(self, session_id: str):
+        await self.client.delete(self.prefix + session_id)
+
+    def get_client_manager(self):
+        import socketio
+
+        return socketio.AsyncRedisManager(self.url)
+
+
+_session_store: SessionStore
+
+if redis_url := os.environ.get("CHAINLIT_REDIS_URL"):
+    _session_store = RedisSessionStore(url=redis_url)
+else:
+    _session_store = InMemorySessionStore()
+
+
+def get_session_store() -> SessionStore:
+    return _session_store
@@ -1,6 +1,4 @@
-import asyncio
 import json
-import time
 import uuid
 from typing import Any, Dict, Literal
 
@@ -11,22 +9,79 @@ from chainlit.context import init_ws_context
 from chainlit.data import get_data_layer
 from chainlit.logger import logger
 from chainlit.message import ErrorMessage, Message
+from chainlit.reaper import Reaper
 from chainlit.server import socket
 from chainlit.session import WebsocketSession
+from chainlit.session_store import get_session_store
+from chainlit.sync import make_async
 from chainlit.telemetry import trace_event
 from chainlit.types import UIMessagePayload
 from chainlit.user_session import user_sessions
 
+# Delay (in seconds) after which the app stops waiting for a client sync acknowledgement
+CLIENT_SYNC_TIMEOUT = 30
 
-def restore_existing_session(sid, session_id, emit_fn, emit_call_fn):
+
+async def restore_existing_session(sid, session_id, emit_fn, emit_call_fn, user, token):
     """Restore a session from the sessionId provided by the client."""
     if session := WebsocketSession.get_by_id(session_id):
+        session_reaper.cancel(session.id)
         session.restore(new_socket_id=sid)
         session.emit = emit_fn
         session.emit_call = emit_call_fn
         trace_event("session_restored")
         return True
-    return False
+
+    if not session_id:
+        return False
+
+    # The session might have been created by another worker
+    try:
+        snapshot = await get_session_store().get(session_id)
+    except Exception as e:
+        logger.error(f"Error while loading the session snapshot: {e}")
+        return False
+
+    if not snapshot:
+        return False
+
+    snapshot_user = snapshot.get("user")
+    if user and (not snapshot_user or snapshot_user["identifier"] != user.identifier):
+        return False
+
+    WebsocketSession.from_snapshot(snapshot, sid, emit_fn, emit_call_fn, token)
+    trace_event("session_restored")
+    return True
+
+
+async def clear_session(session: WebsocketSession):
+    # Clean up the user session
+    if session.id in user_sessions:
+        user_sessions.pop(session.id)
+    # Clean up the session
+    session.delete()
+    await make_async(session.delete_files)()
+    await delete_session_snapshot(session)
+
+
+async def expire_session(session_id: str):
+    if session := WebsocketSession.get_by_id(session_id):
+        await clear_session(session)
+
+
+# Clear the sessions still disconnected once the session timeout elapsed
+session_reaper = Reaper(expire=expire_session)
+
+
+async def delete_session_snapshot(session: WebsocketSession):
+    try:
+        store = get_session_store()
+        snapshot = await store.get(session.id)
+        # Another worker might own the session now
+        if snapshot and snapshot.get("socket_id") == session.socket_id:
+            await store.delete(session.id)
+    except Exception as e:
+        logger.error(f"Error while deleting the session snapshot: {e}")
 
 
 async def persist_user_session(thread_id: str, metadata: Dict):
@@ -75,6 +130,37 @@ def load_user_env(user_env):
     return user_env
 
 
+def create_emit_fn(sid, client_sync: bool):
+    """
+    Session scoped function to emit to the client.
+
+    Clients supporting it acknowledge a sync event every `client_sync_interval` events,
+    the emitter waits for it so that the events don't pile up in the transport.
+    """
+    sent_count = 0
+
+    async def emit_fn(event, data):
+        nonlocal sent_count
+        # The socket is connected to this worker, don't go through the message queue
+        await socket.emit(event, data, to=sid, ignore_queue=True)
+
+        interval = config.project.client_sync_interval
+        if not client_sync or interval <= 0:
+            return
+        sent_count += 1
+        if sent_count >= interval:
+            sent_count = 0
+            try:
+                # Events are handled in order, the ack comes once the previous ones are handled
+                await socket.call(
+                    "sync", None, timeout=CLIENT_SYNC_TIMEOUT, to=sid, ignore_queue=True
+                )
+            except Exception as e:
+                logger.debug(f"Client {sid} did not acknowledge the sync: {e!r}")
+
+    return emit_fn
+
+
 def build_anon_user_identifier(environ):
     scope = environ.get("asgi.scope", {})
     client_ip, _ = scope.get("client")
@@ -111,24 +197,16 @@ async def connect(sid, environ, auth):
         logger.info("Authentication failed")
         return False
 
-    # Session scoped function to emit to the client
-    def emit_fn(event, data):
-        if session := WebsocketSession.get(sid):
-            if session.should_stop:
-                session.should_stop = False
-                raise InterruptedError("Task stopped by user")
-        return socket.emit(event, data, to=sid)
+    emit_fn = create_emit_fn(sid, environ.get("HTTP_X_CHAINLIT_CLIENT_SYNC") == "true")
 
     # Session scoped function to emit to the client and wait for a response
     def emit_call_fn(event: Literal["ask", "call_fn", "gather_command"], data, timeout):
-        if session := WebsocketSession.get(sid):
-            if session.should_stop:
-                session.should_stop = False
-                raise InterruptedError("Task stopped by user")
-        return socket.call(event, data, timeout=timeout, to=sid)
+        return socket.call(event, data, timeout=timeout, to=sid, ignore_queue=True)
 
     session_id = environ.get("HTTP_X_CHAINLIT_SESSION_ID")
-    if restore_existing_session(sid, session_id, emit_fn, emit_call_fn):
+    if await restore_existing_session(
+        sid, session_id, emit_fn, emit_call_fn, user, token
+    ):
         return True
 
     user_env_string = environ.get("HTTP_USER_ENV")
@@ -195,22 +273,16 @@ async def disconnect(sid, force_clear=False):
     if session and session.thread_id and session.has_first_interaction:
         await persist_user_session(session.thread_id, session.to_persistable())
 
-    def clear():
-        if session := WebsocketSession.get(sid):
-            # Clean up the user session
-            if session.id in user_sessions:
-                user_sessions.pop(session.id)
-            # Clean up the session
-            session.delete()
-
-    async def clear_on_timeout(sid):
-        await asyncio.sleep(config.project.session_timeout)
-        clear()
+    if not session:
+        return
 
     if force_clear:
-        clear()
+        session_reaper.cancel(session.id)
+        await clear_session(session)
     else:
-        asyncio.ensure_future(clear_on_timeout(sid))
+        # Allow the client to reconnect to another worker
+        await session.save_snapshot()
+        session_reaper.schedule(session.id, config.project.session_timeout)
 
 
 @socket.on("stop")
@@ -237,8 +309,6 @@ async def process_message(session: WebsocketSession, payload: UIMessagePayload):
         message = await context.emitter.process_user_message(payload)
 
         if config.code.on_message:
-            # Sleep 1ms to make sure any children step starts after the message step start
-            time.sleep(0.001)
             await config.code.on_message(message)
     except InterruptedError:
         pass
@@ -249,6 +319,7 @@ async def process_message(session: WebsocketSession, payload: UIMessagePayload):
         ).send()
     finally:
         await context.emitter.task_end()
+        session.checkpoint()
 
 
 @socket.on("ui_message")
@@ -0,0 +1,113 @@
+import json
+import mimetypes
+import os
+import stat
+from typing import Iterable, Optional, Set
+
+import anyio
+from chainlit.http_cache import select_encoding
+from chainlit.logger import logger
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+# Written by vite at the root of a build (build.manifest option)
+VITE_MANIFEST = "manifest.json"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Extension of the precompressed sibling of a file, per encoding
+PRECOMPRESSED_EXTENSIONS = {"br": ".br", "gzip": ".gz"}
+
+
+def load_hashed_files(build_dir: str, prefix: str = "") -> Set[str]:
+    """
+    Files of a build whose name holds a content hash, read from its vite manifest.
+
+    Only the files under `prefix` are returned, relative to it. Names can't be told
+    apart from the file name alone (e.g. react-markdown.js), so nothing is hashed
+    without a manifest.
+    """
+    manifest_path = os.path.join(build_dir, VITE_MANIFEST)
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return set()
+    except (OSError, ValueError) as e:
+        logger.warning(f"Failed to read {manifest_path}: {e}")
+        return set()
+
+    hashed_files = set()
+    for chunk in manifest.values():
+        for file in (
+            [chunk.get("file")] + chunk.get("css", []) + chunk.get("assets", [])
+        ):
+            if file and file.startswith(prefix):
+                hashed_files.add(file[len(prefix) :])
+    return hashed_files
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    Static files served along with their precompressed siblings.
+
+    A request accepting brotli or gzip gets `<file>.br` or `<file>.gz` if it exists
+    (created when building the UI). Files with a hashed name (`hashed_files`, paths relative
+    to the mount) never change and are cached by browsers for a year, other files are revalidated.
+    """
+
+    def __init__(self, *args, hashed_files: Iterable[str] = (), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hashed_files = set(hashed_files)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await self.get_precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = (
+                IMMUTABLE_CACHE_CONTROL
+                if path in self.hashed_files
+                else REVALIDATE_CACHE_CONTROL
+            )
+            response.headers["Vary"] = "Accept-Encoding"
+
+        return response
+
+    async def get_precompressed_response(
+        self, path: str, scope: Scope
+    ) -> Optional[Response]:
+        if scope["method"] not in ("GET", "HEAD"):
+            return None
+
+        request_headers = Headers(scope=scope)
+        accept_encoding = request_headers.get("accept-encoding")
+
+        # Encodings in order of preference
+        for encoding, extension in PRECOMPRESSED_EXTENSIONS.items():
+            if not select_encoding(accept_encoding, [encoding]):
+                continue
+
+            full_path, stat_result = await anyio.to_thread.run_sync(
+                self.lookup_path, path + extension
+            )
+            if not stat_result or not stat.S_ISREG(stat_result.st_mode):
+                continue
+
+            media_type, _ = mimetypes.guess_type(path)
+            response = FileResponse(
+                full_path,
+                stat_result=stat_result,
+                method=scope["method"],
+                media_type=media_type or "application/octet-stream",
+                headers={"Content-Encoding": encoding},
+            )
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+            return response
+
+        return None
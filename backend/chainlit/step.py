@@ -1,21 +1,21 @@
 import asyncio
 import inspect
 import json
-import time
 import uuid
 from functools import wraps
 from typing import Callable, Dict, List, Optional, TypedDict, Union
 
+from chainlit.clock import next_sequence, utc_now
 from chainlit.config import config
 from chainlit.context import context, local_steps
 from chainlit.data import get_data_layer
 from chainlit.element import Element
 from chainlit.extensions.types import MessageSpec
 from chainlit.logger import logger
+from chainlit.tasks import task_supervisor
 from chainlit.telemetry import trace_event
 from chainlit.types import FeedbackDict
 from literalai import BaseGeneration
-from literalai.helper import utc_now
 from literalai.step import StepType, TrueStepType
 
 
@@ -41,6 +41,8 @@ class StepDict(TypedDict, total=False):
     indent: Optional[int]
     feedback: Optional[FeedbackDict]
     speechContent: Optional[str]
+    # Monotonic sequence used to order steps, see chainlit.clock
+    sequence: Optional[int]
 
 
 def step(
@@ -141,6 +143,7 @@ class Step:
     metadata: Dict
     thread_id: str
     created_at: Union[str, None]
+    sequence: int
     start: Union[str, None]
     end: Union[str, None]
     generation: Optional[BaseGeneration]
@@ -161,7 +164,6 @@ class Step:
         show_input: Union[bool, str] = False,
     ):
         trace_event(f"init {self.__class__.__name__} {type}")
-        time.sleep(0.001)
         self._input = ""
         self._output = ""
         self.thread_id = context.session.thread_id
@@ -179,6 +181,7 @@ class Step:
         self.generation = None
         self.elements = elements or []
 
+        self.sequence = next_sequence()
         self.created_at = utc_now()
         self.start = None
         self.end = None
@@ -237,6 +240,7 @@ class Step:
             "isError": self.is_error,
             "output": self.output,
             "createdAt": self.created_at,
+            "sequence": self.sequence,
             "start": self.start,
             "end": self.end,
             "language": self.language,
@@ -259,7 +263,9 @@ class Step:
 
         if data_layer:
             try:
-                asyncio.create_task(data_layer.update_step(step_dict.copy()))
+                task_supervisor.spawn(
+                    data_layer.update_step(step_dict.copy()), "persistence"
+                )
             except Exception as e:
                 if self.fail_on_persist_error:
                     raise e
@@ -289,7 +295,7 @@ class Step:
 
         if data_layer:
             try:
-                asyncio.create_task(data_layer.delete_step(self.id))
+                task_supervisor.spawn(data_layer.delete_step(self.id), "persistence")
             except Exception as e:
                 if self.fail_on_persist_error:
                     raise e
@@ -315,7 +321,9 @@ class Step:
 
         if data_layer:
             try:
-                asyncio.create_task(data_layer.create_step(step_dict.copy()))
+                task_supervisor.spawn(
+                    data_layer.create_step(step_dict.copy()), "persistence"
+                )
                 self.persisted = True
             except Exception as e:
                 if self.fail_on_persist_error:
@@ -415,7 +423,8 @@ class Step:
         context.active_steps.append(self)
         local_steps.set(previous_steps + [self])
 
-        asyncio.create_task(self.send())
+        # Sent in order with the update of __exit__
+        context.step_events.send(self)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -428,4 +437,4 @@ class Step:
             local_active_steps.remove(self)
             local_steps.set(local_active_steps)
 
-        asyncio.create_task(self.update())
+        context.step_events.update(self)
@@ -0,0 +1,95 @@
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypedDict
+
+from chainlit.logger import logger
+
+
+class TokenDict(TypedDict):
+    id: str
+    token: str
+    isSequence: bool
+
+
+class TokenStreamCoalescer:
+    """
+    Buffer the tokens streamed to a session and send them in batches.
+
+    Tokens are grouped by step id and sent to the UI as a single `stream_tokens` event,
+    either once the flush interval elapsed or once the buffered tokens reach the size threshold.
+    Any other event emitted to the session should flush the buffer first to keep the ordering.
+    """
+
+    def __init__(
+        self,
+        # Function to emit to the client
+        emit: Callable[[str, Any], Any],
+        # Delay (in seconds) during which tokens are buffered. Tokens are sent right away if <= 0
+        interval: float,
+        # Size (in bytes) of the buffered tokens triggering an immediate flush
+        max_bytes: int,
+    ):
+        self.emit = emit
+        self.interval = interval
+        self.max_bytes = max_bytes
+
+        # Step id -> (token chunks, is_sequence). Dicts keep the insertion order.
+        self._buffer: Dict[str, Tuple[List[str], bool]] = {}
+        self._size = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional["asyncio.Task"] = None
+
+    async def push(self, id: str, token: str, is_sequence=False):
+        """Buffer a token and flush the buffer if needed."""
+        if is_sequence or id not in self._buffer:
+            # A sequence replaces whatever was streamed before for this step
+            self._buffer[id] = ([token], is_sequence)
+        else:
+            self._buffer[id][0].append(token)
+
+        self._size += len(token.encode("utf-8"))
+
+        if self.interval <= 0 or self._size >= self.max_bytes:
+            await self.flush()
+        elif not self._timer:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.interval, self._flush_on_timer
+            )
+
+    async def flush(self):
+        """Send the buffered tokens to the UI."""
+        self._cancel_timer()
+
+        if not self._buffer:
+            return
+
+        batch: List[TokenDict] = [
+            {"id": id, "token": "".join(chunks), "isSequence": is_sequence}
+            for id, (chunks, is_sequence) in self._buffer.items()
+        ]
+        self._buffer = {}
+        self._size = 0
+
+        await self.emit("stream_tokens", batch)
+
+    def clear(self):
+        """Drop the buffered tokens."""
+        self._cancel_timer()
+        self._buffer = {}
+        self._size = 0
+
+    def _cancel_timer(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush_on_timer(self):
+        self._timer = None
+
+        async def flush():
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error while flushing streamed tokens: {e}")
+
+        # Keep a reference to the task so it is not garbage collected
+        self._flush_task = asyncio.ensure_future(flush())
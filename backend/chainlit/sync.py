@@ -10,6 +10,7 @@ import asyncio
 import threading
 
 from asyncer import asyncify
+from chainlit.config import config
 from chainlit.context import context_var
 from syncer import sync
 
@@ -32,6 +33,23 @@ def run_sync(co: Coroutine[Any, Any, T_Retval]) -> T_Retval:
         context_var.set(current_context)
         return await co
 
+    if config.run.loop == "uvloop":
+        # uvloop can't be re entered, the coroutine has to be dispatched from another thread
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is current_context.loop:
+            co.close()
+            raise RuntimeError(
+                "run_sync can't be called from the event loop thread with uvloop. "
+                "Await the coroutine or call run_sync from a thread (see make_async)."
+            )
+        result = asyncio.run_coroutine_threadsafe(
+            context_preserving_coroutine(), loop=current_context.loop
+        )
+        return result.result()
+
     # Execute from the main thread in the main event loop
     if threading.current_thread() == threading.main_thread():
         return sync(context_preserving_coroutine())
@@ -0,0 +1,133 @@
+import asyncio
+from collections import Counter
+from typing import Any, Coroutine, Dict, Optional, Set
+
+from chainlit.logger import logger
+
+# Maximum number of tasks running concurrently per category, None for no limit
+DEFAULT_LIMITS: Dict[str, Optional[int]] = {
+    # Data layer writes
+    "persistence": 20,
+    # Element uploads
+    "elements": 10,
+    # Steps sent and updated from sync code and framework callbacks
+    "callbacks": 100,
+    # Prompt playground completions streamed from the LLM providers
+    "generations": 20,
+    # Completions relayed to the prompt playground responses, bounded by the requests
+    "streams": None,
+    # Idle LLM clients of the prompt playground being closed
+    "clients": 10,
+}
+
+
+class TaskSupervisor:
+    """
+    Run the fire and forget tasks of the app.
+
+    Tasks are grouped in categories, each running a bounded number of tasks at a time
+    (unless its limit is None).
+    Only the concurrency is bounded: tasks waiting for a slot are not limited in number.
+    The supervisor keeps a reference to every task (so none is garbage collected mid flight),
+    logs their exceptions and waits for them on shutdown.
+    """
+
+    def __init__(self, limits: Dict[str, Optional[int]]):
+        self.limits = limits
+
+        self._tasks: Set["asyncio.Task"] = set()
+        # Semaphores are created in the running loop
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        # Metrics
+        self.spawned_count: Counter = Counter()
+        self.failed_count: Counter = Counter()
+
+    @property
+    def pending(self) -> int:
+        """Number of tasks running or waiting to run."""
+        return len(self._tasks)
+
+    def spawn(
+        self,
+        co: Coroutine[Any, Any, Any],
+        category: str,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> Optional["asyncio.Task"]:
+        """
+        Schedule a coroutine in the given category.
+
+        Can be called from any thread given the loop. Return the task, or None if the task
+        is created later in the loop thread.
+        """
+        if category not in self.limits:
+            raise ValueError(f"Unknown task category {category}")
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        loop = loop or running_loop
+        if loop is None:
+            raise RuntimeError("No event loop to spawn the task in")
+
+        if loop is not running_loop:
+            # Creating a task is not thread safe
+            loop.call_soon_threadsafe(self._create_task, co, category, loop)
+            return None
+        return self._create_task(co, category, loop)
+
+    def _create_task(
+        self,
+        co: Coroutine[Any, Any, Any],
+        category: str,
+        loop: asyncio.AbstractEventLoop,
+    ) -> "asyncio.Task":
+        task = loop.create_task(self._run(co, category))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        # No op if the coroutine ran, avoids a warning if the task was cancelled before it started
+        task.add_done_callback(lambda _: co.close())
+        self.spawned_count[category] += 1
+        return task
+
+    async def drain(self, timeout: float):
+        """Wait for the pending tasks, cancelling the ones still running after `timeout` seconds."""
+        if not self._tasks:
+            return
+
+        logger.info(f"Waiting for {len(self._tasks)} background tasks")
+        done, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+
+        if pending:
+            logger.warning(
+                f"{len(pending)} background tasks did not complete within {timeout}s, cancelling them"
+            )
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def _get_semaphore(self, category: str) -> Optional[asyncio.Semaphore]:
+        limit = self.limits[category]
+        if limit is None:
+            return None
+        if category not in self._semaphores:
+            self._semaphores[category] = asyncio.Semaphore(limit)
+        return self._semaphores[category]
+
+    async def _run(self, co: Coroutine[Any, Any, Any], category: str):
+        try:
+            semaphore = self._get_semaphore(category)
+            if semaphore is None:
+                return await co
+            async with semaphore:
+                return await co
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed_count[category] += 1
+            logger.exception(f"Background task ({category}) failed: {e}")
+
+
+task_supervisor = TaskSupervisor(limits=DEFAULT_LIMITS)
@@ -80,6 +80,8 @@ class FileDict(TypedDict):
     path: str
     size: int
     type: str
+    # SHA-256 of the content
+    hash: Optional[str]
 
 
 class UIMessagePayload(TypedDict):
@@ -1,6 +1,7 @@
 from typing import Dict
 
 from chainlit.context import context
+from chainlit.session import WebsocketSession
 
 user_sessions: Dict[str, Dict] = {}
 
@@ -43,5 +44,8 @@ class UserSession:
         user_session = user_sessions[context.session.id]
         user_session[key] = value
 
+        if isinstance(context.session, WebsocketSession):
+            context.session.checkpoint(context.loop)
+
 
 user_session = UserSession()
@@ -0,0 +1,59 @@
+"""
+Microbenchmark of the answer prefix detection of the LangChain callback handler.
+
+Compare AnswerPrefixMatcher with the comparison of the last tokens it replaced,
+on a streamed answer whose prefix comes after a long reasoning.
+
+Run from the backend directory: python tests/bench_answer_prefix.py [--tokens 2000]
+"""
+
+import argparse
+import timeit
+from typing import List
+
+from chainlit.langchain.callbacks import AnswerPrefixMatcher
+from test_answer_prefix import DEFAULT_TOKENS, legacy_detect
+
+
+def make_stream(tokens: int) -> List[str]:
+    words = ["Thought", ":", " I", " should", " look", " it", " up", ".", "\n"]
+    stream = [words[index % len(words)] for index in range(tokens)]
+    return stream + ["Final", "Answer", ":", " Paris"]
+
+
+def matcher_detect(stream: List[str], strip_tokens: bool) -> bool:
+    matcher = AnswerPrefixMatcher(DEFAULT_TOKENS, strip_tokens)
+    for token in stream:
+        if matcher.feed(token):
+            return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    stream = make_stream(args.tokens)
+    for strip_tokens in (True, False):
+        assert legacy_detect(DEFAULT_TOKENS, strip_tokens, stream)
+        assert matcher_detect(stream, strip_tokens)
+
+        for name, detect in (
+            (
+                "last tokens",
+                lambda: legacy_detect(DEFAULT_TOKENS, strip_tokens, stream),
+            ),
+            ("matcher", lambda: matcher_detect(stream, strip_tokens)),
+        ):
+            seconds = min(timeit.repeat(detect, number=1, repeat=args.repeat))
+            per_token = seconds / len(stream) * 1e6
+            print(
+                f"strip_tokens={strip_tokens!s:<5} {name:<12} "
+                f"{seconds * 1e3:8.3f} ms  {per_token:6.3f} us/token"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+import os
+import shutil
+import tempfile
+
+# chainlit creates its config (.chainlit) and upload (.files) directories in the working
+# directory on import, run the tests from a temporary app root
+APP_ROOT = tempfile.mkdtemp(prefix="chainlit-tests-")
+
+
+def pytest_sessionstart(session):
+    os.chdir(APP_ROOT)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(APP_ROOT, ignore_errors=True)
@@ -0,0 +1,83 @@
+from typing import List
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from chainlit.langchain.callbacks import AnswerPrefixMatcher  # noqa: E402
+
+DEFAULT_TOKENS = ["Final", "Answer", ":"]
+
+
+def legacy_detect(
+    answer_prefix_tokens: List[str], strip_tokens: bool, stream: List[str]
+) -> bool:
+    """Detection before AnswerPrefixMatcher: compare the last tokens of the stream."""
+    if strip_tokens:
+        answer_tokens = [token.strip() for token in answer_prefix_tokens]
+    else:
+        answer_tokens = answer_prefix_tokens
+    last_tokens = [""] * len(answer_prefix_tokens)
+
+    for token in stream:
+        last_tokens.append(token.strip() if strip_tokens else token)
+        last_tokens.pop(0)
+        if last_tokens == answer_tokens or any(
+            all(answer_token in last_token for answer_token in answer_tokens)
+            for last_token in last_tokens
+        ):
+            return True
+    return False
+
+
+def detect(answer_prefix_tokens: List[str], strip_tokens: bool, stream: List[str]):
+    matcher = AnswerPrefixMatcher(answer_prefix_tokens, strip_tokens)
+    return any([matcher.feed(token) for token in stream])
+
+
+STREAMS = {
+    "single token": ["Final Answer: Paris"],
+    "single token with thought": ["Thought: done\nFinal Answer: Paris"],
+    "split tokens": ["Thought", ":", " done", "\n", "Final", " Answer", ":", " Paris"],
+    "exact tokens": ["Final", "Answer", ":", " Paris"],
+    "no answer": ["Thought", ":", " I", " need", " an", " answer", "."],
+}
+
+
+@pytest.mark.parametrize("strip_tokens", [True, False])
+@pytest.mark.parametrize("name", STREAMS)
+def test_detects_what_the_last_tokens_comparison_detected(name, strip_tokens):
+    stream = STREAMS[name]
+    if legacy_detect(DEFAULT_TOKENS, strip_tokens, stream):
+        assert detect(DEFAULT_TOKENS, strip_tokens, stream)
+    if name == "no answer":
+        assert not detect(DEFAULT_TOKENS, strip_tokens, stream)
+
+
+@pytest.mark.parametrize("name", ["single token", "split tokens"])
+def test_spaces_are_kept_without_strip(name):
+    stream = STREAMS[name]
+    assert legacy_detect(["Final", " Answer", ":"], False, stream) == detect(
+        ["Final", " Answer", ":"], False, stream
+    )
+    assert detect(DEFAULT_TOKENS, False, stream)
+    # White spaces are significant
+    assert not detect(DEFAULT_TOKENS, False, ["Final\nAnswer : Paris"])
+    assert detect(DEFAULT_TOKENS, True, ["Final\nAnswer : Paris"])
+
+
+def test_prefix_split_within_tokens():
+    stream = ["Fin", "al Ans", "wer", ": Paris"]
+    assert not legacy_detect(DEFAULT_TOKENS, True, stream)
+    assert detect(DEFAULT_TOKENS, True, stream)
+    assert detect(DEFAULT_TOKENS, False, stream)
+
+
+def test_partial_prefix_is_not_detected():
+    matcher = AnswerPrefixMatcher(DEFAULT_TOKENS, True)
+    assert not matcher.feed("Final")
+    assert not matcher.feed(" Answers")
+    assert not matcher.feed(" are")
+    assert matcher.feed(" Final Answer:")
+    # Stays found
+    assert matcher.feed("Paris")
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from chainlit.cache import ResultCache, cache, make_key
+
+
+def test_make_key_handles_unhashable_arguments():
+    assert make_key(([1, 2],), {"a": {"b": 1}}) == make_key(([1, 2],), {"a": {"b": 1}})
+    assert make_key((1,), {"a": 1, "b": 2}) == make_key((1,), {"b": 2, "a": 1})
+
+
+def test_results_are_evicted_in_lru_order():
+    results = ResultCache(max_size=2, ttl=None)
+    results.set("a", 1)
+    results.set("b", 2)
+    assert results.get("a") == (True, 1)
+    results.set("c", 3)
+
+    assert results.get("b") == (False, None)
+    assert results.get("a") == (True, 1)
+    assert results.stats()["evictions"] == 1
+
+
+def test_results_expire_after_ttl():
+    results = ResultCache(max_size=2, ttl=0.01)
+    results.set("a", 1)
+    time.sleep(0.02)
+    assert results.get("a") == (False, None)
+
+
+def test_sync_calls_share_one_computation():
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    @cache
+    def compute(x):
+        calls.append(x)
+        started.set()
+        release.wait()
+        return x * 2
+
+    outputs = []
+    threads = [
+        threading.Thread(target=lambda: outputs.append(compute(2))) for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    started.wait()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [2]
+    assert outputs == [4] * 4
+    assert compute.cache_stats()["misses"] == 1
+
+
+def test_failed_sync_computation_is_retried_one_at_a_time():
+    results = ResultCache(max_size=8, ttl=None)
+    running = 0
+    max_running = 0
+    attempts = []
+    counter_lock = threading.Lock()
+
+    def compute():
+        nonlocal running, max_running
+        with counter_lock:
+            running += 1
+            max_running = max(max_running, running)
+            attempts.append(1)
+            failing = len(attempts) == 1
+        time.sleep(0.05)
+        with counter_lock:
+            running -= 1
+        if failing:
+            raise ValueError("boom")
+        return "ok"
+
+    outputs = []
+
+    def call():
+        try:
+            outputs.append(results.call(compute, "key", (), {}))
+        except ValueError:
+            outputs.append("error")
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    threads[0].start()
+    time.sleep(0.01)
+    threads[1].start()
+    # Waits for the lock of the failed computation to be dropped
+    time.sleep(0.06)
+    threads[2].start()
+    for thread in threads:
+        thread.join()
+
+    assert max_running == 1
+    assert len(attempts) == 2
+    assert sorted(outputs) == ["error", "ok", "ok"]
+    assert results._key_locks == {}
+    assert results._key_lock_users == {}
+
+
+def test_async_calls_share_one_computation():
+    calls = []
+
+    @cache
+    async def compute(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return x * 2
+
+    async def main():
+        return await asyncio.gather(*[compute(3) for _ in range(4)])
+
+    assert asyncio.run(main()) == [6] * 4
+    assert calls == [3]
+
+
+def test_async_failures_are_not_cached():
+    attempts = []
+
+    @cache
+    async def compute():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ValueError("boom")
+        return "ok"
+
+    async def main():
+        with pytest.raises(ValueError):
+            await compute()
+        return await compute()
+
+    assert asyncio.run(main()) == "ok"
+    assert len(attempts) == 2
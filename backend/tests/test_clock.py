@@ -0,0 +1,59 @@
+import threading
+from unittest import mock
+
+from chainlit.clock import (
+    HybridLogicalClock,
+    sequence_to_utc,
+    utc_now,
+    utc_to_sequence,
+)
+
+
+def test_ticks_increase_when_the_wall_clock_stalls():
+    clock = HybridLogicalClock()
+    with mock.patch("chainlit.clock.time.time_ns", return_value=5_000_000):
+        assert [clock.tick() for _ in range(3)] == [5000, 5001, 5002]
+
+
+def test_ticks_increase_when_the_wall_clock_goes_back():
+    clock = HybridLogicalClock()
+    with mock.patch("chainlit.clock.time.time_ns", return_value=9_000_000):
+        first = clock.tick()
+    with mock.patch("chainlit.clock.time.time_ns", return_value=1_000_000):
+        assert clock.tick() == first + 1
+
+
+def test_ticks_are_unique_across_threads():
+    clock = HybridLogicalClock()
+    ticks = []
+
+    def run():
+        ticks.extend(clock.tick() for _ in range(1000))
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(ticks)) == 4000
+
+
+def test_sequence_round_trip():
+    sequence = 1_700_000_000_123_456
+    timestamp = sequence_to_utc(sequence)
+    assert timestamp.endswith("Z")
+    assert utc_to_sequence(timestamp) == sequence
+
+
+def test_invalid_timestamps():
+    assert utc_to_sequence(None) == 0
+    assert utc_to_sequence("not a date") == 0
+
+
+def test_utc_now_is_ordered():
+    timestamps = [utc_now() for _ in range(100)]
+    assert len(set(timestamps)) == 100
+    assert [utc_to_sequence(t) for t in timestamps] == sorted(
+        utc_to_sequence(t) for t in timestamps
+    )
@@ -0,0 +1,198 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+from chainlit.dispatch import StepEventBridge
+from chainlit.tasks import task_supervisor
+
+
+class FakeStep:
+    def __init__(self, id, events, delay=0.0, parent_id=None):
+        self.id = id
+        self.events = events
+        self.delay = delay
+        self.parent_id = parent_id
+
+    async def _record(self, event):
+        await asyncio.sleep(self.delay)
+        self.events.append((self.id, event))
+
+    async def send(self):
+        await self._record("send")
+
+    async def update(self):
+        await self._record("update")
+
+    async def stream_token(self, token):
+        await self._record(token)
+
+
+def run_bridge(push_events):
+    async def main():
+        bridge = StepEventBridge(SimpleNamespace(loop=asyncio.get_running_loop()))
+        push_events(bridge)
+        # Let the drain callback run
+        await asyncio.sleep(0)
+        await task_supervisor.drain(timeout=1)
+        return bridge
+
+    return asyncio.run(main())
+
+
+def test_events_of_a_step_run_in_order():
+    events = []
+    step = FakeStep("a", events, delay=0.001)
+
+    def push_events(bridge):
+        bridge.send(step)
+        for token in ["Hello", " world"]:
+            bridge.stream_token(step, token)
+        bridge.update(step)
+
+    bridge = run_bridge(push_events)
+
+    assert events == [("a", "send"), ("a", "Hello"), ("a", " world"), ("a", "update")]
+    assert bridge._pending == {}
+
+
+def test_waiting_updates_are_coalesced():
+    events = []
+    step = FakeStep("a", events, delay=0.001)
+
+    def push_events(bridge):
+        bridge.send(step)
+        for _ in range(5):
+            bridge.update(step)
+
+    run_bridge(push_events)
+
+    assert events == [("a", "send"), ("a", "update")]
+
+
+def test_unrelated_steps_run_independently():
+    events = []
+    slow = FakeStep("slow", events, delay=0.05)
+    fast = FakeStep("fast", events)
+
+    def push_events(bridge):
+        bridge.send(slow)
+        bridge.send(fast)
+        bridge.update(fast)
+
+    run_bridge(push_events)
+
+    assert events == [("fast", "send"), ("fast", "update"), ("slow", "send")]
+
+
+def test_children_wait_for_their_parent_to_be_sent():
+    events = []
+    parent = FakeStep("parent", events, delay=0.05)
+    child = FakeStep("child", events, parent_id="parent")
+    grandchild = FakeStep("grandchild", events, parent_id="child")
+    sibling = FakeStep("sibling", events)
+
+    def push_events(bridge):
+        bridge.send(parent)
+        bridge.update(parent)
+        bridge.send(child)
+        bridge.stream_token(grandchild, "Hello")
+        bridge.update(child)
+        bridge.send(sibling)
+
+    bridge = run_bridge(push_events)
+
+    assert events[0] == ("sibling", "send")
+    assert events.index(("parent", "send")) < events.index(("child", "send"))
+    assert events.index(("child", "send")) < events.index(("grandchild", "Hello"))
+    # The parent update doesn't hold the child
+    assert events.index(("child", "update")) < events.index(("parent", "update"))
+    assert bridge._pending == bridge._waiting == {}
+    assert not bridge._unsent
+
+
+def test_children_of_a_sent_parent_do_not_wait():
+    events = []
+    parent = FakeStep("parent", events, delay=0.05)
+    child = FakeStep("child", events, parent_id="parent")
+
+    def push_events(bridge):
+        bridge.update(parent)
+        bridge.send(child)
+
+    run_bridge(push_events)
+
+    assert events == [("child", "send"), ("parent", "update")]
+
+
+def test_events_pushed_from_threads():
+    events = []
+    steps = [FakeStep(str(index), events) for index in range(4)]
+
+    def push_events(bridge):
+        def callback(step):
+            bridge.send(step)
+            for index in range(10):
+                bridge.stream_token(step, str(index))
+
+        threads = [threading.Thread(target=callback, args=(s,)) for s in steps]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    run_bridge(push_events)
+
+    for step in steps:
+        assert [event for id, event in events if id == step.id] == ["send"] + [
+            str(index) for index in range(10)
+        ]
+
+
+def test_failed_event_does_not_stop_the_step():
+    events = []
+    step = FakeStep("a", events)
+
+    async def fail():
+        raise ValueError("boom")
+
+    step.send = fail
+
+    def push_events(bridge):
+        bridge.send(step)
+        bridge.update(step)
+
+    run_bridge(push_events)
+
+    assert events == [("a", "update")]
+
+
+def test_sync_step_send_and_update_are_ordered():
+    from chainlit.context import init_http_context
+    from chainlit.step import Step
+
+    events = []
+
+    async def send(self):
+        # Yields to the loop, an independent update could overtake it
+        await asyncio.sleep(0.01)
+        events.append((self.name, "send"))
+
+    async def update(self):
+        events.append((self.name, "update"))
+
+    async def main():
+        init_http_context()
+        with mock.patch.object(Step, "send", send), mock.patch.object(
+            Step, "update", update
+        ):
+            for name in ["a", "b"]:
+                with Step(name=name):
+                    pass
+            await asyncio.sleep(0)
+            await task_supervisor.drain(timeout=1)
+
+    asyncio.run(main())
+
+    assert events.index(("a", "send")) < events.index(("a", "update"))
+    assert events.index(("b", "send")) < events.index(("b", "update"))
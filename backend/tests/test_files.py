@@ -0,0 +1,140 @@
+import os
+from contextlib import ExitStack
+from pathlib import Path
+from unittest import mock
+
+import chainlit.files as files
+import pytest
+from chainlit.files import BlobStore, copy_file_sync, is_under_roots
+
+
+def make_store(tmp_path: Path):
+    sessions = tmp_path / "sessions"
+    sessions.mkdir()
+    return BlobStore(root=tmp_path / ".blobs"), sessions
+
+
+def test_identical_contents_are_stored_once(tmp_path):
+    store, sessions = make_store(tmp_path)
+
+    first = store.add_bytes(b"content", sessions / "a.txt")
+    second = store.add_bytes(b"content", sessions / "b.pdf")
+    other = store.add_bytes(b"other", sessions / "c.txt")
+
+    assert first == second != other
+    assert (sessions / "a.txt").read_bytes() == b"content"
+    assert (sessions / "b.pdf").read_bytes() == b"content"
+    assert store.stats() == {
+        "blobs": 2,
+        "references": 3,
+        "stored_bytes": len(b"content") + len(b"other"),
+        "referenced_bytes": 2 * len(b"content") + len(b"other"),
+    }
+
+
+def test_add_file_moves_the_temporary_file(tmp_path):
+    store, sessions = make_store(tmp_path)
+    file_hash = store.add_bytes(b"content", sessions / "a.txt")
+
+    temp_path = store.temp_path()
+    temp_path.write_bytes(b"content")
+    store.add_file(temp_path, file_hash, sessions / "b.txt")
+
+    assert not temp_path.exists()
+    assert (sessions / "b.txt").read_bytes() == b"content"
+    assert store.stats()["blobs"] == 1
+
+
+def test_session_files_are_writable(tmp_path):
+    store, sessions = make_store(tmp_path)
+    store.add_bytes(b"content", sessions / "a.txt")
+    store.add_bytes(b"content", sessions / "b.txt")
+
+    assert os.access(sessions / "a.txt", os.W_OK)
+    # Replacing a session file leaves the other sessions untouched
+    (sessions / "new.txt").write_bytes(b"edited")
+    os.replace(sessions / "new.txt", sessions / "a.txt")
+
+    assert (sessions / "a.txt").read_bytes() == b"edited"
+    assert (sessions / "b.txt").read_bytes() == b"content"
+    assert store.stats()["references"] == 1
+
+
+def test_blobs_are_released_once_unreferenced(tmp_path):
+    store, sessions = make_store(tmp_path)
+    file_hash = store.add_bytes(b"content", sessions / "a.txt")
+    store.add_bytes(b"content", sessions / "b.txt")
+
+    (sessions / "a.txt").unlink()
+    store.release([file_hash])
+    assert store.blob_path(file_hash).exists()
+
+    (sessions / "b.txt").unlink()
+    store.release([file_hash])
+    assert not store.blob_path(file_hash).exists()
+
+
+def test_collect(tmp_path):
+    store, sessions = make_store(tmp_path)
+    store.add_bytes(b"kept", sessions / "a.txt")
+    store.add_bytes(b"dropped", sessions / "b.txt")
+    (sessions / "b.txt").unlink()
+
+    assert store.collect() == 1
+    assert store.stats()["blobs"] == 1
+
+
+def test_copy_file_sync(tmp_path):
+    src = tmp_path / "src.bin"
+    src.write_bytes(b"x" * 3_000_000)
+    dst = tmp_path / "dst.bin"
+
+    copy_file_sync(src, dst)
+
+    assert dst.read_bytes() == src.read_bytes()
+
+
+def failing(*args, **kwargs):
+    raise OSError("Not supported")
+
+
+def partial_copy_file_range(src_fd, dst_fd, count):
+    # Writes some bytes, then fails: the next strategy starts over
+    os.write(dst_fd, b"garbage")
+    raise OSError("Not supported")
+
+
+@pytest.mark.parametrize(
+    "strategy,disabled",
+    [
+        ("copy_file_range", {}),
+        ("sendfile", {"copy_file_range": partial_copy_file_range}),
+        ("chunked", {"copy_file_range": failing, "sendfile": failing}),
+    ],
+)
+def test_copy_file_sync_fallbacks(tmp_path, strategy, disabled):
+    if strategy != "chunked" and not hasattr(os, strategy):
+        pytest.skip(f"{strategy} is not available")
+
+    src = tmp_path / "src.bin"
+    src.write_bytes(os.urandom(300_000))
+    dst = tmp_path / "dst.bin"
+
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(files, "_reflink", return_value=False))
+        stack.enter_context(mock.patch.object(files.os, "link", failing))
+        stack.enter_context(mock.patch.object(files, "COPY_CHUNK_SIZE", 1024))
+        for name, function in disabled.items():
+            stack.enter_context(mock.patch.object(files.os, name, function))
+        assert copy_file_sync(src, dst) == strategy
+
+    assert dst.read_bytes() == src.read_bytes()
+    assert not os.path.samefile(src, dst)
+
+
+def test_is_under_roots(tmp_path):
+    root = tmp_path / "allowed"
+    root.mkdir()
+    assert is_under_roots(root / "file.txt", [str(root)])
+    assert not is_under_roots(tmp_path / "other.txt", [str(root)])
+    assert not is_under_roots(root / ".." / "other.txt", [str(root)])
@@ -0,0 +1,177 @@
+import asyncio
+import sqlite3
+import time
+from unittest import mock
+
+import pytest
+from chainlit.playground.cache import (
+    GenerationCache,
+    SQLiteGenerationStore,
+    generation_cache_key,
+)
+from chainlit.tasks import task_supervisor
+from chainlit.types import GenerationRequest
+from fastapi.responses import StreamingResponse
+from literalai import ChatGeneration, CompletionGeneration
+
+
+class FakeProvider:
+    id = "fake"
+
+    def __init__(self, parts, delay=0.0):
+        self.parts = parts
+        self.delay = delay
+        self.calls = 0
+
+    def validate_env(self, request):
+        return request.userEnv
+
+    async def create_completion(self, request):
+        self.calls += 1
+
+        async def stream():
+            for part in self.parts:
+                await asyncio.sleep(self.delay)
+                yield part
+
+        return StreamingResponse(stream())
+
+
+def chat_request(content, user_env=None) -> GenerationRequest:
+    return GenerationRequest(
+        chatGeneration=ChatGeneration(
+            messages=[{"role": "user", "content": content}], settings={"model": "m"}
+        ),
+        userEnv=user_env or {},
+    )
+
+
+async def read(response: StreamingResponse) -> str:
+    body = b""
+    async for part in response.body_iterator:
+        body += part.encode() if isinstance(part, str) else part
+    return body.decode()
+
+
+def test_key_ignores_surrounding_whitespace():
+    provider = FakeProvider([])
+    assert generation_cache_key(provider, chat_request(" hi ")) == generation_cache_key(
+        provider, chat_request("hi")
+    )
+    assert generation_cache_key(
+        provider, chat_request("hi", {"KEY": "a"})
+    ) != generation_cache_key(provider, chat_request("hi", {"KEY": "b"}))
+
+
+def test_key_handles_multimodal_content():
+    provider = FakeProvider([])
+    image = {"type": "image_url", "image_url": "https://x/cat.png"}
+    text = {"type": "text", "text": "what is this?"}
+
+    key = generation_cache_key(provider, chat_request([text, image]))
+    assert key == generation_cache_key(provider, chat_request([text, image]))
+    assert key != generation_cache_key(provider, chat_request([image, text]))
+    assert key != generation_cache_key(provider, chat_request("what is this?"))
+
+
+def test_key_handles_completion_requests():
+    provider = FakeProvider([])
+    request = GenerationRequest(
+        completionGeneration=CompletionGeneration(prompt=" hi "), userEnv={}
+    )
+    assert generation_cache_key(provider, request)
+
+
+def test_completions_are_replayed():
+    async def main():
+        cache = GenerationCache(ttl=60, path=None)
+        provider = FakeProvider(["Hello", " world"])
+
+        first = await read(await cache.create_completion(provider, chat_request("hi")))
+        second = await read(await cache.create_completion(provider, chat_request("hi")))
+        return cache, provider, first, second
+
+    cache, provider, first, second = asyncio.run(main())
+    assert first == second == "Hello world"
+    assert provider.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_concurrent_requests_are_collapsed():
+    async def main():
+        cache = GenerationCache(ttl=60, path=None)
+        provider = FakeProvider(["a", "b", "c"], delay=0.01)
+
+        async def request():
+            return await read(
+                await cache.create_completion(provider, chat_request("hi"))
+            )
+
+        return cache, provider, await asyncio.gather(*[request() for _ in range(3)])
+
+    cache, provider, completions = asyncio.run(main())
+    assert completions == ["abc"] * 3
+    assert provider.calls == 1
+    assert cache.stats()["collapsed"] == 2
+
+
+def test_split_utf8_characters_are_decoded():
+    encoded = "héllo €".encode()
+    # Split in the middle of the multi-byte characters
+    parts = [encoded[:2], encoded[2:8], encoded[8:]]
+
+    async def main():
+        cache = GenerationCache(ttl=60, path=None)
+        provider = FakeProvider(parts)
+        streamed = await read(
+            await cache.create_completion(provider, chat_request("hi"))
+        )
+        # Let the upstream consumer store the completion
+        await asyncio.sleep(0)
+        return streamed, await cache.get(
+            generation_cache_key(provider, chat_request("hi"))
+        )
+
+    streamed, cached = asyncio.run(main())
+    assert streamed == cached == "héllo €"
+
+
+def test_streams_are_not_capped_with_the_generations():
+    async def main():
+        cache = GenerationCache(ttl=60, path=None)
+        provider = FakeProvider(["a"])
+        spawned = task_supervisor.spawned_count.copy()
+        await read(await cache.create_completion(provider, chat_request("hi")))
+        return task_supervisor.spawned_count - spawned
+
+    assert asyncio.run(main()) == {"streams": 1}
+
+
+def test_waiting_requests_are_released_if_the_stream_is_cancelled():
+    async def main():
+        cache = GenerationCache(ttl=60, path=None)
+        provider = FakeProvider(["a"])
+        response = await cache.create_completion(provider, chat_request("hi"))
+        # Cancelled before it started, e.g. on shutdown
+        for task in list(task_supervisor._tasks):
+            task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await read(response)
+        # The next request doesn't wait for the cancelled one
+        response = await cache.create_completion(provider, chat_request("hi"))
+        assert await read(response) == "a"
+        return provider
+
+    assert asyncio.run(main()).calls == 2
+
+
+def test_expired_completions_are_deleted_from_the_store(tmp_path):
+    path = str(tmp_path / "generations.db")
+    store = SQLiteGenerationStore(path)
+    store.set("old", "completion", ttl=60)
+    with mock.patch.object(time, "time", return_value=time.time() + 61):
+        store.set("new", "completion", ttl=60)
+
+    keys = sqlite3.connect(path).execute("SELECT key FROM generations").fetchall()
+    assert keys == [("new",)]
@@ -0,0 +1,104 @@
+import asyncio
+import uuid
+from typing import Optional
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from chainlit.context import init_http_context  # noqa: E402
+from chainlit.langchain.callbacks import LangchainTracer  # noqa: E402
+from langchain.schema import Generation, LLMResult  # noqa: E402
+
+
+def make_tracer(**kwargs) -> LangchainTracer:
+    context = init_http_context()
+    context.step_events = mock.Mock()
+    return LangchainTracer(**kwargs)
+
+
+def start_chain(tracer: LangchainTracer, parent: Optional[uuid.UUID] = None):
+    run_id = uuid.uuid4()
+    tracer.on_chain_start(
+        {"name": "chain"}, {"input": "hi"}, run_id=run_id, parent_run_id=parent
+    )
+    return run_id
+
+
+def start_llm(tracer: LangchainTracer, parent: Optional[uuid.UUID] = None):
+    run_id = uuid.uuid4()
+    tracer.on_llm_start({"name": "llm"}, ["hi"], run_id=run_id, parent_run_id=parent)
+    return run_id
+
+
+def test_run_tree_is_released_when_its_root_ends():
+    async def main():
+        tracer = make_tracer()
+        root = start_chain(tracer)
+        child = start_chain(tracer, parent=root)
+
+        tracer.on_chain_end({"output": "done"}, run_id=child)
+        assert tracer.memory_usage()["runs"] == 2
+
+        tracer.on_chain_end({"output": "done"}, run_id=root)
+        usage = tracer.memory_usage()
+        assert usage["runs"] == usage["run_trees"] == 0
+        assert not any(usage["entries"].values())
+        # The steps were updated before being released
+        assert tracer.context.step_events.update.call_count == 2
+
+    asyncio.run(main())
+
+
+def test_run_tree_is_released_when_its_root_fails():
+    async def main():
+        tracer = make_tracer()
+        root = start_chain(tracer)
+        start_chain(tracer, parent=root)
+
+        tracer.on_chain_error(ValueError("failed"), run_id=root)
+        assert tracer.memory_usage()["runs"] == 0
+        assert str(root) not in tracer.run_map
+
+    asyncio.run(main())
+
+
+def test_interrupted_run_trees_are_evicted():
+    async def main():
+        tracer = make_tracer(max_tracked_runs=3)
+        interrupted = start_chain(tracer)
+        start_chain(tracer, parent=interrupted)
+
+        active = start_chain(tracer)
+        start_chain(tracer, parent=active)
+
+        # The least recently active tree is dropped once beyond the limit
+        assert list(tracer.run_trees) == [str(active)]
+        assert tracer.memory_usage()["runs"] == 2
+        assert str(interrupted) not in tracer.steps
+
+    asyncio.run(main())
+
+
+def test_child_of_a_dropped_tree_still_streams():
+    async def main():
+        tracer = make_tracer(max_tracked_runs=2, stream_final_answer=True)
+        root = start_chain(tracer)
+        llm = start_llm(tracer, parent=root)
+
+        other = start_chain(tracer)
+        start_chain(tracer, parent=other)
+        assert str(llm) not in tracer.run_roots
+
+        for token in ["Final", "Answer", ":", " Paris"]:
+            tracer.on_llm_new_token(token, run_id=llm)
+        tracer.on_llm_end(
+            LLMResult(generations=[[Generation(text="Final Answer: Paris")]]),
+            run_id=llm,
+        )
+
+        assert tracer.has_streamed_final_answer
+        assert tracer.context.step_events.stream_token.call_count == 1
+
+    asyncio.run(main())
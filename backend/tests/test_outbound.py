@@ -0,0 +1,125 @@
+import asyncio
+from unittest import mock
+
+from chainlit.config import config
+from chainlit.outbound import OutboundEventQueue
+
+
+def test_events_are_sent_in_order():
+    sent = []
+
+    async def send(event, data):
+        await asyncio.sleep(0)
+        sent.append((event, data))
+
+    async def main():
+        queue = OutboundEventQueue(send=send, max_size=10)
+        for i in range(5):
+            await queue.put("new_message", {"id": str(i)})
+        await queue.drain()
+        assert queue.depth == 0
+
+    asyncio.run(main())
+
+    assert sent == [("new_message", {"id": str(i)}) for i in range(5)]
+
+
+def test_pending_updates_are_merged():
+    sent = []
+    release = None
+
+    async def send(event, data):
+        await release.wait()
+        sent.append((event, data))
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        queue = OutboundEventQueue(send=send, max_size=10)
+        await queue.put("new_message", {"id": "a"})
+        await queue.put("update_message", {"id": "b", "content": "1"})
+        await queue.put("new_message", {"id": "c"})
+        await queue.put("update_message", {"id": "b", "content": "2"})
+        release.set()
+        await queue.drain()
+        assert queue.merged_count == 1
+
+    asyncio.run(main())
+
+    # The merged update keeps its place in the queue
+    assert sent == [
+        ("new_message", {"id": "a"}),
+        ("update_message", {"id": "b", "content": "2"}),
+        ("new_message", {"id": "c"}),
+    ]
+
+
+def test_producers_wait_when_full():
+    release = None
+
+    async def send(event, data):
+        await release.wait()
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        queue = OutboundEventQueue(send=send, max_size=2)
+        await queue.put("new_message", {"id": "a"})
+        await queue.put("new_message", {"id": "b"})
+
+        blocked = asyncio.ensure_future(queue.put("new_message", {"id": "c"}))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+
+        release.set()
+        await asyncio.wait_for(blocked, 1)
+        await queue.drain()
+        assert queue.peak_depth == 2
+
+    asyncio.run(main())
+
+
+def test_close_releases_producers():
+    async def send(event, data):
+        await asyncio.Event().wait()
+
+    async def main():
+        queue = OutboundEventQueue(send=send, max_size=1)
+        await queue.put("new_message", {"id": "a"})
+        blocked = asyncio.ensure_future(queue.put("new_message", {"id": "b"}))
+        await asyncio.sleep(0.01)
+        queue.close()
+        await asyncio.wait_for(blocked, 1)
+        assert queue.depth == 0
+
+    asyncio.run(main())
+
+
+def test_emitter_waits_for_client_sync():
+    from chainlit.socket import create_emit_fn, socket
+
+    calls = []
+
+    async def emit(event, data, to, ignore_queue):
+        assert ignore_queue
+        calls.append(event)
+
+    async def call(event, data, timeout, to, ignore_queue):
+        assert ignore_queue
+        calls.append(event)
+
+    async def main():
+        with mock.patch.object(socket._sio, "emit", emit), mock.patch.object(
+            socket._sio, "call", call
+        ), mock.patch.object(config.project, "client_sync_interval", 2):
+            emit_fn = create_emit_fn("sid", client_sync=True)
+            for _ in range(5):
+                await emit_fn("new_message", {})
+
+            legacy_emit_fn = create_emit_fn("sid", client_sync=False)
+            await legacy_emit_fn("new_message", {})
+            await legacy_emit_fn("new_message", {})
+
+    asyncio.run(main())
+
+    assert calls == ["new_message", "new_message", "sync"] * 2 + ["new_message"] * 3
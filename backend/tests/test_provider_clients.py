@@ -0,0 +1,97 @@
+import asyncio
+from unittest import mock
+
+import chainlit.playground.provider as provider_module
+from chainlit.playground.provider import (
+    BaseProvider,
+    ProviderClientCache,
+    close_provider_clients,
+)
+
+
+class FakeClient:
+    def __init__(self, **settings):
+        self.settings = settings
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_provider() -> BaseProvider:
+    return BaseProvider(id="fake", name="Fake", env_vars={}, inputs=[], is_chat=True)
+
+
+def test_clients_are_not_shared_between_user_credentials():
+    cache = ProviderClientCache(max_size=8, idle_timeout=60)
+    provider = make_provider()
+
+    with mock.patch.object(provider_module, "provider_clients", cache):
+        alice = provider.get_client(FakeClient, api_key="alice")
+        bob = provider.get_client(FakeClient, api_key="bob")
+        assert alice is not bob
+        assert bob.settings == {"api_key": "bob"}
+        assert provider.get_client(FakeClient, api_key="alice") is alice
+
+
+def test_idle_clients_are_closed():
+    clock = Clock()
+
+    async def main():
+        cache = ProviderClientCache(max_size=8, idle_timeout=60)
+        idle = cache.get(("idle",), FakeClient)
+        clock.now = 30
+        used = cache.get(("used",), FakeClient)
+
+        clock.now = 61
+        assert cache.get(("used",), FakeClient) is used
+        await asyncio.sleep(0)
+        assert idle.closed and not used.closed
+        # A new client is created once the previous one is closed
+        assert cache.get(("idle",), FakeClient) is not idle
+
+    with mock.patch.object(provider_module.time, "monotonic", clock):
+        asyncio.run(main())
+
+
+def test_evicted_clients_are_closed_once_idle():
+    clock = Clock()
+
+    async def main():
+        cache = ProviderClientCache(max_size=1, idle_timeout=60)
+        evicted = cache.get(("first",), FakeClient)
+        kept = cache.get(("second",), FakeClient)
+
+        # May still be streaming a response
+        clock.now = 30
+        cache.get(("second",), FakeClient)
+        await asyncio.sleep(0)
+        assert not evicted.closed
+
+        clock.now = 60
+        cache.get(("second",), FakeClient)
+        await asyncio.sleep(0)
+        assert evicted.closed and not kept.closed
+
+    with mock.patch.object(provider_module.time, "monotonic", clock):
+        asyncio.run(main())
+
+
+def test_close_provider_clients_closes_every_client():
+    cache = ProviderClientCache(max_size=1, idle_timeout=60)
+    evicted = cache.get(("first",), FakeClient)
+    kept = cache.get(("second",), FakeClient)
+
+    with mock.patch.object(provider_module, "provider_clients", cache):
+        asyncio.run(close_provider_clients())
+
+    assert evicted.closed and kept.closed
+    assert cache.get(("second",), FakeClient) is not kept
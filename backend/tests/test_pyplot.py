@@ -0,0 +1,103 @@
+import asyncio
+from unittest import mock
+
+import chainlit.element as element
+import pytest
+from chainlit.context import init_http_context
+from chainlit.element import Pyplot, render_figure
+from chainlit.sync import make_async
+
+matplotlib = pytest.importorskip("matplotlib")
+matplotlib.use("Agg")
+from matplotlib.figure import Figure  # noqa: E402
+
+
+def make_figure(values=(1, 2, 3)) -> Figure:
+    figure = Figure(figsize=(2, 2))
+    figure.add_subplot().plot(list(values))
+    return figure
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    element._pyplot_cache.clear()
+    element._pyplot_cache_bytes = 0
+    yield
+    element._pyplot_cache.clear()
+    element._pyplot_cache_bytes = 0
+
+
+def test_default_dpi_is_kept_for_every_size():
+    async def main():
+        init_http_context()
+        figure = make_figure()
+        expected = render_figure(figure, 200, "png")
+        for size in ("small", "medium", "large"):
+            # Sync code runs in a thread, the figure is rendered on the spot
+            pyplot = await make_async(Pyplot)(figure=figure, size=size)
+            assert pyplot.content == expected
+        assert (await Pyplot.render(figure, size="small")).content == expected
+
+    asyncio.run(main())
+
+
+def test_auto_dpi_follows_the_size():
+    async def main():
+        init_http_context()
+        figure = make_figure()
+        small = await make_async(Pyplot)(figure=figure, size="small", dpi="auto")
+        assert small.content == render_figure(figure, 100, "png")
+
+    asyncio.run(main())
+
+
+def test_figures_are_rendered_off_the_loop_when_sent():
+    async def main():
+        init_http_context()
+        figure = make_figure()
+        pyplot = Pyplot(figure=figure, size="small", dpi="auto")
+        assert pyplot.content is None
+
+        with mock.patch.object(element.Element, "_create", return_value=True):
+            with mock.patch.object(
+                element, "render_figure", wraps=render_figure
+            ) as render:
+                await pyplot._create()
+
+        assert render.call_args.args == (figure, 100, "png")
+        assert pyplot.content == render_figure(figure, 100, "png")
+
+    asyncio.run(main())
+
+
+def test_figures_are_cached_until_modified():
+    figure = make_figure()
+    first = render_figure(figure, 100, "png")
+    assert render_figure(figure, 100, "png") is first
+    assert render_figure(figure, 200, "png") is not first
+
+    figure.axes[0].plot([3, 2, 1])
+    modified = render_figure(figure, 100, "png")
+    assert modified != first
+    assert render_figure(figure, 100, "png") is modified
+
+    # Another figure never matches, even once the first one is collected
+    assert render_figure(make_figure(), 100, "png") is not modified
+
+
+def test_cache_is_bounded_by_size():
+    sizes = []
+    for index in range(5):
+        sizes.append(len(render_figure(make_figure((index, 0)), 100, "png")))
+
+    with mock.patch.object(element, "PYPLOT_CACHE_MAX_BYTES", sum(sizes[:2]) + 1):
+        element._pyplot_cache.clear()
+        element._pyplot_cache_bytes = 0
+        for index in range(5):
+            render_figure(make_figure((index, 0)), 100, "png")
+
+        assert element._pyplot_cache_bytes <= element.PYPLOT_CACHE_MAX_BYTES
+        assert element._pyplot_cache_bytes == sum(
+            len(content) for _, content in element._pyplot_cache.values()
+        )
+        assert len(element._pyplot_cache) < 5
@@ -0,0 +1,66 @@
+import asyncio
+
+from chainlit.reaper import Reaper
+
+
+def test_keys_expire_in_deadline_order():
+    expired = []
+
+    async def expire(key):
+        expired.append(key)
+
+    async def main():
+        reaper = Reaper(expire=expire)
+        reaper.schedule("late", 0.06)
+        reaper.schedule("early", 0.02)
+        assert reaper.pending == 2
+        await asyncio.sleep(0.1)
+        assert reaper.pending == 0
+
+    asyncio.run(main())
+
+    assert expired == ["early", "late"]
+
+
+def test_cancelled_and_rescheduled_keys():
+    expired = []
+
+    async def expire(key):
+        expired.append(key)
+
+    async def main():
+        reaper = Reaper(expire=expire)
+        reaper.schedule("cancelled", 0.01)
+        reaper.schedule("rescheduled", 0.01)
+        assert reaper.cancel("cancelled")
+        assert not reaper.cancel("unknown")
+        reaper.schedule("rescheduled", 0.05)
+
+        await asyncio.sleep(0.03)
+        assert expired == []
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+
+    assert expired == ["rescheduled"]
+
+
+def test_failed_expiry_does_not_stop_the_reaper():
+    expired = []
+
+    async def expire(key):
+        if key == "failing":
+            raise ValueError(key)
+        expired.append(key)
+
+    async def main():
+        reaper = Reaper(expire=expire, batch_size=1)
+        reaper.schedule("failing", 0)
+        reaper.schedule("a", 0.01)
+        reaper.schedule("b", 0.01)
+        await asyncio.sleep(0.05)
+        reaper.stop()
+
+    asyncio.run(main())
+
+    assert expired == ["a", "b"]
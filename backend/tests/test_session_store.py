@@ -0,0 +1,151 @@
+import asyncio
+from unittest import mock
+
+import fakeredis.aioredis
+from chainlit.session import WebsocketSession
+from chainlit.session_store import InMemorySessionStore, RedisSessionStore
+from chainlit.user import User
+
+SNAPSHOT = {"id": "session-1", "client_type": "webapp", "user_env": {"KEY": "é"}}
+
+
+def make_redis_store() -> RedisSessionStore:
+    store = RedisSessionStore(url="redis://localhost:6379")
+    store.client = fakeredis.aioredis.FakeRedis()
+    return store
+
+
+def test_in_memory_round_trip():
+    async def main():
+        store = InMemorySessionStore()
+        await store.set("session-1", SNAPSHOT)
+        assert await store.get("session-1") == SNAPSHOT
+        await store.delete("session-1")
+        assert await store.get("session-1") is None
+
+    asyncio.run(main())
+
+
+def test_in_memory_expiry():
+    async def main():
+        store = InMemorySessionStore()
+        with mock.patch("chainlit.session_store.time.monotonic", return_value=100):
+            await store.set("session-1", SNAPSHOT, ttl=10)
+        with mock.patch("chainlit.session_store.time.monotonic", return_value=105):
+            assert await store.get("session-1") == SNAPSHOT
+        with mock.patch("chainlit.session_store.time.monotonic", return_value=111):
+            assert await store.get("session-1") is None
+
+    asyncio.run(main())
+
+
+def test_redis_round_trip():
+    async def main():
+        store = make_redis_store()
+        await store.set("session-1", SNAPSHOT)
+        assert await store.get("session-1") == SNAPSHOT
+        await store.delete("session-1")
+        assert await store.get("session-1") is None
+
+    asyncio.run(main())
+
+
+def test_redis_expiry():
+    async def main():
+        store = make_redis_store()
+        await store.set("session-1", SNAPSHOT, ttl=60)
+        assert 0 < await store.client.ttl("chainlit:session:session-1") <= 60
+
+        await store.set("session-2", SNAPSHOT, ttl=1)
+        await asyncio.sleep(1.1)
+        assert await store.get("session-2") is None
+
+    asyncio.run(main())
+
+
+def test_session_snapshot_round_trip():
+    async def emit(event, data):
+        pass
+
+    def emit_call(event, data, timeout):
+        pass
+
+    async def main():
+        session = WebsocketSession(
+            id="session-1",
+            socket_id="socket-1",
+            emit=emit,
+            emit_call=emit_call,
+            user_env={"KEY": "value"},
+            client_type="webapp",
+            user=User(identifier="john"),
+            token="secret-jwt",
+        )
+        session.chat_settings = {"temperature": 0.5}
+        snapshot = session.to_snapshot()
+        session.delete()
+
+        assert "secret-jwt" not in str(snapshot)
+
+        store = make_redis_store()
+        await store.set(session.id, snapshot, ttl=60)
+
+        restored = WebsocketSession.from_snapshot(
+            await store.get(session.id), "socket-2", emit, emit_call, "new-jwt"
+        )
+        try:
+            assert restored.id == "session-1"
+            assert restored.socket_id == "socket-2"
+            assert restored.token == "new-jwt"
+            assert restored.user and restored.user.identifier == "john"
+            assert restored.user_env == {"KEY": "value"}
+            assert restored.chat_settings == {"temperature": 0.5}
+            assert restored.restored
+        finally:
+            restored.delete()
+
+    asyncio.run(main())
+
+
+def test_user_session_updates_are_checkpointed():
+    from chainlit.context import init_ws_context
+    from chainlit.tasks import task_supervisor
+    from chainlit.user_session import user_session
+
+    async def emit(event, data):
+        pass
+
+    def emit_call(event, data, timeout):
+        pass
+
+    async def main():
+        store = make_redis_store()
+        session = WebsocketSession(
+            id="session-1",
+            socket_id="socket-1",
+            emit=emit,
+            emit_call=emit_call,
+            user_env={},
+            client_type="webapp",
+        )
+        try:
+            with mock.patch("chainlit.session_store._session_store", store):
+                init_ws_context(session)
+                user_session.set("step", 1)
+                user_session.set("step", 2)
+                await task_supervisor.drain(timeout=1)
+
+                snapshot = await store.get("session-1")
+                assert snapshot and snapshot["user_session"]["step"] == 2
+        finally:
+            session.delete()
+
+    asyncio.run(main())
+
+
+def test_unshared_store_is_not_checkpointed():
+    store = InMemorySessionStore()
+    session = mock.Mock(spec=WebsocketSession)
+    with mock.patch("chainlit.session_store._session_store", store):
+        WebsocketSession.checkpoint(session)
+    assert not store._snapshots
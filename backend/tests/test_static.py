@@ -0,0 +1,84 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+from chainlit.static import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    PrecompressedStaticFiles,
+    load_hashed_files,
+)
+
+
+@pytest.fixture
+def build_dir(tmp_path):
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    (assets / "index-a1b2c3d4.js").write_text("console.log('index')")
+    (assets / "index-a1b2c3d4.js.gz").write_bytes(
+        gzip.compress(b"console.log('index')")
+    )
+    (assets / "index-abcdefgh.css").write_text("body {}")
+    (assets / "react-markdown.js").write_text("console.log('markdown')")
+    manifest = {
+        "index.html": {
+            "file": "assets/index-a1b2c3d4.js",
+            "css": ["assets/index-abcdefgh.css"],
+            "isEntry": True,
+        }
+    }
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest))
+    return tmp_path
+
+
+def get(files, path, accept_encoding="identity"):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+    return asyncio.run(files.get_response(path, scope))
+
+
+def make_files(build_dir, hashed_files=()):
+    return PrecompressedStaticFiles(
+        directory=str(build_dir / "assets"), hashed_files=hashed_files
+    )
+
+
+def test_hashed_files_are_read_from_the_manifest(build_dir):
+    assert load_hashed_files(str(build_dir), "assets/") == {
+        "index-a1b2c3d4.js",
+        "index-abcdefgh.css",
+    }
+
+
+def test_no_file_is_hashed_without_manifest(tmp_path):
+    assert load_hashed_files(str(tmp_path), "assets/") == set()
+
+
+def test_only_hashed_files_are_immutable(build_dir):
+    files = make_files(build_dir, load_hashed_files(str(build_dir), "assets/"))
+
+    # No digit in the hash
+    response = get(files, "index-abcdefgh.css")
+    assert response.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+
+    # Looks like a hashed name, but is not
+    response = get(files, "react-markdown.js")
+    assert response.headers["Cache-Control"] == REVALIDATE_CACHE_CONTROL
+
+
+def test_precompressed_sibling_is_served(build_dir):
+    files = make_files(build_dir, {"index-a1b2c3d4.js"})
+
+    response = get(files, "index-a1b2c3d4.js", "gzip, deflate")
+    assert response.path.endswith("index-a1b2c3d4.js.gz")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+    response = get(files, "index-a1b2c3d4.js")
+    assert response.path.endswith("index-a1b2c3d4.js")
+    assert "Content-Encoding" not in response.headers
@@ -0,0 +1,79 @@
+import asyncio
+
+from chainlit.stream import TokenStreamCoalescer
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    async def emit(self, event, data):
+        self.events.append((event, data))
+
+
+def test_tokens_are_batched_per_step():
+    recorder = Recorder()
+
+    async def main():
+        coalescer = TokenStreamCoalescer(recorder.emit, interval=10, max_bytes=1000)
+        await coalescer.push("a", "Hello")
+        await coalescer.push("b", "Hi")
+        await coalescer.push("a", " world")
+        assert recorder.events == []
+        await coalescer.flush()
+
+    asyncio.run(main())
+
+    assert recorder.events == [
+        (
+            "stream_tokens",
+            [
+                {"id": "a", "token": "Hello world", "isSequence": False},
+                {"id": "b", "token": "Hi", "isSequence": False},
+            ],
+        )
+    ]
+
+
+def test_sequence_replaces_buffered_tokens():
+    recorder = Recorder()
+
+    async def main():
+        coalescer = TokenStreamCoalescer(recorder.emit, interval=10, max_bytes=1000)
+        await coalescer.push("a", "draft")
+        await coalescer.push("a", "final", is_sequence=True)
+        await coalescer.flush()
+
+    asyncio.run(main())
+
+    assert recorder.events[0][1] == [{"id": "a", "token": "final", "isSequence": True}]
+
+
+def test_flush_on_size_and_timer():
+    recorder = Recorder()
+
+    async def main():
+        coalescer = TokenStreamCoalescer(recorder.emit, interval=0.01, max_bytes=4)
+        await coalescer.push("a", "abcd")
+        assert len(recorder.events) == 1
+
+        await coalescer.push("a", "e")
+        assert len(recorder.events) == 1
+        await asyncio.sleep(0.05)
+        assert len(recorder.events) == 2
+
+    asyncio.run(main())
+
+
+def test_no_interval_sends_right_away():
+    recorder = Recorder()
+
+    async def main():
+        coalescer = TokenStreamCoalescer(recorder.emit, interval=0, max_bytes=1000)
+        await coalescer.push("a", "x")
+
+    asyncio.run(main())
+
+    assert recorder.events == [
+        ("stream_tokens", [{"id": "a", "token": "x", "isSequence": False}])
+    ]
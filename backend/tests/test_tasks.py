@@ -0,0 +1,87 @@
+import asyncio
+import threading
+
+import pytest
+from chainlit.tasks import TaskSupervisor
+
+
+def test_concurrency_is_bounded_per_category():
+    running = 0
+    peak = 0
+
+    async def job():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    async def main():
+        supervisor = TaskSupervisor(limits={"jobs": 2})
+        for _ in range(6):
+            supervisor.spawn(job(), "jobs")
+        assert supervisor.pending == 6
+        await supervisor.drain(timeout=1)
+        assert supervisor.pending == 0
+
+    asyncio.run(main())
+
+    assert peak == 2
+
+
+def test_spawn_from_another_thread():
+    done = []
+
+    async def job(index):
+        done.append((index, threading.current_thread() is threading.main_thread()))
+
+    async def main():
+        supervisor = TaskSupervisor(limits={"jobs": 10})
+        loop = asyncio.get_running_loop()
+
+        def spawn_from_thread():
+            for index in range(100):
+                assert supervisor.spawn(job(index), "jobs", loop=loop) is None
+
+        thread = threading.Thread(target=spawn_from_thread)
+        thread.start()
+        while thread.is_alive():
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.01)
+        await supervisor.drain(timeout=1)
+        assert supervisor.spawned_count["jobs"] == 100
+
+    asyncio.run(main())
+
+    assert sorted(done) == [(index, True) for index in range(100)]
+
+
+def test_failures_are_counted_and_drain_cancels_late_tasks():
+    async def fail():
+        raise ValueError("failed")
+
+    async def hang():
+        await asyncio.Event().wait()
+
+    async def main():
+        supervisor = TaskSupervisor(limits={"jobs": 10})
+        supervisor.spawn(fail(), "jobs")
+        supervisor.spawn(hang(), "jobs")
+        await supervisor.drain(timeout=0.05)
+        assert supervisor.failed_count["jobs"] == 1
+        assert supervisor.pending == 0
+
+    asyncio.run(main())
+
+
+def test_unknown_category():
+    async def job():
+        pass
+
+    async def main():
+        co = job()
+        with pytest.raises(ValueError):
+            TaskSupervisor(limits={}).spawn(co, "jobs")
+        co.close()
+
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from chainlit.session import FileTooLargeError, WebsocketSession
+
+
+async def emit(event, data):
+    pass
+
+
+def emit_call(event, data, timeout):
+    pass
+
+
+def make_session() -> WebsocketSession:
+    return WebsocketSession(
+        id="upload-session",
+        socket_id="upload-socket",
+        emit=emit,
+        emit_call=emit_call,
+        user_env={},
+        client_type="webapp",
+    )
+
+
+async def chunks(count: int, size: int = 10):
+    for _ in range(count):
+        # Let the concurrent uploads interleave
+        await asyncio.sleep(0)
+        yield b"x" * size
+
+
+def test_uploads_are_written_and_counted():
+    async def main():
+        session = make_session()
+        try:
+            reference = await session.persist_file_stream(
+                "a.txt", "text/plain", chunks(3), max_session_size=100
+            )
+            assert session.files[reference["id"]]["size"] == 30
+            assert session.files_size == 30
+            assert session.uploading == {}
+        finally:
+            session.delete()
+            session.delete_files()
+
+    asyncio.run(main())
+
+
+def test_concurrent_uploads_share_the_session_limit():
+    async def main():
+        session = make_session()
+        try:
+            results = await asyncio.gather(
+                *[
+                    session.persist_file_stream(
+                        f"{index}.txt", "text/plain", chunks(4), max_session_size=100
+                    )
+                    for index in range(3)
+                ],
+                return_exceptions=True,
+            )
+            failures = [r for r in results if isinstance(r, FileTooLargeError)]
+            assert failures
+            assert session.files_size <= 100
+            assert session.uploading == {}
+        finally:
+            session.delete()
+            session.delete_files()
+
+    asyncio.run(main())
+
+
+def test_file_limit():
+    async def main():
+        session = make_session()
+        try:
+            with pytest.raises(FileTooLargeError):
+                await session.persist_file_stream(
+                    "a.txt", "text/plain", chunks(3), max_size=25
+                )
+            assert session.files_size == 0
+        finally:
+            session.delete()
+            session.delete_files()
+
+    asyncio.run(main())
@@ -0,0 +1,152 @@
+import asyncio
+import os
+import signal
+import time
+from typing import Dict, List
+from unittest import mock
+
+import pytest
+from chainlit.cli import workers
+from chainlit.cli.workers import (
+    StickyProxy,
+    forward_client_address,
+    get_session_key,
+    get_worker_index,
+    run_workers,
+)
+
+WORKERS = 4
+
+
+@pytest.mark.parametrize(
+    "request_line,header_lines",
+    [
+        (b"GET /ws/socket.io/?EIO=4&sessionId=abc HTTP/1.1", []),
+        (b"POST /project/file?session_id=abc HTTP/1.1", []),
+        (b"GET /project/file/123?session_id=abc HTTP/1.1", []),
+        (b"GET /ws/socket.io/ HTTP/1.1", [b"X-Chainlit-Session-Id: abc"]),
+    ],
+)
+def test_get_session_key(request_line, header_lines):
+    assert get_session_key(request_line, header_lines) == "abc"
+
+
+def test_get_session_key_without_session():
+    assert get_session_key(b"GET /project/settings HTTP/1.1", []) is None
+
+
+def test_forward_client_address():
+    lines = forward_client_address(
+        [b"Host: app", b"X-Forwarded-For: 10.0.0.1", b"X-Real-IP: 6.6.6.6"],
+        "10.0.0.2",
+    )
+    assert lines == [
+        b"Host: app",
+        b"X-Forwarded-For: 10.0.0.1, 10.0.0.2",
+        b"X-Real-IP: 10.0.0.2",
+    ]
+
+
+async def start_workers(received: Dict[int, List[bytes]]):
+    servers = []
+    for index in range(WORKERS):
+
+        async def handle(reader, writer, index=index):
+            head = await reader.readuntil(b"\r\n\r\n")
+            received[index].append(head)
+            body = str(index).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)
+            )
+            await writer.drain()
+            writer.close()
+
+        servers.append(await asyncio.start_server(handle, "127.0.0.1", 0))
+    return servers
+
+
+async def request(port: int, target: str) -> int:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"POST {target} HTTP/1.1\r\nHost: app\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b"\r\n\r\n", 1)[1])
+
+
+def test_rest_endpoints_reach_the_session_worker():
+    received: Dict[int, List[bytes]] = {index: [] for index in range(WORKERS)}
+
+    async def main():
+        servers = await start_workers(received)
+        proxy = StickyProxy([s.sockets[0].getsockname()[:2] for s in servers])
+        server = await asyncio.start_server(proxy.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        expected = get_worker_index("abc", WORKERS)
+        targets = [
+            "/ws/socket.io/?EIO=4&transport=polling&sessionId=abc",
+            "/project/file?session_id=abc",
+            "/project/asr?session_id=abc",
+            "/project/file/123?session_id=abc",
+            "/project/tts?session_id=abc",
+            "/project/aigc/image?session_id=abc",
+        ]
+        try:
+            for target in targets:
+                assert await request(port, target) == expected
+        finally:
+            server.close()
+            for s in servers:
+                s.close()
+
+        head = received[expected][0]
+        assert b"X-Forwarded-For: 127.0.0.1" in head
+        assert b"X-Real-IP: 127.0.0.1" in head
+        assert b"Connection: close" in head
+
+    asyncio.run(main())
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not (result := predicate()):
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.05)
+    return result
+
+
+def test_exited_workers_are_restarted(tmp_path):
+    def serve(index, sock):
+        (tmp_path / f"{index}-{os.getpid()}-{sock.getsockname()[1]}").touch()
+        while True:
+            time.sleep(1)
+
+    def started(index):
+        return [name.split("-") for name in os.listdir(tmp_path) if name[0] == index]
+
+    supervisor = os.fork()
+    if supervisor == 0:
+        try:
+            with mock.patch.object(workers, "MIN_UPTIME", 0):
+                run_workers("127.0.0.1", 0, 2, serve)
+        finally:
+            os._exit(0)
+
+    try:
+        [(_, pid, port)] = wait_for(lambda: started("0"))
+        wait_for(lambda: started("1"))
+
+        os.kill(int(pid), signal.SIGKILL)
+        restarted = wait_for(lambda: len(started("0")) == 2 and started("0"))
+        # Served on the same socket
+        assert {entry[2] for entry in restarted} == {port}
+        assert len(started("1")) == 1
+    finally:
+        os.kill(supervisor, signal.SIGTERM)
+        os.waitpid(supervisor, 0)
+
+    # The workers are stopped with the supervisor
+    for _, pid, _ in started("0") + started("1"):
+        with pytest.raises(ProcessLookupError):
+            os.kill(int(pid), 0)
@@ -0,0 +1,175 @@
+import asyncio
+from unittest import mock
+
+from chainlit.data.write_behind import WRITE_RETRIES, StepWriteBehindQueue
+
+
+class Writer:
+    def __init__(self, failures: int = 0):
+        self.batches = []
+        self.failures = failures
+
+    async def write(self, steps):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("API unavailable")
+        self.batches.append(steps)
+
+
+def test_writes_are_coalesced_per_step():
+    writer = Writer()
+
+    async def main():
+        queue = StepWriteBehindQueue(writer.write, interval=10, max_batch_size=10)
+        await queue.put({"id": "a", "output": "1", "attachments": [1]})
+        await queue.put({"id": "b", "output": "x"})
+        await queue.put({"id": "a", "output": "2", "attachments": [2]})
+        assert queue.depth == 2
+        await queue.drain()
+        assert queue.merged_count == 1
+
+    asyncio.run(main())
+
+    assert writer.batches == [
+        [
+            {"id": "a", "output": "2", "attachments": [1, 2]},
+            {"id": "b", "output": "x"},
+        ]
+    ]
+
+
+def test_flush_on_batch_size_and_timer():
+    writer = Writer()
+
+    async def main():
+        queue = StepWriteBehindQueue(writer.write, interval=0.01, max_batch_size=2)
+        await queue.put({"id": "a"})
+        await queue.put({"id": "b"})
+        assert len(writer.batches) == 1
+
+        await queue.put({"id": "c"})
+        await asyncio.sleep(0.05)
+        assert len(writer.batches) == 2
+
+    asyncio.run(main())
+
+
+def test_discarded_steps_are_not_written():
+    writer = Writer()
+
+    async def main():
+        queue = StepWriteBehindQueue(writer.write, interval=10, max_batch_size=10)
+        await queue.put({"id": "a"})
+        queue.discard("a")
+        await queue.drain()
+
+    asyncio.run(main())
+
+    assert writer.batches == []
+
+
+@mock.patch("chainlit.data.write_behind.RETRY_BACKOFF", 0)
+def test_failed_batches_are_retried():
+    writer = Writer(failures=2)
+
+    async def main():
+        queue = StepWriteBehindQueue(writer.write, interval=0, max_batch_size=10)
+        await queue.put({"id": "a", "output": "1"})
+        # Merged with the failed write
+        await queue.put({"id": "a", "output": "2"})
+        await queue.drain()
+        assert queue.retry_count == 2
+        assert queue.dropped_count == 0
+
+    asyncio.run(main())
+
+    assert writer.batches == [[{"id": "a", "output": "2"}]]
+
+
+@mock.patch("chainlit.data.write_behind.RETRY_BACKOFF", 0)
+def test_steps_are_dropped_after_the_retries():
+    writer = Writer(failures=WRITE_RETRIES + 1)
+
+    async def main():
+        queue = StepWriteBehindQueue(writer.write, interval=0, max_batch_size=10)
+        await queue.put({"id": "a"})
+        await queue.drain()
+        assert queue.dropped_count == 1
+        await queue.put({"id": "b"})
+
+    asyncio.run(main())
+
+    assert writer.batches == [[{"id": "b"}]]
+
+
+def test_failing_steps_are_isolated():
+    batches = []
+
+    async def write(steps):
+        if any(step.get("invalid") for step in steps):
+            raise ValueError("Invalid step")
+        batches.append([step["id"] for step in steps])
+
+    async def main():
+        queue = StepWriteBehindQueue(write, interval=10, max_batch_size=10)
+        for index in range(8):
+            await queue.put({"id": str(index), "invalid": index == 5})
+        await queue.drain()
+        # Not retried
+        assert queue.retry_count == 0
+        assert queue.dropped_count == 1
+
+    asyncio.run(main())
+
+    assert sorted(sum(batches, [])) == ["0", "1", "2", "3", "4", "6", "7"]
+
+
+def test_retries_dont_block_the_flushes():
+    writer = Writer(failures=1)
+
+    async def main():
+        queue = StepWriteBehindQueue(writer.write, interval=10, max_batch_size=10)
+        await queue.put({"id": "a", "threadId": "t1"})
+        await asyncio.wait_for(queue.flush(), 0.1)
+        assert queue.depth == 1
+
+        await queue.put({"id": "b", "threadId": "t2"})
+        # The retry of "a" is scheduled later
+        await asyncio.wait_for(queue.flush("t2"), 0.1)
+        assert queue.depth == 1
+        await queue.drain()
+
+    asyncio.run(main())
+
+    assert writer.batches == [
+        [{"id": "b", "threadId": "t2"}],
+        [{"id": "a", "threadId": "t1"}],
+    ]
+
+
+def test_flush_of_a_thread():
+    writer = Writer()
+
+    async def main():
+        queue = StepWriteBehindQueue(writer.write, interval=10, max_batch_size=10)
+        await queue.put({"id": "a", "threadId": "t1"})
+        await queue.put({"id": "b", "threadId": "t2"})
+        await queue.flush("t2")
+        assert writer.batches == [[{"id": "b", "threadId": "t2"}]]
+        assert queue.depth == 1
+        await queue.drain()
+
+    asyncio.run(main())
+
+
+def test_queue_created_outside_the_loop():
+    writer = Writer()
+    queue = StepWriteBehindQueue(writer.write, interval=0, max_batch_size=10)
+
+    async def main():
+        await asyncio.gather(*[queue.put({"id": str(index)}) for index in range(5)])
+
+    # The lock belongs to the loop running the first flush
+    asyncio.run(main())
+
+    assert len(sum(writer.batches, [])) == 5
@@ -7,6 +7,10 @@ import tsconfigPaths from 'vite-tsconfig-paths';
 // https://vitejs.dev/config/
 export default defineConfig({
   plugins: [react(), tsconfigPaths(), svgr()],
+  build: {
+    // Lists the hashed bundle names, served with immutable caching
+    manifest: true
+  },
   server: {
     host: '0.0.0.0',
     proxy: {
@@ -33,6 +33,7 @@ interface TElement<T> {
   mime?: string;
   url?: string;
   chainlitKey?: string;
+  sequence?: number;
 }
 
 interface TMessageElement<T> extends TElement<T> {
@@ -34,6 +34,7 @@ export interface IStep {
   input?: string;
   output: string;
   createdAt: number | string;
+  sequence?: number;
   start?: number | string;
   end?: number | string;
   disableFeedback?: boolean;
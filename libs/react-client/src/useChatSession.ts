@@ -87,10 +87,14 @@ const useChatSession = () => {
     }) => {
       const socket = io(client.httpEndpoint, {
         path: '/ws/socket.io',
+        // Also sent as query parameter to route websocket upgrades to the right worker
+        query: { sessionId },
         extraHeaders: {
           Authorization: accessToken || '',
           'X-Chainlit-Client-Type': client.type,
           'X-Chainlit-Session-Id': sessionId,
+          // Acknowledges the sync events, used by the server to wait for the client
+          'X-Chainlit-Client-Sync': 'true',
           'X-Chainlit-Thread-Id': idToResume || '',
           'user-env': JSON.stringify(userEnv),
           'X-Chainlit-Chat-Profile': chatProfile || ''
@@ -211,6 +215,16 @@ const useChatSession = () => {
         );
       });
 
+      socket.on('stream_tokens', (tokens: IToken[]) => {
+        setMessages((oldMessages) =>
+          tokens.reduce(
+            (messages, { id, token, isSequence }) =>
+              updateMessageContentById(messages, id, token, isSequence),
+            oldMessages
+          )
+        );
+      });
+
       socket.on('ask', ({ msg, spec }, callback) => {
         console.log('ask msg', msg, spec);
         if (!isEmpty(msg.speechContent)) {
@@ -413,6 +427,11 @@ const useChatSession = () => {
         });
       });
 
+      socket.on('sync', (callback: () => void) => {
+        // Events are handled in order, every event sent before has been handled
+        callback();
+      });
+
       socket.on('token_usage', (count: number) => {
         setTokenCount((old) => old + count);
       });
@@ -30,6 +30,24 @@ const isLastMessage = (messages: IStep[], index: number) => {
 
 // Nested messages utils
 
+// Insert a message according to its sequence, messages without sequence are appended
+const insertBySequence = (messages: IStep[], message: IStep): IStep[] => {
+  if (message.sequence === undefined) {
+    return [...messages, message];
+  }
+
+  let index = messages.length;
+  while (
+    index > 0 &&
+    messages[index - 1].sequence !== undefined &&
+    messages[index - 1].sequence! > message.sequence
+  ) {
+    index--;
+  }
+
+  return [...messages.slice(0, index), message, ...messages.slice(index)];
+};
+
 const addMessage = (messages: IStep[], message: IStep): IStep[] => {
   if (hasMessageById(messages, message.id)) {
     return updateMessageById(messages, message.id, message);
@@ -38,7 +56,7 @@ const addMessage = (messages: IStep[], message: IStep): IStep[] => {
   } else if ('indent' in message && message.indent && message.indent > 0) {
     return addIndentMessage(messages, message.indent, message);
   } else {
-    return [...messages, message];
+    return insertBySequence(messages, message);
   }
 };
 
@@ -87,7 +105,7 @@ const addMessageToParent = (
     const msg = nextMessages[index];
 
     if (isEqual(msg.id, parentId)) {
-      msg.steps = msg.steps ? [...msg.steps, newMessage] : [newMessage];
+      msg.steps = insertBySequence(msg.steps || [], newMessage);
       nextMessages[index] = { ...msg };
     } else if (hasMessageById(nextMessages, parentId) && msg.steps) {
       msg.steps = addMessageToParent(msg.steps, parentId, newMessage);